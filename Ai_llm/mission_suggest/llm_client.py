@@ -0,0 +1,36 @@
+import os
+import random
+import time
+
+import openai  # type: ignore
+
+# mission_suggest 스크립트는 LLM을 한 번에 하나씩 순서대로 부르므로 동시성 제한은 필요 없고,
+# 429(rate limit)만 Retry-After를 따르거나 full jitter 지수 백오프로 다시 시도합니다.
+# 클라이언트 자체 재시도와 겹치지 않도록 OpenAI/ChatOpenAI는 max_retries=0으로 만듭니다.
+LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', 3))
+LLM_BACKOFF_BASE = float(os.getenv('LLM_BACKOFF_BASE', 1.0))
+LLM_BACKOFF_MAX = float(os.getenv('LLM_BACKOFF_MAX', 30.0))
+
+
+def _retry_after(error):
+    response = getattr(error, 'response', None)
+    try:
+        return float(response.headers.get('retry-after')) if response is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def call_with_retries(fn, *args, max_retries=LLM_MAX_RETRIES, **kwargs):
+    """fn(*args, **kwargs)를 호출하고 openai.RateLimitError면 기다렸다가 max_retries번까지 재시도"""
+    attempt = 0
+    while True:
+        try:
+            return fn(*args, **kwargs)
+        except openai.RateLimitError as e:
+            if attempt >= max_retries:
+                raise
+            delay = _retry_after(e)
+            if delay is None:
+                delay = random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2 ** attempt))
+            time.sleep(min(LLM_BACKOFF_MAX, delay))
+            attempt += 1
@@ -5,10 +5,19 @@ import chromadb  # type: ignore
 from chromadb.config import Settings  # type: ignore
 from openai import OpenAI  # type: ignore
 import os
+import sys
+from pathlib import Path
 from typing import List, Dict, Any
 from dotenv import load_dotenv  # type: ignore
 load_dotenv()
 from db_config import get_db_config
+from llm_client import call_with_retries
+
+# 임베딩은 Crawling_Haman의 디스크 캐시를 거쳐 같은 텍스트를 다시 요청하지 않음
+CRAWLING_DIR = Path(__file__).resolve().parents[2] / 'Crawling_Haman'
+if str(CRAWLING_DIR) not in sys.path:
+    sys.path.append(str(CRAWLING_DIR))
+from embedding_cache import EmbeddingCache  # noqa: E402
 
 MYSQL_HOST = os.getenv('MYSQL_HOST', 'localhost')
 MYSQL_USER = os.getenv('MYSQL_USER', 'root')
@@ -19,7 +28,27 @@ OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 CHROMA_PATH = './chroma_missions'
 chroma_client = chromadb.Client(Settings(persist_directory=CHROMA_PATH))
 collection = chroma_client.get_or_create_collection('missions')
-openai_client = OpenAI(api_key=OPENAI_API_KEY)
+# 429 재시도는 llm_client.call_with_retries가 담당
+openai_client = OpenAI(api_key=OPENAI_API_KEY, max_retries=0)
+
+EMBEDDING_MODEL = 'text-embedding-3-small'
+EMBEDDING_BATCH_SIZE = 256
+embedding_cache = EmbeddingCache(EMBEDDING_MODEL)
+
+def embed_texts(texts: List[str]) -> List[List[float]]:
+    """캐시에 없는 텍스트만 배치로 묶어 OpenAI 임베딩 API 호출"""
+    def encode(batch):
+        vectors = []
+        for i in range(0, len(batch), EMBEDDING_BATCH_SIZE):
+            response = openai_client.embeddings.create(
+                input=batch[i:i + EMBEDDING_BATCH_SIZE],
+                model=EMBEDDING_MODEL
+            )
+            vectors.extend(item.embedding for item in response.data)
+        return vectors
+    embeddings = embedding_cache.encode(texts, encode)
+    embedding_cache.flush()
+    return embeddings.tolist()
 
 # DB 연결 함수 예시
 
@@ -43,24 +72,14 @@ def build_mission_vector_db():
     items = fetch_mission_descriptions()
     texts = [item['description'] for item in items]
     ids = [f"{item['type']}_{item['id']}" for item in items]
-    embeddings = []
-    for text in texts:
-        response = openai_client.embeddings.create(
-            input=text,
-            model='text-embedding-3-small'
-        )
-        embeddings.append(response.data[0].embedding)
+    embeddings = embed_texts(texts)
     collection.add(documents=texts, embeddings=embeddings, ids=ids)
     print(f"{len(texts)}개 미션/파트 임베딩 저장 완료.")
 
 # 유저 프로필(스킬, 관심사 등) 벡터화 예시
 def get_user_profile_vector(user_id: int) -> List[float]:
     profile_text = 'Python, 데이터 분석, 여행'  # TODO: DB에서 유저 정보 불러와 합치기
-    response = openai_client.embeddings.create(
-        input=profile_text,
-        model='text-embedding-3-small'
-    )
-    return response.data[0].embedding
+    return embed_texts([profile_text])[0]
 
 # 벡터DB에서 유사한 id만 top-k로 반환
 def search_similar_mission_ids(user_id: int, top_k: int = 5) -> List[str]:
@@ -104,11 +123,9 @@ def recommend_missions(user_id: int) -> str:
     ---
     {chr(10).join(prompt_lines)}
     """
-    response = openai_client.chat.completions.create(
-        model='gpt-4o',
-        messages=[{"role": "system", "content": "당신은 미션 추천 전문가입니다."},
-                  {"role": "user", "content": prompt}]
-    )
+    messages = [{"role": "system", "content": "당신은 미션 추천 전문가입니다."},
+                {"role": "user", "content": prompt}]
+    response = call_with_retries(openai_client.chat.completions.create, model='gpt-4o', messages=messages)
     return response.choices[0].message.content
 
 if __name__ == '__main__':
@@ -8,6 +8,7 @@ from langchain.prompts import ChatPromptTemplate
 from langchain.schema.document import Document
 from langchain.schema.runnable import RunnablePassthrough, RunnableParallel
 from db_config import get_db_config
+from llm_client import call_with_retries
 
 # .env 파일 로드
 load_dotenv(dotenv_path=r'C:\Aicamp\7th-kDT-HACKATHON\.env')
@@ -94,8 +95,8 @@ def create_rag_pipeline(mission_docs, user_profiles):
     """
     prompt = ChatPromptTemplate.from_template(template)
 
-    # LLM 모델 설정
-    llm = ChatOpenAI(model_name="gpt-4o", temperature=0.7)
+    # LLM 모델 설정 (429 재시도는 llm_client.call_with_retries가 담당)
+    llm = ChatOpenAI(model_name="gpt-4o", temperature=0.7, max_retries=0)
 
     # RAG 체인 구성
     rag_chain = (
@@ -130,8 +131,8 @@ if __name__ == "__main__":
                 if user_info:
                     print(f"--- 👤 {user_info['name']}님을 위한 오늘의 추천 미션 --- ")
                     
-                    # RAG 체인 실행
-                    result = rag_chain.invoke({
+                    # RAG 체인 실행 (429면 재시도)
+                    result = call_with_retries(rag_chain.invoke, {
                         "user_id": target_user_id,
                         "name": user_info['name'],
                         "region": user_info['region'],
@@ -265,8 +265,8 @@ CREATE TABLE data_sources (
 -- SQL 레코드 ↔ Chroma 문서ID 매핑(재색인/삭제/감사에 필요)
 CREATE TABLE rag_documents (
   id BIGINT PRIMARY KEY AUTO_INCREMENT,
-  source_table ENUM('culture','locations') NOT NULL,
-  source_id BIGINT NOT NULL,             -- 해당 테이블의 PK
+  source_table ENUM('culture','locations','sitemap') NOT NULL,
+  source_id BIGINT NOT NULL,             -- 해당 테이블의 PK (sitemap은 링크의 페이지 코드)
   collection_name VARCHAR(120) NOT NULL, -- 예: 'haman_culture','haman_locations'
   chroma_doc_id VARCHAR(120) NOT NULL,
   embedding_model VARCHAR(160) NOT NULL, -- 사용 모델명
@@ -275,6 +275,18 @@ CREATE TABLE rag_documents (
   INDEX (collection_name)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
+-- CSV 원본 행 ↔ 적재된 레코드 매핑 (Step 1 증분 upsert용 content hash)
+CREATE TABLE source_rows (
+  source_file VARCHAR(200) NOT NULL,      -- CSV 파일명
+  row_key VARCHAR(64) NOT NULL,           -- 자연키(예: 이름+주소)의 SHA-1
+  target_table ENUM('culture','locations') NOT NULL,
+  target_id BIGINT NOT NULL,              -- 해당 테이블의 PK
+  content_hash VARCHAR(64) NOT NULL,      -- 적재 값 전체의 SHA-256
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (source_file, row_key),
+  INDEX (target_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
 #########################################################
 -- 추가 필요 테이블들 (프론트엔드 요구사항 반영)
 
@@ -2,13 +2,35 @@
 # -*- coding: utf-8 -*-
 """
 Step 1 (SRID fix): ensures WKT points are saved with SRID 4326.
+
+Datasets are declared in datasets.json (one entry per CSV: target table,
+category, column map, coordinate columns), so adding a municipal dataset is
+a manifest change only. CSVs are parsed concurrently in a process pool and
+a single writer connection inserts them with multi-row INSERTs of
+--batch-size rows (use --batch-size 1 for row-by-row inserts).
+
+The default --mode upsert is idempotent: every CSV row is tracked in
+source_rows by (source file, row key) with a hash of its content, so a re-run
+inserts new rows, updates changed ones and skips the rest. --mode insert
+appends everything without tracking (full reload into empty tables).
+Step 1 must be the only writer of locations/culture while it runs: new ids
+are taken from each multi-row INSERT's LAST_INSERT_ID().
+
+    python Step_1_전체_데이터_로드.py --workers 4 --batch-size 1000
 """
 
+import argparse
 import csv
+import hashlib
+import json
+import os
 import pymysql
 import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 
 DB_CONFIG = {
     "host": "localhost",
@@ -20,6 +42,31 @@ DB_CONFIG = {
 }
 
 BASE_DIR = Path(__file__).parent
+MANIFEST_PATH = BASE_DIR / "datasets.json"
+DEFAULT_BATCH_SIZE = 1000
+TABLES = ("locations", "culture")
+# Natural key fields per table, overridable with "key" in a manifest entry
+DEFAULT_KEYS = {"locations": ("name", "address"), "culture": ("title", "url")}
+ROW_FIELDS = {
+    "locations": ("name", "address", "phone", "wkt", "extra"),
+    "culture": ("title", "story", "url"),
+}
+
+SOURCE_ROWS_DDL = """
+CREATE TABLE IF NOT EXISTS source_rows (
+  source_file VARCHAR(200) NOT NULL,
+  row_key VARCHAR(64) NOT NULL,
+  target_table ENUM('culture','locations') NOT NULL,
+  target_id BIGINT NOT NULL,
+  content_hash VARCHAR(64) NOT NULL,
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (source_file, row_key),
+  INDEX (target_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+# Per-file report: (file name, category label, Counter of inserted/updated/unchanged/stale/errors, seconds)
+load_report: List[Tuple[str, str, Counter, float]] = []
 
 def get_conn():
     try:
@@ -32,22 +79,28 @@ def table_has_column(cursor, table: str, column: str) -> bool:
     cursor.execute("SHOW COLUMNS FROM `{}` LIKE %s".format(table), (column,))
     return cursor.fetchone() is not None
 
-def ensure_location_categories_seed(conn):
-    seeds = [
-        ("식음료", "맛집"),
-        ("식음료", "카페"),
-        ("의료", "병원/의원"),
-        ("공공시설", "경로당"),
-        ("공공시설", "마을회관"),
-    ]
+def load_manifest(path: Path) -> List[dict]:
+    """Enabled dataset entries of the manifest, in file order."""
+    with open(path, "r", encoding="utf-8") as f:
+        datasets = json.load(f)["datasets"]
+    enabled = []
+    for entry in datasets:
+        if not entry.get("enabled", True):
+            print(f"⏭️  Skipping {entry['file']}: {entry.get('note', 'disabled')}")
+            continue
+        if entry.get("table") not in TABLES:
+            raise ValueError(f"{entry['file']}: unknown table {entry.get('table')!r}")
+        enabled.append(entry)
+    return enabled
+
+def ensure_location_categories_seed(conn, categories: List[Tuple[str, str]]):
     with conn.cursor() as cur:
-        cur.execute("SELECT COUNT(*) AS c FROM location_categories")
-        if cur.fetchone()["c"] == 0:
-            cur.executemany(
-                "INSERT INTO location_categories (main, sub) VALUES (%s, %s)",
-                seeds,
-            )
-            print(f"🌱 Seeded location_categories: {len(seeds)} rows")
+        added = cur.executemany(
+            "INSERT IGNORE INTO location_categories (main, sub) VALUES (%s, %s)",
+            categories,
+        )
+    if added:
+        print(f"🌱 Seeded location_categories: {added} rows")
 
 def build_category_map(conn) -> Dict[Tuple[str, str], int]:
     with conn.cursor() as cur:
@@ -77,160 +130,290 @@ def to_point_wkt(lat: Optional[str], lon: Optional[str]) -> str:
         print("   ⚠️  invalid coord → using default center")
         return DEFAULT_WKT
 
-def load_locations_csv(
-    conn,
-    file_name: str,
-    main_cat: str,
-    sub_cat: str,
-    colmap: dict,
-    use_category_id: bool,
-    cat_map: Dict[Tuple[str, str], int],
-):
-    path = BASE_DIR / file_name
-    if not file_exists(path):
-        return 0
+def insert_rows(cur, table: str, columns: Tuple[str, ...], rows: List[tuple], batch_size: int, geom_column: Optional[str] = None):
+    """
+    Insert rows with one multi-row INSERT per batch_size rows.
+    A failing batch is retried row by row so only the bad rows are skipped.
+    Returns the new id of every row (None where the insert failed).
+    """
+    placeholders = ", ".join(
+        "ST_GeomFromText(%s, 4326)" if col == geom_column else "%s" for col in columns
+    )
+    row_sql = f"({placeholders})"
+    prefix = f"INSERT INTO `{table}` ({', '.join(columns)}) VALUES "
+    ids: List[Optional[int]] = []
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        try:
+            cur.execute(prefix + ", ".join([row_sql] * len(batch)), [v for row in batch for v in row])
+            # LAST_INSERT_ID() is the first id of a multi-row INSERT; the rest follow consecutively
+            ids.extend(range(cur.lastrowid, cur.lastrowid + len(batch)))
+        except Exception as e:
+            if len(batch) == 1:
+                print(f"   ❌ row {start + 1} failed: {e}")
+                ids.append(None)
+                continue
+            print(f"   ⚠️  batch at row {start + 1} failed ({e}) → retrying row by row")
+            for offset, row in enumerate(batch, start + 1):
+                try:
+                    cur.execute(prefix + row_sql, row)
+                    ids.append(cur.lastrowid)
+                except Exception as row_error:
+                    print(f"   ❌ row {offset} failed: {row_error}")
+                    ids.append(None)
+    return ids
 
-    print(f"\n📍 Loading: {file_name}  ({main_cat} / {sub_cat})")
-    inserted = 0
+def update_rows(cur, table: str, columns: Tuple[str, ...], rows: List[tuple], ids: List[int],
+                geom_column: Optional[str] = None) -> int:
+    """UPDATE changed rows by primary key. Returns the number of failed rows."""
+    assignments = ", ".join(
+        f"{col} = ST_GeomFromText(%s, 4326)" if col == geom_column else f"{col} = %s" for col in columns
+    )
+    sql = f"UPDATE `{table}` SET {assignments} WHERE id = %s"
     errors = 0
-    category_id = cat_map.get((main_cat, sub_cat))
-    if category_id is None and use_category_id:
-        raise RuntimeError(f"Category not found in location_categories: ({main_cat}, {sub_cat})")
+    for row, target_id in zip(rows, ids):
+        try:
+            cur.execute(sql, row + (target_id,))
+        except Exception as e:
+            print(f"   ❌ update of {table}.id={target_id} failed: {e}")
+            errors += 1
+    return errors
+
+def row_identity(table: str, entry: dict, row: tuple) -> Tuple[str, str]:
+    """(row_key, content_hash) of a parsed row; the category is part of the content."""
+    fields = dict(zip(ROW_FIELDS[table], row))
+    key_fields = entry.get("key", DEFAULT_KEYS[table])
+    natural_key = "\x1f".join(str(fields.get(f) or "") for f in key_fields)
+    row_key = hashlib.sha1(natural_key.encode("utf-8")).hexdigest()
+    payload = json.dumps([entry["category"], *row], ensure_ascii=False)
+    return row_key, hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def identify_rows(table: str, entry: dict, rows: List[tuple]) -> List[Tuple[str, str]]:
+    identities = []
+    seen = Counter()
+    for row in rows:
+        row_key, content_hash = row_identity(table, entry, row)
+        seen[row_key] += 1
+        if seen[row_key] > 1:
+            # Same natural key twice in one file: keep both rows, distinguished by occurrence
+            row_key = hashlib.sha1(f"{row_key}#{seen[row_key]}".encode("utf-8")).hexdigest()
+        identities.append((row_key, content_hash))
+    return identities
+
+def upsert_rows(cur, entry: dict, table: str, columns: Tuple[str, ...], values: List[tuple],
+                identities: List[Tuple[str, str]], batch_size: int, geom_column: Optional[str] = None) -> Counter:
+    """
+    Insert new rows, update rows whose content hash changed and skip the rest,
+    keeping source_rows in sync. Returns counts per outcome.
+    """
+    counts = Counter()
+    cur.execute(
+        "SELECT row_key, target_id, content_hash FROM source_rows WHERE source_file = %s AND target_table = %s",
+        (entry["file"], table),
+    )
+    existing = {r["row_key"]: (r["target_id"], r["content_hash"]) for r in cur.fetchall()}
+
+    new, changed = [], []
+    for value, (row_key, content_hash) in zip(values, identities):
+        known = existing.pop(row_key, None)
+        if known is None:
+            new.append((value, row_key, content_hash))
+        elif known[1] != content_hash:
+            changed.append((value, row_key, content_hash, known[0]))
+        else:
+            counts["unchanged"] += 1
+    # Rows that disappeared from the CSV are only reported; other tables may reference them
+    counts["stale"] = len(existing)
 
-    with conn.cursor() as cur, open(path, "r", encoding="utf-8-sig") as f:
+    tracked = []
+    if new:
+        ids = insert_rows(cur, table, columns, [v for v, _, _ in new], batch_size, geom_column)
+        for (_, row_key, content_hash), new_id in zip(new, ids):
+            if new_id is None:
+                counts["errors"] += 1
+            else:
+                counts["inserted"] += 1
+                tracked.append((entry["file"], row_key, table, new_id, content_hash))
+    if changed:
+        errors = update_rows(cur, table, columns, [v for v, _, _, _ in changed], [c[3] for c in changed], geom_column)
+        counts["errors"] += errors
+        counts["updated"] += len(changed) - errors
+        tracked.extend((entry["file"], row_key, table, target_id, content_hash)
+                       for _, row_key, content_hash, target_id in changed)
+
+    if tracked:
+        cur.executemany(
+            "INSERT INTO source_rows (source_file, row_key, target_table, target_id, content_hash) "
+            "VALUES (%s, %s, %s, %s, %s) "
+            "ON DUPLICATE KEY UPDATE target_id = VALUES(target_id), content_hash = VALUES(content_hash)",
+            tracked,
+        )
+    return counts
+
+def parse_locations_csv(path: Path, entry: dict) -> Tuple[List[tuple], int]:
+    """Returns ([(name, address, phone, wkt, extra_json), ...], skipped)."""
+    columns = entry["columns"]
+    coords = entry.get("coords", {})
+    extra_columns = entry.get("extra", [])
+    rows = []
+    errors = 0
+    with open(path, "r", encoding="utf-8-sig") as f:
         reader = csv.DictReader(f)
         for i, row in enumerate(reader, 1):
-            try:
-                name = (row.get(colmap["name"]) or "").strip()
-                address = (row.get(colmap["address"]) or "").strip()
-                if not name or not address:
-                    print(f"   ⚠️ row {i}: name/address missing → skip")
-                    errors += 1
-                    continue
-
-                phone = (row.get(colmap.get("phone", "")) or "").strip() or None
-                lat = (row.get(colmap.get("lat", "")) or "").strip()
-                lon = (row.get(colmap.get("lon", "")) or "").strip()
-                wkt = to_point_wkt(lon, lat)  # 'POINT(lon lat)'
-
-                if use_category_id:
-                    sql = (
-                        "INSERT INTO locations (name, category_id, address, phone, geom) "
-                        "VALUES (%s, %s, %s, %s, ST_GeomFromText(%s, 4326))"
-                    )
-                    cur.execute(sql, (name, category_id, address, phone, wkt))
-                else:
-                    sql = (
-                        "INSERT INTO locations (name, category_main, category_sub, address, phone, geom) "
-                        "VALUES (%s, %s, %s, %s, %s, ST_GeomFromText(%s, 4326))"
-                    )
-                    cur.execute(sql, (name, main_cat, sub_cat, address, phone, wkt))
-
-                inserted += 1
-            except Exception as e:
-                print(f"   ❌ row {i} failed: {e}")
+            name = (row.get(columns["name"]) or "").strip()
+            address = (row.get(columns["address"]) or "").strip()
+            if not name or not address:
+                print(f"   ⚠️ {path.name} row {i}: name/address missing → skip")
                 errors += 1
+                continue
 
-    print(f"   ✅ inserted: {inserted}, errors: {errors}")
-    return inserted
-
-def load_culture_csv(conn, file_name: str, category: str, colmap: dict):
-    path = BASE_DIR / file_name
-    if not file_exists(path):
-        return 0
+            phone = (row.get(columns.get("phone", "")) or "").strip() or None
+            lat = (row.get(coords.get("lat", "")) or "").strip()
+            lon = (row.get(coords.get("lon", "")) or "").strip()
+            wkt = to_point_wkt(lat, lon)  # 'POINT(lat lon)', axis order of SRID 4326
+            extra = {"source": path.name}
+            extra.update({col: (row.get(col) or "").strip() for col in extra_columns})
+            rows.append((name, address, phone, wkt, json.dumps(extra, ensure_ascii=False)))
+    return rows, errors
 
-    print(f"\n📚 Loading: {file_name}  (category={category})")
-    inserted = 0
+def parse_culture_csv(path: Path, entry: dict) -> Tuple[List[tuple], int]:
+    """Returns ([(title, story, url), ...], skipped)."""
+    columns = entry["columns"]
+    rows = []
     errors = 0
-
-    with conn.cursor() as cur, open(path, "r", encoding="utf-8-sig") as f:
+    with open(path, "r", encoding="utf-8-sig") as f:
         reader = csv.DictReader(f)
         for i, row in enumerate(reader, 1):
-            try:
-                title = (row.get(colmap["title"]) or "").strip()
-                story = (row.get(colmap["story"]) or "").strip()
-                url = (row.get(colmap.get("url", "")) or "").strip() or None
-                if not title or not story:
-                    print(f"   ⚠️ row {i}: title/story missing → skip")
-                    errors += 1
-                    continue
-                sql = "INSERT INTO culture (title, category, story, haman_url) VALUES (%s, %s, %s, %s)"
-                cur.execute(sql, (title, category, story, url))
-                inserted += 1
-            except Exception as e:
-                print(f"   ❌ row {i} failed: {e}")
+            title = (row.get(columns["title"]) or "").strip()
+            story = (row.get(columns["story"]) or "").strip()
+            url = (row.get(columns.get("url", "")) or "").strip() or None
+            if not title or not story:
+                print(f"   ⚠️ {path.name} row {i}: title/story missing → skip")
                 errors += 1
+                continue
+            rows.append((title, story, url))
+    return rows, errors
+
+def parse_dataset(entry: dict) -> Tuple[List[tuple], List[Tuple[str, str]], int, float]:
+    """Worker-process side: parse and hash one CSV. Returns (rows, identities, skipped, seconds)."""
+    started = time.perf_counter()
+    path = BASE_DIR / entry["file"]
+    if not file_exists(path):
+        return [], [], 0, 0.0
+    if entry["table"] == "locations":
+        rows, errors = parse_locations_csv(path, entry)
+    else:
+        rows, errors = parse_culture_csv(path, entry)
+    return rows, identify_rows(entry["table"], entry, rows), errors, time.perf_counter() - started
+
+def location_values(entry: dict, rows: List[tuple], use_category_id: bool, use_extra: bool,
+                    cat_map: Dict[Tuple[str, str], int]) -> Tuple[Tuple[str, ...], List[tuple]]:
+    main_cat, sub_cat = entry["category"]
+    category_id = cat_map.get((main_cat, sub_cat))
+    if category_id is None and use_category_id:
+        raise RuntimeError(f"Category not found in location_categories: ({main_cat}, {sub_cat})")
+
+    if use_category_id:
+        columns = ("name", "category_id", "address", "phone", "geom")
+        values = [(name, category_id, address, phone, wkt) for name, address, phone, wkt, _ in rows]
+    else:
+        columns = ("name", "category_main", "category_sub", "address", "phone", "geom")
+        values = [(name, main_cat, sub_cat, address, phone, wkt) for name, address, phone, wkt, _ in rows]
+    if use_extra:
+        columns += ("extra",)
+        values = [value + (row[4],) for value, row in zip(values, rows)]
+    return columns, values
+
+def culture_values(entry: dict, rows: List[tuple]) -> Tuple[Tuple[str, ...], List[tuple]]:
+    return ("title", "category", "story", "haman_url"), [(title, entry["category"], story, url) for title, story, url in rows]
+
+def write_dataset(cur, entry: dict, rows: List[tuple], identities: List[Tuple[str, str]], mode: str,
+                  use_category_id: bool, use_extra: bool, cat_map: Dict[Tuple[str, str], int], batch_size: int) -> Counter:
+    table = entry["table"]
+    geom_column = "geom" if table == "locations" else None
+    if table == "locations":
+        columns, values = location_values(entry, rows, use_category_id, use_extra, cat_map)
+    else:
+        columns, values = culture_values(entry, rows)
+
+    if mode == "upsert":
+        return upsert_rows(cur, entry, table, columns, values, identities, batch_size, geom_column)
+    ids = insert_rows(cur, table, columns, values, batch_size, geom_column)
+    inserted = sum(1 for i in ids if i is not None)
+    return Counter(inserted=inserted, errors=len(ids) - inserted)
 
-    print(f"   ✅ inserted: {inserted}, errors: {errors}")
-    return inserted
+def category_label(entry: dict) -> str:
+    return " / ".join(entry["category"]) if entry["table"] == "locations" else entry["category"]
+
+def report_file(file_name: str, label: str, counts: Counter, elapsed: float):
+    written = counts["inserted"] + counts["updated"]
+    rate = written / elapsed if elapsed > 0 else float("inf")
+    print(f"   ✅ inserted: {counts['inserted']}, updated: {counts['updated']}, unchanged: {counts['unchanged']}, "
+          f"stale: {counts['stale']}, errors: {counts['errors']}  ({elapsed:.2f}s, {rate:,.0f} rows/s)")
+    load_report.append((file_name, label, counts, elapsed))
+
+def print_load_report(elapsed: float):
+    print("\n📊 Load report (per category)")
+    by_category: Dict[str, Counter] = {}
+    for _, label, counts, _ in load_report:
+        by_category.setdefault(label, Counter()).update(counts)
+    print(f"   {'category':<24} {'inserted':>8} {'updated':>8} {'unchanged':>9} {'stale':>6} {'errors':>6}")
+    for label, counts in by_category.items():
+        print(f"   {label:<24} {counts['inserted']:>8} {counts['updated']:>8} {counts['unchanged']:>9} "
+              f"{counts['stale']:>6} {counts['errors']:>6}")
+    totals = sum((c for _, _, c, _ in load_report), Counter())
+    written = totals["inserted"] + totals["updated"]
+    rate = written / elapsed if elapsed > 0 else float("inf")
+    print(f"   total: {totals['inserted']} inserted, {totals['updated']} updated, {totals['unchanged']} unchanged "
+          f"in {elapsed:.2f}s ({rate:,.0f} rows/s)")
 
 def main():
-    print("🚀 Step 1 (SRID fix): Load Haman CSVs")
+    parser = argparse.ArgumentParser(description="Step 1: Load Haman CSVs into MySQL")
+    parser.add_argument("--manifest", type=Path, default=MANIFEST_PATH, help="dataset manifest (JSON)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="CSV parser processes")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help="rows per multi-row INSERT (1 = row by row)")
+    parser.add_argument("--mode", choices=["upsert", "insert"], default="upsert",
+                        help="upsert: apply only the delta (default); insert: append every row")
+    args = parser.parse_args()
+    batch_size = max(1, args.batch_size)
+
+    print(f"🚀 Step 1 (SRID fix): Load Haman CSVs ({args.mode}, batch size {batch_size}, {args.workers} workers)")
+    datasets = load_manifest(args.manifest)
     conn = get_conn()
     total = 0
+    started = time.perf_counter()
     try:
         with conn.cursor() as cur:
             has_cat_id = table_has_column(cur, "locations", "category_id")
-            print(f"🔎 locations.category_id present? {has_cat_id}")
+            has_extra = table_has_column(cur, "locations", "extra")
+            print(f"🔎 locations.category_id present? {has_cat_id}, locations.extra present? {has_extra}")
+            if args.mode == "upsert":
+                cur.execute(SOURCE_ROWS_DDL)
 
         cat_map = {}
         if has_cat_id:
-            ensure_location_categories_seed(conn)
+            categories = sorted({tuple(e["category"]) for e in datasets if e["table"] == "locations"})
+            ensure_location_categories_seed(conn, categories)
             cat_map = build_category_map(conn)
 
-        print("\n📍 Loading location datasets...")
-        total += load_locations_csv(
-            conn,
-            "경상남도_함안군_맛집리스트.csv",
-            "식음료", "맛집",
-            {"name": "음식점명", "address": "주소", "lat":"위도", "lon": "경도"},
-            has_cat_id, cat_map
-        )
-        total += load_locations_csv(
-            conn,
-            "경상남도_함안군_카페리스트.csv",
-            "식음료", "카페",
-            {"name": "카페명", "address": "주소", "lat": "경도", "lon": "위도"},
-            has_cat_id, cat_map
-        )
-        total += load_locations_csv(
-            conn,
-            "경상남도_함안군_병의원정보.csv",
-            "의료", "병원/의원",
-            {"name": "의료기관명", "address": "의료기관주소(도로명)", "phone": "의료기관전화번호"},
-            has_cat_id, cat_map
-        )
-        total += load_locations_csv(
-            conn,
-            "경상남도_함안군_경로당 현황.csv",
-            "공공시설", "경로당",
-            {"name": "경로당명", "address": "주 소"},
-            has_cat_id, cat_map
-        )
-        total += load_locations_csv(
-            conn,
-            "경상남도_함안군_마을회관 현황.csv",
-            "공공시설", "마을회관",
-            {"name": "마을회관명", "address": "주 소"},
-            has_cat_id, cat_map
-        )
-
-        print("\n📚 Loading culture datasets...")
-        total += load_culture_csv(
-            conn,
-            "경상남도_함안군_인물.csv",
-            "인물",
-            {"title": "이름", "story": "설명", "url": "링크"}
-        )
-        total += load_culture_csv(
-            conn,
-            "경상남도_함안군_전설.csv",
-            "전설",
-            {"title": "제목", "story": "상세정보", "url": "링크"}
-        )
+        # Files are parsed in parallel; this process is the only writer, in manifest order
+        with ProcessPoolExecutor(max_workers=max(1, args.workers)) as pool, conn.cursor() as cur:
+            for entry, (rows, identities, errors, parse_seconds) in zip(datasets, pool.map(parse_dataset, datasets)):
+                write_started = time.perf_counter()
+                label = category_label(entry)
+                icon = "📍" if entry["table"] == "locations" else "📚"
+                print(f"\n{icon} Loading: {entry['file']}  ({label})")
+                counts = write_dataset(cur, entry, rows, identities, args.mode,
+                                       has_cat_id, has_extra, cat_map, batch_size)
+                counts["errors"] += errors
+                report_file(entry["file"], label, counts, parse_seconds + time.perf_counter() - write_started)
+                total += counts["inserted"] + counts["updated"]
 
         conn.commit()
-        print("\n🎉 Done. Inserted total rows:", total)
+        print_load_report(time.perf_counter() - started)
+        print("\n🎉 Done. Inserted/updated rows:", total)
     except Exception as e:
         conn.rollback()
         print("❌ Error:", e)
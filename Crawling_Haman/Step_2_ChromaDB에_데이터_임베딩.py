@@ -3,8 +3,25 @@
 """
 MySQL의 culture 테이블 데이터를 ChromaDB에 임베딩하여 저장하는 스크립트
 한국어 특화 임베딩 모델을 사용하여 의미 기반 검색이 가능하도록 함
+
+기본은 증분 동기화: rag_documents(source_id, chroma_doc_id, embedding_model)와
+비교해 추가/변경된 행만 임베딩하고 삭제된 행의 문서는 지웁니다.
+chroma_doc_id에 내용 해시가 들어 있어 변경 여부를 MySQL만 보고 판단합니다.
+--full 옵션을 주면 예전처럼 컬렉션을 지우고 전체를 다시 임베딩합니다.
+임베딩 벡터는 embedding_cache의 디스크 캐시(모델별)에 남으므로 --full 재구축이나
+모델 변경 후 되돌아올 때도 같은 텍스트는 다시 인코딩하지 않습니다.
+긴 이야기는 korean_chunker로 모델 토큰 한도 안의 청크로 나눠 각각 저장하고
+(메타데이터 mysql_id/parent_doc_id), 검색 시 부모별로 합칩니다.
+인코딩은 embedding_pipeline으로 길이순 청크를 --workers개 프로세스에 나눠 돌리고,
+ChromaDB 저장은 별도 스레드에서 동시에 진행합니다.
+--export-numpy를 주면 동기화가 끝난 컬렉션을 numpy_vector_index(vector_index/)로도
+내보내 검색 쪽에서 ChromaDB 없이 메모리 맵으로 조회할 수 있게 합니다.
+컬렉션은 코사인 거리(hnsw:space=cosine)로 만들고 정규화한 벡터를 저장해
+NumPy 인덱스와 distances/순위가 같습니다. l2로 만든 예전 컬렉션은 다시 만듭니다.
 """
 
+import argparse
+import hashlib
 import pymysql
 import chromadb
 from sentence_transformers import SentenceTransformer
@@ -13,6 +30,14 @@ import sys
 from pathlib import Path
 import numpy as np
 
+from embedding_cache import EmbeddingCache
+from embedding_pipeline import (
+    DEFAULT_CHUNK_SIZE, DEFAULT_ENCODE_BATCH_SIZE, EmbeddingPipelineError, default_workers, embed_documents,
+)
+from korean_chunker import chunk_text, model_token_limit, token_counter
+from numpy_vector_index import CHROMA_COLLECTION_METADATA, DEFAULT_INDEX_DIR, export_from_chroma, uses_cosine
+from rag_registry import delete_rag_documents, fetch_rag_documents, save_rag_documents
+
 # === 설정 ===
 DB_CONFIG = {
     'host': 'localhost',
@@ -25,6 +50,13 @@ DB_CONFIG = {
 # ChromaDB 설정
 CHROMA_PERSIST_DIR = Path(__file__).parent / "chroma_db"
 CHROMA_COLLECTION_NAME = "haman_culture"
+RAG_SOURCE_TABLE = "culture"
+
+# 이야기 청크 분할 (실제 한도는 모델 max_seq_length와 둘 중 작은 값)
+CHUNK_MAX_TOKENS = 256
+CHUNK_OVERLAP_TOKENS = 32
+# 분할 방식이 바뀌면 문서 ID가 바뀌어 증분 동기화가 다시 임베딩하도록 ID 해시에 포함
+CHUNKING = f"sentences/{CHUNK_MAX_TOKENS}/{CHUNK_OVERLAP_TOKENS}"
 
 # 한국어 특화 임베딩 모델들 (우선순위 순)
 EMBEDDING_MODELS = [
@@ -82,8 +114,28 @@ def fetch_culture_data(connection):
         print(f"❌ 데이터 조회 실패: {e}")
         sys.exit(1)
 
-def setup_chromadb():
-    """ChromaDB 클라이언트 및 컬렉션 설정"""
+def build_document(item):
+    """임베딩할 텍스트 생성 (제목과 내용 결합)"""
+    return f"제목: {item['title']}\n내용: {item['story']}"
+
+def build_chunks(item, count_tokens, max_tokens):
+    """이야기를 토큰 한도 안의 청크로 나누고 각 청크 앞에 제목을 붙임"""
+    prefix = f"제목: {item['title']}\n내용: "
+    budget = max(16, max_tokens - count_tokens(prefix))
+    bodies = chunk_text(item['story'], count_tokens, budget, CHUNK_OVERLAP_TOKENS)
+    return [prefix + body for body in bodies] or [build_document(item)]
+
+def chroma_doc_id(item):
+    """
+    내용 해시를 포함한 부모 문서 ID - 행이 바뀌면 ID도 바뀜.
+    ChromaDB에는 청크마다 '{부모 ID}#{순번}'으로 저장됩니다.
+    """
+    payload = f"{CHUNKING}\x1f{item['category']}\x1f{build_document(item)}"
+    digest = hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+    return f"{RAG_SOURCE_TABLE}_{item['id']}_{digest}"
+
+def setup_chromadb(recreate=False):
+    """ChromaDB 클라이언트 및 컬렉션 설정 (recreate=True면 기존 컬렉션 삭제 후 생성)"""
     print("🗄️  ChromaDB 설정 중...")
     
     try:
@@ -93,15 +145,20 @@ def setup_chromadb():
         # 클라이언트 생성
         client = chromadb.PersistentClient(path=str(CHROMA_PERSIST_DIR))
         
-        # 기존 컬렉션이 있으면 삭제 후 새로 생성
-        try:
-            client.delete_collection(name=CHROMA_COLLECTION_NAME)
-            print("🗑️  기존 컬렉션 삭제")
-        except:
-            pass
+        if recreate:
+            try:
+                client.delete_collection(name=CHROMA_COLLECTION_NAME)
+                print("🗑️  기존 컬렉션 삭제")
+            except Exception:
+                pass
         
-        collection = client.create_collection(name=CHROMA_COLLECTION_NAME)
-        print(f"✅ ChromaDB 컬렉션 '{CHROMA_COLLECTION_NAME}' 생성 완료")
+        collection = client.get_or_create_collection(name=CHROMA_COLLECTION_NAME, metadata=CHROMA_COLLECTION_METADATA)
+        if not uses_cosine(collection):
+            # 거리 방식은 생성 후 바꿀 수 없음 - 비워 두면 plan_sync가 전부 추가로 보고 다시 임베딩
+            client.delete_collection(name=CHROMA_COLLECTION_NAME)
+            collection = client.get_or_create_collection(name=CHROMA_COLLECTION_NAME, metadata=CHROMA_COLLECTION_METADATA)
+            print("⚠️  l2 거리로 만든 기존 컬렉션 → 코사인 거리 컬렉션으로 재생성")
+        print(f"✅ ChromaDB 컬렉션 '{CHROMA_COLLECTION_NAME}' 준비 완료 (문서 {collection.count()}개)")
         
         return client, collection
         
@@ -109,67 +166,97 @@ def setup_chromadb():
         print(f"❌ ChromaDB 설정 실패: {e}")
         sys.exit(1)
 
-def process_and_embed_data(culture_data, model, collection):
-    """데이터 처리 및 임베딩 후 ChromaDB에 저장"""
-    print("🔄 데이터 임베딩 및 저장 중...")
+def plan_sync(culture_data, rag_docs, collection):
+    """
+    MySQL 행과 rag_documents를 비교해 (추가, 변경, 유지 개수, 삭제할 source_id) 반환.
+    rag_documents에는 있지만 ChromaDB에서 사라진 문서는 추가로 취급합니다.
+    """
+    known_ids = [doc['chroma_doc_id'] for doc in rag_docs.values()]
+    present = set()
+    for i in range(0, len(known_ids), 1000):
+        found = collection.get(where={"parent_doc_id": {"$in": known_ids[i:i + 1000]}}, include=["metadatas"])
+        present.update(metadata['parent_doc_id'] for metadata in found['metadatas'])
+
+    added, changed = [], []
+    unchanged = 0
+    current_ids = set()
+    for item in culture_data:
+        current_ids.add(item['id'])
+        doc = rag_docs.get(item['id'])
+        if doc is None or doc['chroma_doc_id'] not in present:
+            added.append(item)
+        elif doc['chroma_doc_id'] != chroma_doc_id(item):
+            changed.append(item)
+        else:
+            unchanged += 1
+    removed = [source_id for source_id in rag_docs if source_id not in current_ids]
+    return added, changed, unchanged, removed
+
+def delete_documents(collection, doc_ids):
+    """부모 ID의 청크 전부 삭제 (청크 분할 이전 버전의 단일 문서 ID도 함께)"""
+    for i in range(0, len(doc_ids), 1000):
+        batch = doc_ids[i:i + 1000]
+        collection.delete(ids=batch)
+        collection.delete(where={"parent_doc_id": {"$in": batch}})
+
+def process_and_embed_data(culture_data, model, model_name, collection, cache, options):
+    """데이터를 청크로 나눠 임베딩 후 ChromaDB에 저장. 모든 청크가 저장된 항목 목록을 반환"""
+    print(f"🔄 데이터 임베딩 및 저장 중... (워커 {options.workers}개, 워커당 {options.chunk_size}개씩)")
     
     documents = []
     metadatas = []
     ids = []
+    owners = []  # 청크 인덱스 → culture_data 인덱스
+    
+    count_tokens = token_counter(model)
+    max_tokens = min(CHUNK_MAX_TOKENS, model_token_limit(model))
     
     # 데이터 전처리
-    for item in culture_data:
-        # 임베딩할 텍스트 생성 (제목과 내용 결합)
-        full_text = f"제목: {item['title']}\n내용: {item['story']}"
-        documents.append(full_text)
-        
-        # 메타데이터 생성
-        metadatas.append({
-            "source": "culture",
-            "category": item['category'],
-            "mysql_id": str(item['id']),
-            "title": item['title']
-        })
-        
-        # 고유 ID 생성
-        ids.append(f"culture_{item['id']}")
+    for index, item in enumerate(culture_data):
+        # 고유 ID 생성 (내용 해시 포함) - 청크는 '{부모 ID}#{순번}'
+        parent_id = chroma_doc_id(item)
+        chunks = build_chunks(item, count_tokens, max_tokens)
+        for chunk_index, chunk in enumerate(chunks):
+            documents.append(chunk)
+            
+            # 메타데이터 생성 (검색 시 mysql_id 기준으로 청크를 합침)
+            metadatas.append({
+                "source": "culture",
+                "category": item['category'],
+                "mysql_id": str(item['id']),
+                "title": item['title'],
+                "parent_doc_id": parent_id,
+                "chunk_index": chunk_index,
+                "chunk_count": len(chunks)
+            })
+            ids.append(f"{parent_id}#{chunk_index}")
+            owners.append(index)
     
     if not documents:
         print("⚠️  처리할 데이터가 없습니다.")
-        return 0
+        return []
+    
+    print(f"   ✂️  {len(culture_data)}개 항목 → {len(documents)}개 청크 (청크당 최대 {max_tokens}토큰)")
     
+    # 길이순 청크 + 워커 프로세스 인코딩 + 별도 스레드의 ChromaDB 쓰기 (embedding_pipeline)
     try:
-        # 배치 단위로 임베딩 처리 (메모리 효율성)
-        batch_size = 50
-        total_processed = 0
-        
-        for i in range(0, len(documents), batch_size):
-            batch_docs = documents[i:i+batch_size]
-            batch_metas = metadatas[i:i+batch_size]
-            batch_ids = ids[i:i+batch_size]
-            
-            print(f"   📊 배치 {i//batch_size + 1}/{(len(documents)-1)//batch_size + 1} 처리 중...")
-            
-            # 임베딩 생성
-            embeddings = model.encode(batch_docs, show_progress_bar=False)
-            
-            # ChromaDB에 추가
-            collection.add(
-                embeddings=embeddings.tolist(),
-                documents=batch_docs,
-                metadatas=batch_metas,
-                ids=batch_ids
-            )
-            
-            total_processed += len(batch_docs)
-            print(f"   ✅ {total_processed}/{len(documents)} 완료")
-        
-        print(f"🎉 총 {total_processed}개 벡터 데이터 저장 완료")
-        return total_processed
-        
-    except Exception as e:
+        written, stats = embed_documents(
+            documents, metadatas, ids, collection, model, model_name, cache,
+            workers=options.workers, chunk_size=options.chunk_size,
+            encode_batch_size=options.encode_batch_size,
+        )
+    except EmbeddingPipelineError as e:
         print(f"❌ 임베딩 처리 실패: {e}")
-        return 0
+        written, stats = e.written, e.stats
+    else:
+        print(f"🎉 총 {len(written)}개 벡터 데이터 저장 완료")
+    
+    print(f"⏱️  {stats['seconds']:.1f}초, {stats['docs_per_second']:.1f} docs/s "
+          f"(새로 인코딩 {stats['encoded']}개, 캐시 재사용 {stats['cached']}개)")
+    
+    # 청크가 일부만 저장된 항목은 매핑을 남기지 않아 다음 실행에서 다시 처리
+    missing = {owners[i] for i in set(range(len(documents))) - set(written)}
+    return [item for index, item in enumerate(culture_data) if index not in missing]
 
 def verify_data(collection):
     """저장된 데이터 검증"""
@@ -198,36 +285,82 @@ def verify_data(collection):
 
 def main():
     """메인 실행 함수"""
-    print("🚀 ChromaDB 임베딩 작업 시작")
+    parser = argparse.ArgumentParser(description="culture 테이블을 ChromaDB에 임베딩 (기본: 증분 동기화)")
+    parser.add_argument("--full", action="store_true", help="컬렉션을 지우고 전체를 다시 임베딩")
+    parser.add_argument("--workers", type=int, default=default_workers(), help="인코딩 워커 프로세스 수 (1이면 현재 프로세스)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="워커에 한 번에 넘길 문서 수")
+    parser.add_argument("--encode-batch-size", type=int, default=DEFAULT_ENCODE_BATCH_SIZE, help="모델 forward 배치 크기")
+    parser.add_argument("--export-numpy", action="store_true", help=f"완료 후 NumPy 인덱스({DEFAULT_INDEX_DIR.name}/)로도 내보내기")
+    args = parser.parse_args()
+
+    print("🚀 ChromaDB 임베딩 작업 시작" + (" (전체 재구축)" if args.full else " (증분 동기화)"))
     print("=" * 50)
     
     # 1. 데이터베이스 연결
     connection = get_db_connection()
     
     try:
-        # 2. 문화 데이터 로드
+        # 2. 문화 데이터와 기존 임베딩 매핑 로드
         culture_data = fetch_culture_data(connection)
+        rag_docs = fetch_rag_documents(connection, RAG_SOURCE_TABLE, CHROMA_COLLECTION_NAME)
         
-        if not culture_data:
-            print("⚠️  처리할 데이터가 없습니다.")
-            return
+        # 3. ChromaDB 설정 - 매핑 없이 문서만 있는 컬렉션(이전 버전)은 재구축
+        client, collection = setup_chromadb(recreate=args.full)
+        if not args.full and not rag_docs and collection.count() > 0:
+            print("⚠️  rag_documents 매핑이 없는 기존 컬렉션 → 전체 재구축")
+            args.full = True
+            client, collection = setup_chromadb(recreate=True)
+        if args.full:
+            delete_rag_documents(connection, RAG_SOURCE_TABLE, CHROMA_COLLECTION_NAME)
+            rag_docs = {}
         
-        # 3. 임베딩 모델 로드
-        model, model_name = load_embedding_model()
+        # 4. 변경분 계산
+        added, changed, unchanged, removed = plan_sync(culture_data, rag_docs, collection)
+        print(f"📋 추가 {len(added)}개, 변경 {len(changed)}개, 유지 {unchanged}개, 삭제 {len(removed)}개")
         
-        # 4. ChromaDB 설정
-        client, collection = setup_chromadb()
+        # 5. 변경/삭제된 행의 기존 문서 삭제
+        # (매핑은 있는데 청크가 없는 추가분은 청크 분할 이전 버전의 문서일 수 있음)
+        stale_doc_ids = [rag_docs[item['id']]['chroma_doc_id'] for item in added + changed if item['id'] in rag_docs]
+        stale_doc_ids += [rag_docs[source_id]['chroma_doc_id'] for source_id in removed]
+        if stale_doc_ids:
+            delete_documents(collection, stale_doc_ids)
+            delete_rag_documents(connection, RAG_SOURCE_TABLE, CHROMA_COLLECTION_NAME, removed)
+            print(f"🗑️  오래된 문서 {len(stale_doc_ids)}개 삭제")
         
-        # 5. 데이터 임베딩 및 저장
-        processed_count = process_and_embed_data(culture_data, model, collection)
+        # 6. 추가/변경된 행만 임베딩 (없으면 모델도 로드하지 않음)
+        to_embed = added + changed
+        processed_count = 0
+        model_name = None
+        if to_embed:
+            model, model_name = load_embedding_model()
+            kept_models = {doc['embedding_model'] for source_id, doc in rag_docs.items() if source_id not in removed}
+            if kept_models - {model_name}:
+                # 다른 모델의 벡터와 섞일 수 없으므로 전체 재구축
+                print(f"⚠️  임베딩 모델 변경 ({', '.join(sorted(kept_models))} → {model_name}) → 전체 재구축")
+                client, collection = setup_chromadb(recreate=True)
+                delete_rag_documents(connection, RAG_SOURCE_TABLE, CHROMA_COLLECTION_NAME)
+                to_embed = culture_data
+            with EmbeddingCache(model_name) as cache:
+                embedded = process_and_embed_data(to_embed, model, model_name, collection, cache, args)
+            save_rag_documents(connection, RAG_SOURCE_TABLE, CHROMA_COLLECTION_NAME,
+                               [(item['id'], chroma_doc_id(item)) for item in embedded], model_name)
+            processed_count = len(embedded)
+            if processed_count < len(to_embed):
+                print(f"❌ {len(to_embed) - processed_count}개 임베딩 실패 - 다음 실행에서 다시 시도합니다")
+        else:
+            print("✅ 임베딩할 변경 사항이 없습니다.")
         
-        # 6. 데이터 검증
-        if verify_data(collection):
+        # 7. 데이터 검증
+        if verify_data(collection) or not culture_data:
             print("\n" + "=" * 50)
             print(f"🎉 임베딩 작업 완료!")
-            print(f"📊 처리된 데이터: {processed_count}개")
-            print(f"🤖 사용된 모델: {model_name}")
+            print(f"📊 처리된 데이터: {processed_count}개 (유지 {unchanged}개, 삭제 {len(removed)}개)")
+            if model_name:
+                print(f"🤖 사용된 모델: {model_name}")
             print(f"💾 저장 위치: {CHROMA_PERSIST_DIR}")
+            if args.export_numpy:
+                index = export_from_chroma(collection, DEFAULT_INDEX_DIR)
+                print(f"📦 NumPy 인덱스: {DEFAULT_INDEX_DIR} ({index.count()}개)")
             print("=" * 50)
         else:
             print("❌ 데이터 검증 실패")
@@ -242,4 +375,4 @@ def main():
         print("🔌 데이터베이스 연결 종료")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
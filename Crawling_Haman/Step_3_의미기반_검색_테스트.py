@@ -3,6 +3,7 @@
 """
 ChromaDB에 저장된 함안군 문화 데이터를 의미 기반으로 검색하는 테스트 스크립트
 자연어 질의를 통해 관련 정보를 찾아주는 대화형 검색 시스템
+(정답이 달린 질의로 모델/백엔드별 recall@k·MRR·지연을 재려면 retrieval_benchmark.py)
 """
 
 import chromadb
@@ -12,6 +13,8 @@ import sys
 from pathlib import Path
 import json
 
+from culture_search import query_collection
+
 # === 설정 ===
 CHROMA_PERSIST_DIR = Path(__file__).parent / "chroma_db"
 CHROMA_COLLECTION_NAME = "haman_culture"
@@ -75,19 +78,13 @@ def setup_chromadb():
         sys.exit(1)
 
 def search_similar_content(collection, model, query_text, n_results=5):
-    """의미 기반 검색 수행"""
+    """의미 기반 검색 수행 (문서별 가장 가까운 청크 하나씩)"""
     try:
         # 검색어를 벡터로 변환
         query_embedding = model.encode(query_text).tolist()
         
-        # ChromaDB에서 유사한 문서 검색
-        results = collection.query(
-            query_embeddings=[query_embedding],
-            n_results=n_results,
-            include=['documents', 'metadatas', 'distances']
-        )
-        
-        return results
+        # ChromaDB에서 유사한 청크 검색 후 문서 단위로 병합 (배치 검색은 culture_search.py)
+        return query_collection(collection, [query_embedding], n_results)
         
     except Exception as e:
         print(f"❌ 검색 중 오류 발생: {e}")
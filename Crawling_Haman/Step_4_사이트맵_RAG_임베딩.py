@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+함안군 홈페이지 사이트맵 CSV(대주제/중주제/소주제/링크/상세정보)를
+관광/문화유산 안내용 RAG 문서로 ChromaDB에 임베딩하는 스크립트
+
+사이트맵은 장소 행이 아니라 페이지 단위 설명문이라 culture/locations에 넣지 않고
+별도 컬렉션(haman_sitemap)에 저장합니다. 페이지마다
+  - 분류 경로(breadcrumb, 예: '함안여행 > 함안9경 > 1경')와 원문 링크를 메타데이터로 남기고
+  - 상세정보를 korean_chunker로 모델 토큰 한도 안의 청크로 나눠 각 청크 앞에 분류/제목을 붙입니다.
+source_id는 링크의 페이지 코드(.../01863.web → 1863)라 CSV 행 순서가 바뀌어도 유지되며,
+rag_documents(source_table='sitemap')와 비교해 Step 2처럼 바뀐 페이지만 다시 임베딩합니다.
+rag_documents.source_table ENUM에 'sitemap'이 없으면 처음 실행할 때 추가합니다.
+컬렉션은 Step 2와 같이 코사인 거리(hnsw:space=cosine)에 정규화한 벡터를 저장합니다.
+
+    python Step_4_사이트맵_RAG_임베딩.py                 # 증분 동기화
+    python Step_4_사이트맵_RAG_임베딩.py --full          # 컬렉션 재구축
+    python Step_4_사이트맵_RAG_임베딩.py --query "함안 가을 축제"   # 적재 후 검색 확인
+"""
+
+import argparse
+import csv
+import hashlib
+import re
+import sys
+from pathlib import Path
+
+import chromadb
+import pymysql
+from sentence_transformers import SentenceTransformer
+
+from embedding_cache import EmbeddingCache
+from embedding_pipeline import (
+    DEFAULT_CHUNK_SIZE, DEFAULT_ENCODE_BATCH_SIZE, EmbeddingPipelineError, default_workers, embed_documents,
+)
+from korean_chunker import chunk_text, collapse_by_parent, model_token_limit, token_counter
+from numpy_vector_index import CHROMA_COLLECTION_METADATA, export_from_chroma, uses_cosine
+from rag_registry import delete_rag_documents, ensure_source_table, fetch_rag_documents, save_rag_documents
+
+# === 설정 ===
+DB_CONFIG = {
+    'host': 'localhost',
+    'user': 'root',
+    'password': '1111',  # 실제 비밀번호로 변경하세요
+    'database': 'hometown_on',
+    'charset': 'utf8mb4'
+}
+
+SITEMAP_CSV = Path(__file__).parent / "경상남도_함안군_사이트맵.csv"
+
+# ChromaDB 설정
+CHROMA_PERSIST_DIR = Path(__file__).parent / "chroma_db"
+CHROMA_COLLECTION_NAME = "haman_sitemap"
+RAG_SOURCE_TABLE = "sitemap"
+SITEMAP_INDEX_DIR = Path(__file__).parent / "vector_index_sitemap"
+
+# 상세정보 청크 분할 (Step 2와 같은 기준)
+CHUNK_MAX_TOKENS = 256
+CHUNK_OVERLAP_TOKENS = 32
+CHUNKING = f"sentences/{CHUNK_MAX_TOKENS}/{CHUNK_OVERLAP_TOKENS}"
+
+# 링크 끝의 페이지 코드 (https://www.haman.go.kr/01834/01857/01863.web → 1863)
+PAGE_CODE = re.compile(r"/(\d+)\.web\b")
+
+# Step 2와 동일한 순서 (같은 모델이어야 질의 벡터를 두 컬렉션에 함께 쓸 수 있음)
+EMBEDDING_MODELS = [
+    'jhgan/ko-sroberta-multitask',
+    'sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2',
+    'sentence-transformers/all-MiniLM-L6-v2'
+]
+
+SAMPLE_QUERIES = [
+    "함안 가볼 만한 곳 추천",
+    "아라가야 고분군",
+    "봄에 열리는 함안 축제",
+]
+
+def get_db_connection():
+    """데이터베이스 연결 생성"""
+    try:
+        connection = pymysql.connect(**DB_CONFIG)
+        print("✅ MySQL 데이터베이스 연결 성공")
+        return connection
+    except pymysql.Error as e:
+        print(f"❌ 데이터베이스 연결 실패: {e}")
+        sys.exit(1)
+
+def load_embedding_model():
+    """임베딩 모델 로드 (여러 모델 시도)"""
+    for model_name in EMBEDDING_MODELS:
+        try:
+            print(f"🤖 임베딩 모델 로딩 시도: {model_name}")
+            model = SentenceTransformer(model_name)
+            print(f"✅ 임베딩 모델 로드 성공: {model_name}")
+            return model, model_name
+        except Exception as e:
+            print(f"⚠️  모델 로드 실패: {model_name} - {e}")
+            continue
+
+    print("❌ 모든 임베딩 모델 로드 실패")
+    sys.exit(1)
+
+def page_id(link):
+    """링크의 페이지 코드 (코드가 없는 링크는 링크 해시에서 만든 48비트 정수)"""
+    match = PAGE_CODE.search(link)
+    if match:
+        return int(match.group(1))
+    return int(hashlib.sha1(link.encode('utf-8')).hexdigest()[:12], 16)
+
+def load_sitemap(path=SITEMAP_CSV):
+    """
+    사이트맵 CSV → 페이지 목록과 {대주제: {중주제: [페이지]}} 트리.
+    상위 주제 칸이 비어 있으면 윗행 값을 이어받고, 상세정보가 없는 행과
+    이미 나온 페이지 코드의 행은 건너뜁니다.
+    """
+    print(f"📚 사이트맵 로딩: {path.name}")
+    pages = []
+    tree = {}
+    seen = set()
+    skipped = 0
+    topic = subtopic = ""
+    with open(path, "r", encoding="utf-8-sig") as f:
+        for row in csv.DictReader(f):
+            topic = (row.get('대주제') or "").strip() or topic
+            subtopic = (row.get('중주제') or "").strip() or subtopic
+            section = (row.get('소주제') or "").strip()
+            link = (row.get('링크') or "").strip()
+            detail = (row.get('상세정보') or "").strip()
+            if not link or not detail:
+                skipped += 1
+                continue
+            pid = page_id(link)
+            if pid in seen:
+                skipped += 1
+                continue
+            seen.add(pid)
+            page = {
+                'id': pid,
+                'topic': topic,
+                'subtopic': subtopic,
+                'section': section,
+                'title': section or subtopic or topic,
+                'breadcrumb': " > ".join(part for part in (topic, subtopic, section) if part),
+                'link': link,
+                'detail': detail,
+            }
+            pages.append(page)
+            tree.setdefault(topic, {}).setdefault(subtopic, []).append(page)
+
+    print(f"✅ 페이지 {len(pages)}개 로드" + (f" (건너뜀 {skipped}개)" if skipped else ""))
+    for topic, subtopics in tree.items():
+        print(f"   📁 {topic}: " + ", ".join(f"{name}({len(items)})" for name, items in subtopics.items()))
+    return pages, tree
+
+def build_document(page):
+    """임베딩할 텍스트 생성 (분류 경로, 제목, 내용 결합)"""
+    return f"분류: {page['breadcrumb']}\n제목: {page['title']}\n내용: {page['detail']}"
+
+def build_chunks(page, count_tokens, max_tokens):
+    """상세정보를 토큰 한도 안의 청크로 나누고 각 청크 앞에 분류 경로와 제목을 붙임"""
+    prefix = f"분류: {page['breadcrumb']}\n제목: {page['title']}\n내용: "
+    budget = max(16, max_tokens - count_tokens(prefix))
+    bodies = chunk_text(page['detail'], count_tokens, budget, CHUNK_OVERLAP_TOKENS)
+    return [prefix + body for body in bodies] or [build_document(page)]
+
+def chroma_doc_id(page):
+    """내용 해시를 포함한 부모 문서 ID ('{부모 ID}#{순번}'이 청크 ID)"""
+    payload = f"{CHUNKING}\x1f{page['link']}\x1f{build_document(page)}"
+    digest = hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+    return f"{RAG_SOURCE_TABLE}_{page['id']}_{digest}"
+
+def setup_chromadb(recreate=False):
+    """ChromaDB 클라이언트 및 컬렉션 설정 (recreate=True면 기존 컬렉션 삭제 후 생성)"""
+    print("🗄️  ChromaDB 설정 중...")
+
+    try:
+        CHROMA_PERSIST_DIR.mkdir(exist_ok=True)
+        client = chromadb.PersistentClient(path=str(CHROMA_PERSIST_DIR))
+
+        if recreate:
+            try:
+                client.delete_collection(name=CHROMA_COLLECTION_NAME)
+                print("🗑️  기존 컬렉션 삭제")
+            except Exception:
+                pass
+
+        collection = client.get_or_create_collection(name=CHROMA_COLLECTION_NAME, metadata=CHROMA_COLLECTION_METADATA)
+        if not uses_cosine(collection):
+            # 거리 방식은 생성 후 바꿀 수 없음 - 비워 두면 plan_sync가 전부 추가로 보고 다시 임베딩
+            client.delete_collection(name=CHROMA_COLLECTION_NAME)
+            collection = client.get_or_create_collection(name=CHROMA_COLLECTION_NAME, metadata=CHROMA_COLLECTION_METADATA)
+            print("⚠️  l2 거리로 만든 기존 컬렉션 → 코사인 거리 컬렉션으로 재생성")
+        print(f"✅ ChromaDB 컬렉션 '{CHROMA_COLLECTION_NAME}' 준비 완료 (문서 {collection.count()}개)")
+
+        return client, collection
+
+    except Exception as e:
+        print(f"❌ ChromaDB 설정 실패: {e}")
+        sys.exit(1)
+
+def plan_sync(pages, rag_docs, collection):
+    """
+    사이트맵 페이지와 rag_documents를 비교해 (추가, 변경, 유지 개수, 삭제할 source_id) 반환.
+    rag_documents에는 있지만 ChromaDB에서 사라진 문서는 추가로 취급합니다.
+    """
+    known_ids = [doc['chroma_doc_id'] for doc in rag_docs.values()]
+    present = set()
+    for i in range(0, len(known_ids), 1000):
+        found = collection.get(where={"parent_doc_id": {"$in": known_ids[i:i + 1000]}}, include=["metadatas"])
+        present.update(metadata['parent_doc_id'] for metadata in found['metadatas'])
+
+    added, changed = [], []
+    unchanged = 0
+    current_ids = set()
+    for page in pages:
+        current_ids.add(page['id'])
+        doc = rag_docs.get(page['id'])
+        if doc is None or doc['chroma_doc_id'] not in present:
+            added.append(page)
+        elif doc['chroma_doc_id'] != chroma_doc_id(page):
+            changed.append(page)
+        else:
+            unchanged += 1
+    removed = [source_id for source_id in rag_docs if source_id not in current_ids]
+    return added, changed, unchanged, removed
+
+def delete_documents(collection, doc_ids):
+    """부모 ID의 청크 전부 삭제"""
+    for i in range(0, len(doc_ids), 1000):
+        collection.delete(where={"parent_doc_id": {"$in": doc_ids[i:i + 1000]}})
+
+def process_and_embed_pages(pages, model, model_name, collection, cache, options):
+    """페이지를 청크로 나눠 임베딩 후 ChromaDB에 저장. 모든 청크가 저장된 페이지 목록을 반환"""
+    print(f"🔄 페이지 임베딩 및 저장 중... (워커 {options.workers}개, 워커당 {options.chunk_size}개씩)")
+
+    documents = []
+    metadatas = []
+    ids = []
+    owners = []  # 청크 인덱스 → pages 인덱스
+
+    count_tokens = token_counter(model)
+    max_tokens = min(CHUNK_MAX_TOKENS, model_token_limit(model))
+
+    for index, page in enumerate(pages):
+        parent_id = chroma_doc_id(page)
+        chunks = build_chunks(page, count_tokens, max_tokens)
+        for chunk_index, chunk in enumerate(chunks):
+            documents.append(chunk)
+            # category는 대주제 - culture 컬렉션과 같은 키로 분류 필터를 걸 수 있게 함
+            metadatas.append({
+                "source": RAG_SOURCE_TABLE,
+                "page_id": str(page['id']),
+                "title": page['title'],
+                "category": page['topic'],
+                "topic": page['topic'],
+                "subtopic": page['subtopic'],
+                "section": page['section'],
+                "breadcrumb": page['breadcrumb'],
+                "link": page['link'],
+                "parent_doc_id": parent_id,
+                "chunk_index": chunk_index,
+                "chunk_count": len(chunks)
+            })
+            ids.append(f"{parent_id}#{chunk_index}")
+            owners.append(index)
+
+    if not documents:
+        print("⚠️  처리할 데이터가 없습니다.")
+        return []
+
+    print(f"   ✂️  {len(pages)}개 페이지 → {len(documents)}개 청크 (청크당 최대 {max_tokens}토큰)")
+
+    try:
+        written, stats = embed_documents(
+            documents, metadatas, ids, collection, model, model_name, cache,
+            workers=options.workers, chunk_size=options.chunk_size,
+            encode_batch_size=options.encode_batch_size,
+        )
+    except EmbeddingPipelineError as e:
+        print(f"❌ 임베딩 처리 실패: {e}")
+        written, stats = e.written, e.stats
+    else:
+        print(f"🎉 총 {len(written)}개 벡터 데이터 저장 완료")
+
+    print(f"⏱️  {stats['seconds']:.1f}초, {stats['docs_per_second']:.1f} docs/s "
+          f"(새로 인코딩 {stats['encoded']}개, 캐시 재사용 {stats['cached']}개)")
+
+    # 청크가 일부만 저장된 페이지는 매핑을 남기지 않아 다음 실행에서 다시 처리
+    missing = {owners[i] for i in set(range(len(documents))) - set(written)}
+    return [page for index, page in enumerate(pages) if index not in missing]
+
+def search_pages(collection, model, query_text, n_results=3):
+    """질의와 가까운 페이지 (페이지별 최상위 청크 하나)"""
+    results = collection.query(
+        query_embeddings=model.encode([query_text]).tolist(),
+        n_results=n_results * 4,
+        include=['documents', 'metadatas', 'distances']
+    )
+    return collapse_by_parent(results, n_results, parent_key='page_id')
+
+def verify_data(collection, model, queries):
+    """저장된 데이터 검증 (문서 수와 예시 질의의 검색 결과)"""
+    print("🔍 저장된 데이터 검증 중...")
+
+    try:
+        count = collection.count()
+        print(f"✅ 저장된 청크 수: {count}")
+        if count == 0 or model is None:
+            return count > 0
+
+        for query_text in queries:
+            results = search_pages(collection, model, query_text)
+            print(f"🔎 '{query_text}'")
+            for metadata, distance in zip(results['metadatas'][0], results['distances'][0]):
+                print(f"   - [{1 - distance:.3f}] {metadata['breadcrumb']}")
+                print(f"     {metadata['link']}")
+        return True
+
+    except Exception as e:
+        print(f"❌ 데이터 검증 실패: {e}")
+        return False
+
+def main():
+    """메인 실행 함수"""
+    parser = argparse.ArgumentParser(description="사이트맵 CSV를 RAG 컬렉션으로 임베딩 (기본: 증분 동기화)")
+    parser.add_argument("--csv", type=Path, default=SITEMAP_CSV, help="사이트맵 CSV 경로")
+    parser.add_argument("--full", action="store_true", help="컬렉션을 지우고 전체를 다시 임베딩")
+    parser.add_argument("--workers", type=int, default=default_workers(), help="인코딩 워커 프로세스 수 (1이면 현재 프로세스)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="워커에 한 번에 넘길 문서 수")
+    parser.add_argument("--encode-batch-size", type=int, default=DEFAULT_ENCODE_BATCH_SIZE, help="모델 forward 배치 크기")
+    parser.add_argument("--query", action="append", help="완료 후 검색해 볼 질의 (여러 번 지정 가능)")
+    parser.add_argument("--export-numpy", action="store_true", help=f"완료 후 NumPy 인덱스({SITEMAP_INDEX_DIR.name}/)로도 내보내기")
+    args = parser.parse_args()
+
+    print("🚀 사이트맵 RAG 임베딩 작업 시작" + (" (전체 재구축)" if args.full else " (증분 동기화)"))
+    print("=" * 50)
+
+    pages, _ = load_sitemap(args.csv)
+    connection = get_db_connection()
+
+    try:
+        # 1. rag_documents에 'sitemap' 원본 종류 등록 후 기존 매핑 로드
+        if ensure_source_table(connection, RAG_SOURCE_TABLE):
+            print(f"🛠️  rag_documents.source_table에 '{RAG_SOURCE_TABLE}' 추가")
+        rag_docs = fetch_rag_documents(connection, RAG_SOURCE_TABLE, CHROMA_COLLECTION_NAME)
+
+        # 2. ChromaDB 설정
+        client, collection = setup_chromadb(recreate=args.full)
+        if not args.full and not rag_docs and collection.count() > 0:
+            print("⚠️  rag_documents 매핑이 없는 기존 컬렉션 → 전체 재구축")
+            args.full = True
+            client, collection = setup_chromadb(recreate=True)
+        if args.full:
+            delete_rag_documents(connection, RAG_SOURCE_TABLE, CHROMA_COLLECTION_NAME)
+            rag_docs = {}
+
+        # 3. 변경분 계산 후 변경/삭제된 페이지의 기존 청크 삭제
+        added, changed, unchanged, removed = plan_sync(pages, rag_docs, collection)
+        print(f"📋 추가 {len(added)}개, 변경 {len(changed)}개, 유지 {unchanged}개, 삭제 {len(removed)}개")
+
+        stale_doc_ids = [rag_docs[page['id']]['chroma_doc_id'] for page in added + changed if page['id'] in rag_docs]
+        stale_doc_ids += [rag_docs[source_id]['chroma_doc_id'] for source_id in removed]
+        if stale_doc_ids:
+            delete_documents(collection, stale_doc_ids)
+            delete_rag_documents(connection, RAG_SOURCE_TABLE, CHROMA_COLLECTION_NAME, removed)
+            print(f"🗑️  오래된 문서 {len(stale_doc_ids)}개 삭제")
+
+        # 4. 추가/변경된 페이지만 임베딩 (검색 확인을 하지 않으면 모델도 로드하지 않음)
+        to_embed = added + changed
+        processed_count = 0
+        model = model_name = None
+        if to_embed or args.query:
+            model, model_name = load_embedding_model()
+        if to_embed:
+            kept_models = {doc['embedding_model'] for source_id, doc in rag_docs.items() if source_id not in removed}
+            if kept_models - {model_name}:
+                print(f"⚠️  임베딩 모델 변경 ({', '.join(sorted(kept_models))} → {model_name}) → 전체 재구축")
+                client, collection = setup_chromadb(recreate=True)
+                delete_rag_documents(connection, RAG_SOURCE_TABLE, CHROMA_COLLECTION_NAME)
+                to_embed = pages
+            with EmbeddingCache(model_name) as cache:
+                embedded = process_and_embed_pages(to_embed, model, model_name, collection, cache, args)
+            save_rag_documents(connection, RAG_SOURCE_TABLE, CHROMA_COLLECTION_NAME,
+                               [(page['id'], chroma_doc_id(page)) for page in embedded], model_name)
+            processed_count = len(embedded)
+            if processed_count < len(to_embed):
+                print(f"❌ {len(to_embed) - processed_count}개 임베딩 실패 - 다음 실행에서 다시 시도합니다")
+        else:
+            print("✅ 임베딩할 변경 사항이 없습니다.")
+
+        # 5. 데이터 검증
+        queries = args.query or (SAMPLE_QUERIES if to_embed else [])
+        if verify_data(collection, model, queries) or not pages:
+            print("\n" + "=" * 50)
+            print(f"🎉 사이트맵 임베딩 작업 완료!")
+            print(f"📊 처리된 페이지: {processed_count}개 (유지 {unchanged}개, 삭제 {len(removed)}개)")
+            if model_name:
+                print(f"🤖 사용된 모델: {model_name}")
+            print(f"💾 저장 위치: {CHROMA_PERSIST_DIR} (컬렉션 {CHROMA_COLLECTION_NAME})")
+            if args.export_numpy:
+                index = export_from_chroma(collection, SITEMAP_INDEX_DIR)
+                print(f"📦 NumPy 인덱스: {SITEMAP_INDEX_DIR} ({index.count()}개)")
+            print("=" * 50)
+        else:
+            print("❌ 데이터 검증 실패")
+            sys.exit(1)
+
+    except Exception as e:
+        print(f"❌ 작업 중 오류 발생: {e}")
+        sys.exit(1)
+
+    finally:
+        connection.close()
+        print("🔌 데이터베이스 연결 종료")
+
+if __name__ == "__main__":
+    main()
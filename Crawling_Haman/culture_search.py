@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+culture 컬렉션 의미 검색 모듈 (배치 API + 비대화형 CLI)
+
+    searcher = CultureSearcher()
+    hits = searcher.search_many(["함안의 역사적 인물", "아라가야 전설"], n_results=5)
+
+질의 여러 개를 한 번의 forward pass로 인코딩하고 ChromaDB에도 한 번의 다중 질의로
+보낸 뒤, 청크 단위 결과를 문서(mysql_id)별로 합칩니다.
+
+CLI (질의 파일 → JSONL 결과):
+
+    python culture_search.py queries.txt -o results.jsonl --top-k 5
+
+입력은 한 줄에 질의 하나인 텍스트 파일, 또는 {"id": ..., "query": ...} 형식의 JSONL입니다.
+--backend numpy를 주면 ChromaDB 대신 numpy_vector_index로 내보낸 인덱스(vector_index/)를 씁니다.
+두 저장소 모두 코사인 거리를 돌려주므로 score(1 - distance)는 코사인 유사도입니다.
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import chromadb
+from sentence_transformers import SentenceTransformer
+
+from korean_chunker import collapse_by_parent
+from numpy_vector_index import DEFAULT_INDEX_DIR, NumpyVectorIndex
+
+CHROMA_PERSIST_DIR = Path(__file__).parent / "chroma_db"
+CHROMA_COLLECTION_NAME = "haman_culture"
+
+# Step 2와 동일한 순서
+EMBEDDING_MODELS = [
+    'jhgan/ko-sroberta-multitask',
+    'sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2',
+    'sentence-transformers/all-MiniLM-L6-v2'
+]
+
+# 한 문서가 여러 청크로 저장되어 있으므로 넉넉히 가져와 문서별로 합침
+CHUNK_OVERSAMPLE = 4
+DEFAULT_BATCH_SIZE = 256
+
+
+def load_embedding_model(model_names=EMBEDDING_MODELS):
+    """임베딩 모델 로드 (앞에서부터 시도)"""
+    for model_name in model_names:
+        try:
+            return SentenceTransformer(model_name), model_name
+        except Exception as e:
+            print(f"⚠️  모델 로드 실패: {model_name} - {e}", file=sys.stderr)
+    raise RuntimeError("모든 임베딩 모델 로드 실패")
+
+
+def open_collection(persist_dir=CHROMA_PERSIST_DIR, name=CHROMA_COLLECTION_NAME, backend="chroma"):
+    """backend="numpy"면 persist_dir 대신 NumPy 인덱스 디렉토리(DEFAULT_INDEX_DIR)를 엶"""
+    if backend == "numpy":
+        index_dir = DEFAULT_INDEX_DIR if persist_dir == CHROMA_PERSIST_DIR else Path(persist_dir)
+        if not (index_dir / 'records.json').exists():
+            raise FileNotFoundError(f"NumPy 인덱스가 없습니다: {index_dir} (numpy_vector_index.py로 먼저 내보내세요)")
+        return NumpyVectorIndex(index_dir, name=name)
+    if not Path(persist_dir).exists():
+        raise FileNotFoundError(f"ChromaDB 데이터 디렉토리가 없습니다: {persist_dir} (Step 2를 먼저 실행하세요)")
+    return chromadb.PersistentClient(path=str(persist_dir)).get_collection(name=name)
+
+
+def query_collection(collection, query_embeddings, n_results, where=None):
+    """여러 질의 벡터를 한 번에 조회하고 문서별 최상위 청크 n_results개씩 반환 (collection.query 형식)"""
+    results = collection.query(
+        query_embeddings=query_embeddings,
+        n_results=n_results * CHUNK_OVERSAMPLE,
+        where=where,
+        include=['documents', 'metadatas', 'distances']
+    )
+    return collapse_by_parent(results, n_results)
+
+
+def to_hits(results, q):
+    """query_collection 결과 중 q번째 질의를 dict 목록으로"""
+    hits = []
+    for doc_id, document, metadata, distance in zip(
+        results['ids'][q], results['documents'][q], results['metadatas'][q], results['distances'][q]
+    ):
+        hits.append({
+            "id": doc_id,
+            "mysql_id": metadata.get('mysql_id'),
+            "title": metadata.get('title'),
+            "category": metadata.get('category'),
+            "distance": distance,
+            "score": 1 - distance,
+            "document": document,
+        })
+    return hits
+
+
+class CultureSearcher:
+    def __init__(self, model=None, model_name=None, collection=None, batch_size=DEFAULT_BATCH_SIZE):
+        if model is None:
+            model, model_name = load_embedding_model()
+        self.model = model
+        self.model_name = model_name
+        self.collection = collection if collection is not None else open_collection()
+        self.batch_size = batch_size
+
+    def encode(self, queries):
+        return self.model.encode(queries, batch_size=self.batch_size, show_progress_bar=False)
+
+    def search_many(self, queries, n_results=5, where=None):
+        """질의 목록 → 질의별 결과 목록 (같은 질의는 한 번만 인코딩/조회)"""
+        unique = list(dict.fromkeys(queries))
+        found = {}
+        for i in range(0, len(unique), self.batch_size):
+            batch = unique[i:i + self.batch_size]
+            results = query_collection(self.collection, self.encode(batch).tolist(), n_results, where)
+            for q, query in enumerate(batch):
+                found[query] = to_hits(results, q)
+        return [found[query] for query in queries]
+
+    def search(self, query, n_results=5, where=None):
+        return self.search_many([query], n_results, where)[0]
+
+
+def read_queries(path):
+    """텍스트(한 줄에 질의 하나) 또는 JSONL({"id", "query"}) → [(id, query)]"""
+    queries = []
+    with open(path, encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith('{'):
+                record = json.loads(line)
+                queries.append((record.get('id', line_no), record['query']))
+            else:
+                queries.append((line_no, line))
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="culture 컬렉션 배치 의미 검색 (JSONL 출력)")
+    parser.add_argument("input", type=Path, help="질의 파일 (텍스트 또는 JSONL)")
+    parser.add_argument("-o", "--output", type=Path, help="결과 JSONL 경로 (기본: 표준 출력)")
+    parser.add_argument("--top-k", type=int, default=5, help="질의당 결과 문서 수")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="한 번에 인코딩/조회할 질의 수")
+    parser.add_argument("--category", help="이 카테고리(인물, 전설 등)만 검색")
+    parser.add_argument("--no-documents", action="store_true", help="결과에서 문서 본문 제외")
+    parser.add_argument("--backend", choices=["chroma", "numpy"], default="chroma", help="벡터 저장소")
+    args = parser.parse_args()
+
+    queries = read_queries(args.input)
+    searcher = CultureSearcher(collection=open_collection(backend=args.backend), batch_size=args.batch_size)
+    print(f"🤖 {searcher.model_name} ({args.backend}), 질의 {len(queries)}개", file=sys.stderr)
+
+    started = time.perf_counter()
+    where = {"category": args.category} if args.category else None
+    results = searcher.search_many([query for _, query in queries], args.top_k, where)
+    elapsed = time.perf_counter() - started
+
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        for (query_id, query), hits in zip(queries, results):
+            # 같은 질의는 결과 목록을 공유하므로 hit을 고치지 않고 새 dict로 씀
+            if args.no_documents:
+                hits = [{key: value for key, value in hit.items() if key != 'document'} for hit in hits]
+            out.write(json.dumps({"id": query_id, "query": query, "results": hits}, ensure_ascii=False) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    rate = len(queries) / elapsed if elapsed else 0.0
+    print(f"✅ {len(queries)}개 질의 {elapsed:.2f}초 ({rate:.1f} queries/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
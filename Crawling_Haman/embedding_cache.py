@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+임베딩 디스크 캐시
+
+같은 텍스트를 같은 모델로 다시 임베딩하지 않도록 결과 벡터를 디스크에 보관합니다.
+모델별 디렉터리 하나에 float32 행렬(np.memmap)과 "텍스트 해시 → 행 번호" 인덱스
+(index.json)를 둡니다. 키는 정규화한 텍스트(NFC, 공백 정리)의 SHA-1입니다.
+
+    cache = EmbeddingCache('jhgan/ko-sroberta-multitask')
+    vectors = cache.encode(texts, lambda batch: model.encode(batch, show_progress_bar=False))
+    cache.close()
+
+- 캐시에 없는 텍스트만 encode_fn으로 넘기고, 같은 배치 안의 중복도 한 번만 인코딩합니다.
+- 크기가 max_mb를 넘으면 가장 오래 쓰이지 않은 행부터 비워서 재사용합니다.
+- 벡터를 먼저 쓰고 인덱스를 나중에 원자적으로 교체하므로 중간에 죽어도 인덱스가
+  가리키는 행은 항상 완성된 벡터입니다.
+- 한 캐시 디렉터리는 한 프로세스만 쓴다고 가정합니다 (파일 잠금 없음).
+
+위치는 EMBEDDING_CACHE_DIR, 최대 크기는 EMBEDDING_CACHE_MAX_MB 환경 변수로 바꿀 수 있습니다.
+"""
+
+import hashlib
+import json
+import os
+import re
+import unicodedata
+from pathlib import Path
+
+import numpy as np
+
+DEFAULT_CACHE_DIR = Path(os.getenv('EMBEDDING_CACHE_DIR', Path(__file__).parent / '.embedding_cache'))
+DEFAULT_MAX_MB = float(os.getenv('EMBEDDING_CACHE_MAX_MB', 512))
+
+INITIAL_ROWS = 1024
+INDEX_VERSION = 1
+
+
+def normalize_text(text):
+    """캐시 키용 정규화: 유니코드 NFC + 연속 공백을 한 칸으로"""
+    return ' '.join(unicodedata.normalize('NFC', text).split())
+
+
+def text_key(text):
+    return hashlib.sha1(normalize_text(text).encode('utf-8')).hexdigest()
+
+
+def namespace_dir(model_name, variant=''):
+    """모델(과 출력에 영향을 주는 옵션)마다 별도 디렉터리"""
+    label = f"{model_name}|{variant}" if variant else model_name
+    slug = re.sub(r'[^A-Za-z0-9._-]+', '_', label).strip('_')[:80]
+    digest = hashlib.sha1(label.encode('utf-8')).hexdigest()[:8]
+    return f"{slug}-{digest}"
+
+
+class EmbeddingCache:
+    def __init__(self, model_name, cache_dir=None, max_mb=DEFAULT_MAX_MB, variant=''):
+        """
+        model_name: 키 공간을 나누는 모델 이름
+        variant: normalize_embeddings 등 같은 모델이라도 벡터가 달라지는 옵션
+        """
+        self.model_name = model_name
+        self.path = Path(cache_dir or DEFAULT_CACHE_DIR) / namespace_dir(model_name, variant)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.vectors_path = self.path / 'vectors.f32'
+        self.index_path = self.path / 'index.json'
+        self.dim = None
+        self.capacity = 0
+        self.used = 0  # 한 번이라도 할당된 행 수 (이후 행은 아직 비어 있음)
+        self.rows = {}  # key -> [row, last_used]
+        self.free = []  # 할당됐다가 비워진 행
+        self.tick = 0
+        self.matrix = None
+        self.dirty = False
+        self.stats = {'hits': 0, 'misses': 0, 'evicted': 0}
+        self._load()
+
+    # --- 저장소 ---
+
+    def _load(self):
+        try:
+            index = json.loads(self.index_path.read_text(encoding='utf-8'))
+            if index.get('version') != INDEX_VERSION or index.get('model') != self.model_name:
+                raise ValueError('incompatible index')
+            dim, capacity = index['dim'], index['capacity']
+            if self.vectors_path.stat().st_size < dim * capacity * 4:
+                raise ValueError('vector file is shorter than the index')
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"⚠️  임베딩 캐시를 읽을 수 없어 새로 만듭니다 ({self.path.name}): {e}")
+            return
+        self.dim = dim
+        self.capacity = capacity
+        self.used = index['used']
+        self.rows = index['rows']
+        self.free = index['free']
+        self.tick = index['tick']
+        if capacity:
+            self.matrix = np.memmap(self.vectors_path, dtype=np.float32, mode='r+', shape=(capacity, dim))
+
+    def _max_rows(self):
+        return max(1, self.max_bytes // (self.dim * 4))
+
+    def _resize(self, capacity):
+        if self.matrix is not None:
+            self.matrix.flush()
+            self.matrix = None
+        self.path.mkdir(parents=True, exist_ok=True)
+        with open(self.vectors_path, 'ab') as f:
+            f.truncate(capacity * self.dim * 4)
+        self.capacity = capacity
+        self.matrix = np.memmap(self.vectors_path, dtype=np.float32, mode='r+', shape=(capacity, self.dim))
+
+    def _reset(self, dim):
+        """차원이 다른 벡터가 들어오면(모델 이름 재사용 등) 기존 내용을 버림"""
+        if self.dim is not None:
+            print(f"⚠️  임베딩 차원 변경 ({self.dim} → {dim}) → 캐시 초기화: {self.path.name}")
+        self.matrix = None
+        if self.vectors_path.exists():
+            self.vectors_path.unlink()
+        self.dim = dim
+        self.capacity = 0
+        self.used = 0
+        self.rows = {}
+        self.free = []
+        self.dirty = True
+
+    def _allocate(self, count):
+        """새 벡터 count개를 쓸 행 번호. 빈 행 → 파일 확장(2배씩) → LRU 제거 순서"""
+        rows = self.free[:count]
+        del self.free[:count]
+        needed = count - len(rows)
+        if needed:
+            limit = self._max_rows()
+            if self.used + needed > self.capacity and self.capacity < limit:
+                self._resize(min(limit, max(INITIAL_ROWS, self.capacity * 2, self.used + needed)))
+            take = min(needed, self.capacity - self.used)
+            rows += list(range(self.used, self.used + take))
+            self.used += take
+            needed -= take
+        if needed:
+            victims = sorted(
+                (entry[1], key) for key, entry in self.rows.items()
+            )[:needed]
+            for _, key in victims:
+                rows.append(self.rows.pop(key)[0])
+            self.stats['evicted'] += len(victims)
+        return rows
+
+    def flush(self):
+        """벡터를 디스크에 내린 뒤 인덱스를 임시 파일 + os.replace로 교체"""
+        if not self.dirty or self.dim is None:
+            return
+        if self.matrix is not None:
+            self.matrix.flush()
+        self.path.mkdir(parents=True, exist_ok=True)
+        index = {
+            'version': INDEX_VERSION,
+            'model': self.model_name,
+            'dim': self.dim,
+            'capacity': self.capacity,
+            'used': self.used,
+            'tick': self.tick,
+            'rows': self.rows,
+            'free': self.free,
+        }
+        tmp_path = self.index_path.with_suffix('.json.tmp')
+        tmp_path.write_text(json.dumps(index, separators=(',', ':')), encoding='utf-8')
+        os.replace(tmp_path, self.index_path)
+        self.dirty = False
+
+    def close(self):
+        self.flush()
+        self.matrix = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- 조회/인코딩 ---
+
+    def lookup(self, texts):
+        """
+        (keys, hits, missing)를 반환합니다.
+        keys: texts 순서대로의 캐시 키, hits: 캐시에 있는 key → 벡터 복사본,
+        missing: 캐시에 없는 key → 원문 (중복 제거, 처음 나온 순서)
+        """
+        keys = [text_key(text) for text in texts]
+        self.tick += 1
+        hit_keys, missing = [], {}
+        for text, key in zip(texts, keys):
+            entry = self.rows.get(key)
+            if entry is None:
+                missing.setdefault(key, text)
+            elif entry[1] != self.tick:
+                entry[1] = self.tick
+                hit_keys.append(key)
+        self.stats['hits'] += len(texts) - len(missing)
+        self.stats['misses'] += len(missing)
+        hits = {}
+        if hit_keys:
+            self.dirty = True
+            vectors = np.array(self.matrix[[self.rows[key][0] for key in hit_keys]])
+            hits = dict(zip(hit_keys, vectors))
+        return keys, hits, missing
+
+    def add(self, keys, vectors):
+        """새로 인코딩한 벡터를 저장하고 바로 디스크에 기록 (중간에 실패해도 다음 실행에서 재사용)"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or len(vectors) != len(keys):
+            raise ValueError(f"got vectors of shape {vectors.shape} for {len(keys)} texts")
+        if self.dim != vectors.shape[1]:
+            self._reset(vectors.shape[1])
+        unique = dict(zip(keys, vectors))
+        if len(unique) > self._max_rows():
+            raise ValueError(f"batch of {len(unique)} texts does not fit in a {self.max_bytes // 2**20} MB cache")
+        # 이미 있는 키(동시에 돈 청크 둘이 같은 텍스트를 놓친 경우 등)는 기존 행을 먼저 돌려놓음
+        for key in unique:
+            entry = self.rows.pop(key, None)
+            if entry is not None:
+                self.free.append(entry[0])
+        rows = self._allocate(len(unique))
+        for row, (key, vector) in zip(rows, unique.items()):
+            self.matrix[row] = vector
+            self.rows[key] = [row, self.tick]
+        self.dirty = True
+        self.flush()
+        return vectors
+
+    def encode(self, texts, encode_fn):
+        """
+        texts 순서대로 (len(texts), dim) float32 배열을 반환합니다.
+        캐시에 없는 텍스트만 중복 없이 encode_fn(list[str])으로 인코딩해 저장합니다.
+        """
+        keys, hits, missing = self.lookup(texts)
+        if missing:
+            fresh = self.add(list(missing), encode_fn(list(missing.values())))
+            if hits and len(next(iter(hits.values()))) != self.dim:
+                # 차원이 바뀌어 캐시가 초기화됨 → 예전 히트만 다시 인코딩
+                return self.encode(texts, encode_fn)
+            hits.update(zip(missing, fresh))
+        if not keys:
+            return np.empty((0, self.dim or 0), dtype=np.float32)
+        return np.stack([hits[key] for key in keys])
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+대량 임베딩 파이프라인 (CPU 전용 서버용)
+
+    written, stats = embed_documents(documents, metadatas, ids, collection,
+                                     model, model_name, cache, workers=4)
+
+- 텍스트를 길이순으로 정렬해 청크로 나누므로 한 배치 안의 패딩이 최소가 됩니다.
+- workers > 1이면 모델을 워커 프로세스마다 한 번 로드하고 코어를 나눠 씁니다
+  (torch 스레드 = CPU 수 / workers). workers == 1이면 이미 로드한 model을 씁니다.
+- 인코딩과 ChromaDB 쓰기는 크기가 제한된 큐로 연결되어 동시에 진행됩니다.
+  쓰기가 밀리면 큐가 차서 인코딩도 기다립니다.
+- 임베딩 캐시(embedding_cache)에 있는 텍스트는 인코딩하지 않고 바로 씁니다.
+- 저장하는 벡터는 행마다 L2 정규화합니다. 컬렉션은 코사인 거리
+  (numpy_vector_index.CHROMA_COLLECTION_METADATA)로 만들므로 순위는 같고,
+  get()으로 꺼낸 벡터를 그대로 내적/L2에 써도 코사인과 같은 순서가 됩니다.
+
+반환값 written은 ChromaDB에 실제로 저장된 문서의 인덱스 목록입니다.
+"""
+
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from numpy_vector_index import normalize_rows
+
+DEFAULT_CHUNK_SIZE = 256
+DEFAULT_ENCODE_BATCH_SIZE = 32
+DEFAULT_QUEUE_SIZE = 4
+
+
+class EmbeddingPipelineError(Exception):
+    """인코딩 또는 ChromaDB 쓰기 실패. 그 전까지 저장된 인덱스(written)와 통계를 함께 전달"""
+
+    def __init__(self, cause, written, stats):
+        super().__init__(str(cause))
+        self.written = written
+        self.stats = stats
+
+
+def default_workers():
+    return max(1, (os.cpu_count() or 1) // 4)
+
+
+# 워커 프로세스에서 실행 (spawn으로 띄우므로 모듈 최상위 함수)
+
+_worker_model = None
+
+def _init_worker(model_name, threads):
+    global _worker_model
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    torch.set_num_threads(threads)
+    _worker_model = SentenceTransformer(model_name, device='cpu')
+
+def _encode_in_worker(texts, batch_size):
+    return _worker_model.encode(texts, batch_size=batch_size, show_progress_bar=False).astype(np.float32)
+
+
+def _make_executor(model, model_name, workers):
+    if workers <= 1:
+        # torch는 연산 중 GIL을 놓으므로 스레드 하나로도 캐시 조회/쓰기와 겹쳐 돌아감
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='encode')
+        encode = lambda texts, batch_size: model.encode(texts, batch_size=batch_size, show_progress_bar=False)
+        return executor, encode
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        # fork는 이미 torch 스레드가 떠 있는 부모에서 교착될 수 있음
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_worker,
+        initargs=(model_name, threads),
+    )
+    return executor, _encode_in_worker
+
+
+def _writer(collection, documents, metadatas, ids, jobs, written, stats, started):
+    """큐에서 (인덱스, 벡터)를 꺼내 ChromaDB에 upsert. 실패 후에는 큐만 비움"""
+    while True:
+        job = jobs.get()
+        if job is None:
+            return
+        if stats['error'] is not None:
+            continue
+        indices, vectors = job
+        try:
+            collection.upsert(
+                embeddings=vectors.tolist(),
+                documents=[documents[i] for i in indices],
+                metadatas=[metadatas[i] for i in indices],
+                ids=[ids[i] for i in indices],
+            )
+        except Exception as e:
+            stats['error'] = e
+            continue
+        written.extend(indices)
+        elapsed = time.perf_counter() - started
+        print(f"   ✅ {len(written)}/{len(documents)} 저장 ({len(written) / elapsed:.1f} docs/s)")
+
+
+def embed_documents(documents, metadatas, ids, collection, model, model_name, cache,
+                    workers=1, chunk_size=DEFAULT_CHUNK_SIZE,
+                    encode_batch_size=DEFAULT_ENCODE_BATCH_SIZE, queue_size=DEFAULT_QUEUE_SIZE):
+    """documents를 임베딩해 collection에 upsert하고 (저장된 인덱스 목록, 통계)를 반환"""
+    started = time.perf_counter()
+    stats = {'documents': len(documents), 'encoded': 0, 'cached': 0, 'error': None}
+    written = []
+    jobs = queue.Queue(maxsize=queue_size)
+    writer = threading.Thread(
+        target=_writer, args=(collection, documents, metadatas, ids, jobs, written, stats, started),
+        name='chroma-writer', daemon=True,
+    )
+    writer.start()
+
+    # 긴 텍스트부터: 청크 안의 길이가 비슷해 패딩이 줄고, 느린 청크가 먼저 시작됨
+    order = sorted(range(len(documents)), key=lambda i: len(documents[i]), reverse=True)
+    chunks = [order[i:i + chunk_size] for i in range(0, len(order), chunk_size)]
+
+    executor, encode = _make_executor(model, model_name, workers)
+    pending = deque()
+
+    def finish_oldest():
+        indices, keys, hits, missing, future = pending.popleft()
+        if future is not None:
+            fresh = cache.add(list(missing), future.result())
+            stats['encoded'] += len(missing)
+            hits.update(zip(missing, fresh))
+        jobs.put((indices, normalize_rows(np.stack([hits[key] for key in keys]))))
+
+    try:
+        for indices in chunks:
+            if stats['error'] is not None:
+                break
+            keys, hits, missing = cache.lookup([documents[i] for i in indices])
+            stats['cached'] += len(indices) - len(missing)
+            future = executor.submit(encode, list(missing.values()), encode_batch_size) if missing else None
+            pending.append((indices, keys, hits, missing, future))
+            # 워커마다 하나씩 + 다음 청크 하나까지만 미리 제출
+            while len(pending) > workers + 1:
+                finish_oldest()
+        while pending and stats['error'] is None:
+            finish_oldest()
+    except Exception as e:
+        stats['error'] = stats['error'] or e
+    finally:
+        for *_, future in pending:
+            if future is not None:
+                future.cancel()
+        executor.shutdown(wait=True)
+        jobs.put(None)
+        writer.join()
+
+    stats['seconds'] = time.perf_counter() - started
+    stats['docs_per_second'] = len(written) / stats['seconds'] if stats['seconds'] else 0.0
+    if stats['error'] is not None:
+        raise EmbeddingPipelineError(stats['error'], written, stats)
+    return written, stats
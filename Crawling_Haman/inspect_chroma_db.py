@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ChromaDB 저장소(chroma.sqlite3 + 세그먼트 디렉터리) 점검 도구
+
+수 GB짜리 저장소에서도 메모리를 일정하게 쓰도록 모든 집계를 SQL에서 하고
+(GROUP BY, json_extract, NOT EXISTS), 행을 읽어야 할 때는 fetchall() 없이 커서를
+그대로 순회합니다. DB는 읽기 전용(mode=ro)으로 엽니다.
+
+    python inspect_chroma_db.py                    # chroma_db/ 요약
+    python inspect_chroma_db.py --exact --samples 5
+    python inspect_chroma_db.py --json report.json
+
+출력 항목:
+- 파일: sqlite/WAL 크기, 페이지 수·빈 페이지
+- 테이블 행 수: 기본은 MAX(rowid) 추정(B-트리 끝 한 번 조회), --exact면 COUNT(*)와
+  테이블별 디스크 크기(dbstat 지원 빌드, 전체 페이지를 훑으므로 큰 DB에서 느림)
+- 컬렉션별: 차원, 메타데이터 세그먼트의 벡터 수, HNSW 헤더의 요소 수, 세그먼트 디렉터리 크기,
+  아직 색인되지 않은 큐 항목 수, 카테고리별 벡터 수
+- embeddings_queue: 작업 종류별 건수, 카테고리별 건수(json_extract)
+- 고아 행: 세그먼트 없는 embeddings, embeddings 없는 메타데이터/전문 검색 행,
+  컬렉션 없는 세그먼트, DB에 없는 세그먼트 디렉터리
+"""
+
+import argparse
+import json
+import sqlite3
+import struct
+import sys
+from collections import Counter
+from pathlib import Path
+
+DEFAULT_CHROMA_DIR = Path(__file__).parent / "chroma_db"
+SQLITE_FILE = "chroma.sqlite3"
+
+# embeddings_queue.operation (chromadb.proto 순서)
+OPERATIONS = {0: "ADD", 1: "UPDATE", 2: "UPSERT", 3: "DELETE"}
+# hnswlib header.bin: offsetLevel0, max_elements, cur_element_count (size_t, little endian)
+HNSW_HEADER = "header.bin"
+HNSW_COUNT_OFFSET = 16
+
+# rowid가 1부터 늘어나기만 하는 큰 테이블 - MAX(rowid)로 행 수를 추정
+ESTIMATED_TABLES = {
+    "embeddings", "embedding_metadata", "embeddings_queue",
+    "embedding_fulltext_search", "embedding_fulltext_search_content", "embedding_fulltext_search_docsize",
+}
+# FTS5 내부 테이블은 rowid에 세그먼트 번호가 섞여 추정이 불가 (--exact에서만 셈)
+UNCOUNTED_SUFFIXES = ("_data", "_idx")
+
+
+class ChromaStore:
+    def __init__(self, chroma_dir=DEFAULT_CHROMA_DIR):
+        self.dir = Path(chroma_dir)
+        self.db_path = self.dir / SQLITE_FILE
+        if not self.db_path.exists():
+            raise FileNotFoundError(f"파일을 찾을 수 없습니다: {self.db_path}")
+        self.conn = sqlite3.connect(f"file:{self.db_path.resolve().as_posix()}?mode=ro", uri=True)
+        self.conn.execute("PRAGMA query_only = ON")
+        self._columns = {}
+        self.json1 = self._has_json1()
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # === 스키마 ===
+
+    def tables(self):
+        return [name for name, in self.conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+        )]
+
+    def columns(self, table):
+        if table not in self._columns:
+            self._columns[table] = [row[1] for row in self.conn.execute(f'PRAGMA table_info("{table}")')]
+        return self._columns[table]
+
+    def has(self, table, *columns):
+        existing = self.columns(table)
+        return bool(existing) and all(column in existing for column in columns)
+
+    def _has_json1(self):
+        try:
+            self.conn.execute("SELECT json_extract('{\"a\": 1}', '$.a')").fetchone()
+            return True
+        except sqlite3.OperationalError:
+            return False
+
+    def scalar(self, sql, params=()):
+        row = self.conn.execute(sql, params).fetchone()
+        return row[0] if row else None
+
+    # === 파일/테이블 ===
+
+    def file_stats(self):
+        wal = self.db_path.with_name(SQLITE_FILE + "-wal")
+        page_size = self.scalar("PRAGMA page_size")
+        return {
+            "sqlite_bytes": self.db_path.stat().st_size,
+            "wal_bytes": wal.stat().st_size if wal.exists() else 0,
+            "page_size": page_size,
+            "page_count": self.scalar("PRAGMA page_count"),
+            "freelist_pages": self.scalar("PRAGMA freelist_count"),
+        }
+
+    def table_bytes(self):
+        """테이블(+인덱스)별 바이트. dbstat 가상 테이블이 없는 빌드면 None"""
+        try:
+            rows = self.conn.execute(
+                "SELECT COALESCE(m.tbl_name, s.name), SUM(s.pgsize) FROM dbstat s "
+                "LEFT JOIN sqlite_master m ON m.name = s.name GROUP BY 1 ORDER BY 2 DESC"
+            )
+            return {name: size for name, size in rows}
+        except sqlite3.OperationalError:
+            return None
+
+    def row_count(self, table, exact=False):
+        """
+        exact가 아니면 큰 테이블은 MAX(rowid)(B-트리 끝만 읽음, 삭제가 있으면 과대 추정),
+        FTS 내부 테이블은 None, 나머지 작은 테이블은 COUNT(*)
+        """
+        if not exact:
+            if table in ESTIMATED_TABLES:
+                return self.scalar(f'SELECT MAX(rowid) FROM "{table}"') or 0
+            if table.startswith("embedding_fulltext_search") and table.endswith(UNCOUNTED_SUFFIXES):
+                return None
+        return self.scalar(f'SELECT COUNT(*) FROM "{table}"')
+
+    # === 컬렉션 ===
+
+    def collections(self):
+        if not self.has("collections", "id", "name"):
+            return []
+        dimension = "dimension" if self.has("collections", "dimension") else "NULL"
+        return [{"id": collection_id, "name": name, "dimension": dim} for collection_id, name, dim in
+                self.conn.execute(f"SELECT id, name, {dimension} FROM collections ORDER BY name")]
+
+    def segments(self, collection_id):
+        if not self.has("segments", "id", "scope", "collection"):
+            return {}
+        return {scope: segment_id for segment_id, scope in self.conn.execute(
+            "SELECT id, scope FROM segments WHERE collection = ?", (collection_id,)
+        )}
+
+    def vector_count(self, metadata_segment):
+        if metadata_segment is None or not self.has("embeddings", "segment_id"):
+            return None
+        return self.scalar("SELECT COUNT(*) FROM embeddings WHERE segment_id = ?", (metadata_segment,))
+
+    def category_counts(self, metadata_segment, key="category"):
+        if metadata_segment is None or not self.has("embedding_metadata", "id", "key", "string_value"):
+            return {}
+        rows = self.conn.execute(
+            "SELECT COALESCE(md.string_value, '(없음)'), COUNT(*) FROM embeddings e "
+            "LEFT JOIN embedding_metadata md ON md.id = e.id AND md.key = ? "
+            "WHERE e.segment_id = ? GROUP BY 1 ORDER BY 2 DESC",
+            (key, metadata_segment),
+        )
+        return dict(rows)
+
+    def pending_queue(self, collection_id, vector_segment):
+        """벡터 세그먼트가 아직 반영하지 않은 큐 항목 수 (max_seq_id 이후)"""
+        if not self.has("embeddings_queue", "seq_id", "topic") or vector_segment is None:
+            return None
+        applied = self.scalar("SELECT seq_id FROM max_seq_id WHERE segment_id = ?", (vector_segment,)) \
+            if self.has("max_seq_id", "segment_id", "seq_id") else None
+        if isinstance(applied, bytes):  # 0.4 버전은 big-endian 바이트로 저장
+            applied = int.from_bytes(applied, "big")
+        return self.scalar(
+            "SELECT COUNT(*) FROM embeddings_queue WHERE topic LIKE ? AND seq_id > ?",
+            (f"%{collection_id}", applied or 0),
+        )
+
+    def segment_dir_stats(self, segment_id):
+        path = self.dir / segment_id if segment_id else None
+        if path is None or not path.is_dir():
+            return {"bytes": 0, "hnsw_elements": None}
+        size = sum(f.stat().st_size for f in path.iterdir() if f.is_file())
+        elements = None
+        header = path / HNSW_HEADER
+        if header.exists():
+            with open(header, "rb") as f:
+                f.seek(HNSW_COUNT_OFFSET)
+                raw = f.read(8)
+            if len(raw) == 8:
+                elements = struct.unpack("<Q", raw)[0]
+        return {"bytes": size, "hnsw_elements": elements}
+
+    # === 큐 ===
+
+    def queue_operations(self):
+        if not self.has("embeddings_queue", "operation"):
+            return {}
+        return {OPERATIONS.get(op, str(op)): count for op, count in self.conn.execute(
+            "SELECT operation, COUNT(*) FROM embeddings_queue GROUP BY operation ORDER BY operation"
+        )}
+
+    def queue_categories(self, key="category"):
+        """큐 메타데이터(JSON 문자열)의 카테고리별 건수. json1이 없으면 커서를 순회하며 집계"""
+        if not self.has("embeddings_queue", "metadata"):
+            return {}
+        if self.json1:
+            return dict(self.conn.execute(
+                "SELECT COALESCE(json_extract(metadata, ?), '(없음)'), COUNT(*) FROM embeddings_queue "
+                "WHERE metadata IS NOT NULL AND json_valid(metadata) GROUP BY 1 ORDER BY 2 DESC",
+                (f"$.{key}",),
+            ))
+        counts = Counter()
+        for metadata, in self.conn.execute("SELECT metadata FROM embeddings_queue WHERE metadata IS NOT NULL"):
+            try:
+                counts[json.loads(metadata).get(key, "(없음)")] += 1
+            except (ValueError, AttributeError):
+                counts["(파싱 오류)"] += 1
+        return dict(counts.most_common())
+
+    def queue_samples(self, limit):
+        if not limit or not self.has("embeddings_queue", "id", "metadata", "operation"):
+            return
+        for seq_id, doc_id, operation, metadata in self.conn.execute(
+            "SELECT seq_id, id, operation, metadata FROM embeddings_queue ORDER BY seq_id LIMIT ?", (limit,)
+        ):
+            try:
+                metadata = json.loads(metadata) if metadata else {}
+            except ValueError:
+                metadata = {"(파싱 오류)": metadata[:100]}
+            yield {"seq_id": seq_id, "id": doc_id, "operation": OPERATIONS.get(operation, operation),
+                   "metadata": metadata}
+
+    def document_samples(self, limit, chars=200):
+        if not limit or not self.has("embedding_fulltext_search", "string_value"):
+            return
+        for text, in self.conn.execute(
+            "SELECT substr(string_value, 1, ?) FROM embedding_fulltext_search LIMIT ?", (chars, limit)
+        ):
+            yield text
+
+    # === 고아 ===
+
+    def orphans(self):
+        checks = {}
+        if self.has("embeddings", "segment_id") and self.has("segments", "id"):
+            checks["embeddings_without_segment"] = self.scalar(
+                "SELECT COUNT(*) FROM embeddings e WHERE NOT EXISTS (SELECT 1 FROM segments s WHERE s.id = e.segment_id)"
+            )
+        if self.has("embedding_metadata", "id") and self.has("embeddings", "id"):
+            checks["metadata_without_embedding"] = self.scalar(
+                "SELECT COUNT(DISTINCT md.id) FROM embedding_metadata md "
+                "WHERE NOT EXISTS (SELECT 1 FROM embeddings e WHERE e.id = md.id)"
+            )
+        if self.columns("embedding_fulltext_search") and self.has("embeddings", "id"):
+            checks["fulltext_without_embedding"] = self.scalar(
+                "SELECT COUNT(*) FROM embedding_fulltext_search f "
+                "WHERE NOT EXISTS (SELECT 1 FROM embeddings e WHERE e.id = f.rowid)"
+            )
+        if self.has("segments", "collection") and self.has("collections", "id"):
+            checks["segments_without_collection"] = self.scalar(
+                "SELECT COUNT(*) FROM segments s WHERE NOT EXISTS (SELECT 1 FROM collections c WHERE c.id = s.collection)"
+            )
+        if self.has("segments", "id"):
+            known = {segment_id for segment_id, in self.conn.execute("SELECT id FROM segments")}
+            stray = [path.name for path in self.dir.iterdir() if path.is_dir() and path.name not in known]
+            checks["segment_dirs_without_segment"] = len(stray)
+            if stray:
+                checks["stray_dirs"] = sorted(stray)
+        return checks
+
+
+def inspect(chroma_dir=DEFAULT_CHROMA_DIR, exact=False, samples=0):
+    """저장소 점검 결과 dict (샘플은 제외)"""
+    with ChromaStore(chroma_dir) as store:
+        tables = store.tables()
+        report = {
+            "path": str(store.dir),
+            "files": store.file_stats(),
+            "json1": store.json1,
+            "tables": {table: store.row_count(table, exact) for table in tables},
+            "row_counts": "exact" if exact else "estimated",
+            "table_bytes": store.table_bytes() if exact else None,
+            "collections": [],
+            "queue": {"operations": store.queue_operations(), "categories": store.queue_categories()},
+            "orphans": store.orphans(),
+        }
+        for collection in store.collections():
+            segments = store.segments(collection["id"])
+            metadata_segment = segments.get("METADATA")
+            vector_segment = segments.get("VECTOR")
+            segment_dir = store.segment_dir_stats(vector_segment)
+            report["collections"].append({
+                **collection,
+                "vectors": store.vector_count(metadata_segment),
+                "hnsw_elements": segment_dir["hnsw_elements"],
+                "segment_dir_bytes": segment_dir["bytes"],
+                "pending_queue": store.pending_queue(collection["id"], vector_segment),
+                "categories": store.category_counts(metadata_segment),
+            })
+        if samples:
+            report["samples"] = {
+                "queue": list(store.queue_samples(samples)),
+                "documents": list(store.document_samples(samples)),
+            }
+    return report
+
+
+def _mb(size):
+    return f"{(size or 0) / 1e6:,.1f} MB"
+
+
+def print_report(report):
+    files = report["files"]
+    print(f"📁 {report['path']}")
+    print(f"📊 sqlite {_mb(files['sqlite_bytes'])} (WAL {_mb(files['wal_bytes'])}), "
+          f"페이지 {files['page_count']:,}개 x {files['page_size']} B, 빈 페이지 {files['freelist_pages']:,}개")
+
+    label = "정확" if report["row_counts"] == "exact" else "추정, --exact로 정확히"
+    print(f"\n📋 테이블 ({label}):")
+    table_bytes = report["table_bytes"] or {}
+    for table, count in report["tables"].items():
+        size = f", {_mb(table_bytes[table])}" if table in table_bytes else ""
+        print(f"   - {table}: {f'{count:,}' if count is not None else '?'}행{size}")
+
+    print("\n🗂️  컬렉션:")
+    if not report["collections"]:
+        print("   (없음)")
+    for collection in report["collections"]:
+        print(f"   - {collection['name']} (차원 {collection['dimension']}, id {collection['id']})")
+        print(f"     벡터 {collection['vectors'] if collection['vectors'] is not None else '?'}개, "
+              f"HNSW 요소 {collection['hnsw_elements'] if collection['hnsw_elements'] is not None else '?'}개, "
+              f"세그먼트 디렉터리 {_mb(collection['segment_dir_bytes'])}, "
+              f"미반영 큐 {collection['pending_queue'] if collection['pending_queue'] is not None else '?'}건")
+        for category, count in collection["categories"].items():
+            print(f"       🏷️  {category}: {count:,}개")
+
+    queue = report["queue"]
+    if queue["operations"]:
+        print("\n📥 embeddings_queue:")
+        print("   작업: " + ", ".join(f"{op} {count:,}" for op, count in queue["operations"].items()))
+        for category, count in queue["categories"].items():
+            print(f"   🏷️  {category}: {count:,}건")
+
+    print("\n🧹 고아 행:")
+    for check, count in report["orphans"].items():
+        if check == "stray_dirs":
+            continue
+        print(f"   {'⚠️ ' if count else '✅'} {check}: {count:,}")
+    for name in report["orphans"].get("stray_dirs", []):
+        print(f"      - {name}")
+
+    samples = report.get("samples")
+    if samples:
+        print("\n📄 큐 샘플:")
+        for sample in samples["queue"]:
+            metadata = sample["metadata"]
+            print(f"   [{sample['seq_id']}] {sample['operation']} {sample['id']} - "
+                  f"{metadata.get('category', '')} {metadata.get('title', '')}")
+        print("\n📖 문서 샘플:")
+        for text in samples["documents"]:
+            print(f"   {text.replace(chr(10), ' ')}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ChromaDB 저장소 점검 (읽기 전용, 일정한 메모리)")
+    parser.add_argument("chroma_dir", type=Path, nargs="?", default=DEFAULT_CHROMA_DIR, help="ChromaDB 데이터 디렉토리")
+    parser.add_argument("--exact", action="store_true", help="테이블 행 수(COUNT(*))와 크기(dbstat)를 정확히 (큰 DB에서 느림)")
+    parser.add_argument("--samples", type=int, default=0, help="큐/문서 샘플 개수")
+    parser.add_argument("--json", type=Path, help="결과 JSON 경로")
+    args = parser.parse_args(argv)
+
+    try:
+        report = inspect(args.chroma_dir, exact=args.exact, samples=args.samples)
+    except (FileNotFoundError, sqlite3.Error) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print_report(report)
+    if args.json:
+        args.json.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"\n💾 {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+한국어 문서 청크 분할 / 검색 결과 부모 단위 병합
+
+임베딩 모델은 max_seq_length(ko-sroberta는 128토큰)를 넘는 뒷부분을 조용히 잘라내므로
+긴 인물/전설 이야기는 문장 경계에서 토큰 수 한도 안으로 나눠 청크별로 임베딩합니다.
+인접 청크는 끝 문장 몇 개(overlap_tokens 이내)를 겹쳐 문맥이 끊기지 않게 합니다.
+
+검색할 때는 한 문서의 여러 청크가 결과를 차지하지 않도록 collapse_by_parent로
+부모(mysql_id)별 가장 가까운 청크 하나만 남깁니다.
+"""
+
+import re
+
+# 문장 끝 부호(뒤따르는 따옴표/괄호 포함) + 공백, 또는 줄바꿈
+_BOUNDARY = re.compile(r'[.!?。？！…]+["\'”’」』)\]]*\s+|\s*\n\s*')
+
+
+def split_sentences(text):
+    """문장 단위로 분리 (소수점처럼 뒤에 공백이 없는 마침표는 나누지 않음)"""
+    sentences = []
+    start = 0
+    for match in _BOUNDARY.finditer(text):
+        sentence = text[start:match.end()].strip()
+        if sentence:
+            sentences.append(sentence)
+        start = match.end()
+    tail = text[start:].strip()
+    if tail:
+        sentences.append(tail)
+    return sentences
+
+
+def token_counter(model):
+    """모델 토크나이저 기준 토큰 수 함수 (토크나이저가 없으면 글자 수로 근사)"""
+    tokenizer = getattr(model, 'tokenizer', None)
+    if tokenizer is None:
+        return len
+    return lambda text: len(tokenizer.tokenize(text))
+
+
+def model_token_limit(model, default=128):
+    """[CLS]/[SEP] 자리를 뺀, 잘리지 않고 들어가는 토큰 수"""
+    return (getattr(model, 'max_seq_length', None) or default) - 2
+
+
+def _split_long(sentence, count_tokens, max_tokens):
+    """한도를 넘는 한 문장을 어절 단위로, 그래도 넘는 어절은 글자 단위로 나눔"""
+    pieces = []
+    current = ''
+    for word in sentence.split():
+        while count_tokens(word) > max_tokens:
+            cut = max(1, len(word) * max_tokens // count_tokens(word))
+            if current:
+                pieces.append(current)
+                current = ''
+            pieces.append(word[:cut])
+            word = word[cut:]
+        candidate = f"{current} {word}" if current else word
+        if current and count_tokens(candidate) > max_tokens:
+            pieces.append(current)
+            current = word
+        else:
+            current = candidate
+    if current:
+        pieces.append(current)
+    return [(piece, count_tokens(piece)) for piece in pieces]
+
+
+def chunk_text(text, count_tokens, max_tokens, overlap_tokens=0):
+    """
+    text를 max_tokens 이하의 청크 목록으로 나눕니다.
+    문장을 순서대로 채우고, 다음 청크는 이전 청크의 끝 문장들(overlap_tokens 이내)로 시작합니다.
+    """
+    pieces = []
+    for sentence in split_sentences(text):
+        tokens = count_tokens(sentence)
+        if tokens <= max_tokens:
+            pieces.append((sentence, tokens))
+        else:
+            pieces.extend(_split_long(sentence, count_tokens, max_tokens))
+
+    # 청크는 문장을 공백으로 이어 붙이므로 구분자 비용을 문장마다 더하고 한도에도 한 번 더함
+    sep = count_tokens(' ')
+    budget = max_tokens + sep
+    pieces = [(sentence, tokens + sep) for sentence, tokens in pieces]
+
+    chunks = []
+    current, size = [], 0
+    for sentence, tokens in pieces:
+        if current and size + tokens > budget:
+            chunks.append(' '.join(s for s, _ in current))
+            carry, carried = [], 0
+            for s, t in reversed(current):
+                if carried + t > overlap_tokens + sep or carried + t + tokens > budget:
+                    break
+                carry.insert(0, (s, t))
+                carried += t
+            current, size = carry, carried
+        current.append((sentence, tokens))
+        size += tokens
+    if current:
+        chunks.append(' '.join(s for s, _ in current))
+    return chunks
+
+
+def collapse_by_parent(results, n_results, parent_key='mysql_id'):
+    """
+    collection.query 결과에서 부모별로 가장 가까운 청크 하나만 남기고 n_results개로 자릅니다.
+    질의가 여러 개여도 되며 결과 형식(질의별 리스트)은 그대로 유지합니다.
+    """
+    fields = [field for field in ('ids', 'documents', 'metadatas', 'distances') if results.get(field) is not None]
+    collapsed = {field: [] for field in fields}
+    for q in range(len(results['ids'])):
+        seen = set()
+        kept = []
+        for i, doc_id in enumerate(results['ids'][q]):
+            metadata = results['metadatas'][q][i] if 'metadatas' in fields else None
+            parent = (metadata or {}).get(parent_key, doc_id)
+            if parent in seen:
+                continue
+            seen.add(parent)
+            kept.append(i)
+            if len(kept) == n_results:
+                break
+        for field in fields:
+            collapsed[field].append([results[field][q][i] for i in kept])
+    return collapsed
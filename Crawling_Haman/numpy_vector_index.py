@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+NumPy 메모리 맵 벡터 인덱스 (ChromaDB 컬렉션 대체용)
+
+함안 코퍼스는 청크 수천 개 규모라 질의 시간 대부분이 ChromaDB의 SQLite/HNSW
+왕복에 쓰입니다. 이 인덱스는 정규화한 임베딩을 vectors.npy 하나에 두고
+np.load(mmap_mode='r')로 열어, 질의마다 행렬-벡터 곱 한 번과 argpartition으로
+top-k를 구합니다.
+
+    index = NumpyVectorIndex('vector_index')
+    results = index.query(query_embeddings=[vector], n_results=5, where={"category": "인물"})
+
+디렉터리 구성:
+    vectors.npy   (행 수 x 차원) float32, 행마다 L2 정규화
+    records.json  ids / documents / metadatas (행 순서), 차원, 행 수
+
+- query/get/upsert/add/delete/count/peek을 ChromaDB 컬렉션과 같은 인자·반환 형식으로
+  제공하므로 culture_search, Step 2/3의 collection 자리에 그대로 넣을 수 있습니다.
+- where는 {"필드": 값}, {"필드": {"$eq"|"$ne"|"$in"|"$nin": ...}}, {"$and"|"$or": [...]}를
+  지원하며, 조건에 맞는 행 번호를 먼저 구해(조건별로 캐시) 그 행들만 곱합니다.
+- distances는 코사인 거리(1 - 코사인 유사도)로, 작을수록 가깝습니다. 대체하는 ChromaDB
+  컬렉션도 CHROMA_COLLECTION_METADATA(hnsw:space=cosine)로 만들고 정규화한 벡터를
+  저장하므로(Step 2/4, embedding_pipeline) 두 저장소의 distances와 순위가 같습니다.
+  ChromaDB 기본값인 l2(제곱 L2 거리)로 만든 예전 컬렉션은 Step 2/4가 다시 만듭니다.
+- 쓰기는 전체 파일을 임시 파일에 쓴 뒤 os.replace로 교체합니다 (수천 행 기준 수 ms).
+  한 디렉터리는 한 프로세스만 쓴다고 가정합니다.
+
+양자화 저장 (dtype="float16" | "int8"):
+    vectors.npy는 float16, 또는 int8 + 행별 배율(scales.npy, 최대 절댓값/127)로 저장해
+    질의 때 훑는 행렬을 1/2, 1/4로 줄입니다. 원본 float32는 full.npy에 메모리 맵으로만
+    열어 두고, 양자화 점수로 고른 상위 n_results x rerank_factor개만 float32로 다시
+    계산해 순위와 거리를 정확히 맞춥니다 (디스크는 늘고 상주 메모리는 줄어듦).
+    dtype을 바꿔 열면 full.npy에서 다시 양자화합니다. 비교는 quantization_benchmark.py.
+
+ChromaDB에서 한 번에 옮기기:
+
+    python numpy_vector_index.py --from-chroma chroma_db -o vector_index
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+DEFAULT_INDEX_DIR = Path(__file__).parent / "vector_index"
+# ChromaDB 컬렉션 생성 인자 - 이 인덱스와 같은 코사인 거리를 쓰게 함
+CHROMA_COLLECTION_METADATA = {"hnsw:space": "cosine"}
+INDEX_VERSION = 1
+EXPORT_BATCH_SIZE = 1000
+
+DTYPES = ("float32", "float16", "int8")
+DEFAULT_RERANK_FACTOR = 4
+# 양자화 행렬은 이 행 수씩 float32로 풀어 곱함 (임시 메모리 상한)
+SCORE_BLOCK_ROWS = 1024
+
+
+def normalize_rows(vectors):
+    """행마다 L2 정규화 (영벡터는 그대로)"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors[np.newaxis, :]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def uses_cosine(collection):
+    """ChromaDB 컬렉션이 코사인 거리로 만들어졌는지 (기본값 l2면 False)"""
+    return (getattr(collection, 'metadata', None) or {}).get("hnsw:space") == "cosine"
+
+
+def quantize(vectors, dtype):
+    """float32 정규화 행렬 → (저장 행렬, int8 행별 배율 또는 None)"""
+    if dtype == "float32":
+        return np.ascontiguousarray(vectors, dtype=np.float32), None
+    if dtype == "float16":
+        return vectors.astype(np.float16), None
+    if dtype == "int8":
+        scales = np.abs(vectors).max(axis=1) / 127.0 if len(vectors) else np.empty(0)
+        scales[scales == 0] = 1.0
+        codes = np.clip(np.rint(vectors / scales[:, np.newaxis]), -127, 127).astype(np.int8)
+        return codes, scales.astype(np.float32)
+    raise ValueError(f"지원하지 않는 dtype: {dtype} ({', '.join(DTYPES)} 중 하나)")
+
+
+def _top_k(scores, k):
+    """점수 내림차순 상위 k개의 위치"""
+    if k < len(scores):
+        top = np.argpartition(-scores, k - 1)[:k]
+    else:
+        top = np.arange(len(scores))
+    return top[np.argsort(-scores[top], kind='stable')]
+
+
+def _matches(metadata, where):
+    """ChromaDB where 문법의 부분 집합으로 메타데이터 한 건을 판정"""
+    for key, condition in where.items():
+        if key == '$and':
+            if not all(_matches(metadata, clause) for clause in condition):
+                return False
+            continue
+        if key == '$or':
+            if not any(_matches(metadata, clause) for clause in condition):
+                return False
+            continue
+        value = metadata.get(key)
+        if not isinstance(condition, dict):
+            condition = {'$eq': condition}
+        for op, operand in condition.items():
+            if op == '$eq':
+                ok = value == operand
+            elif op == '$ne':
+                ok = value != operand
+            elif op == '$in':
+                ok = value in operand
+            elif op == '$nin':
+                ok = value not in operand
+            else:
+                raise ValueError(f"지원하지 않는 where 연산자: {op}")
+            if not ok:
+                return False
+    return True
+
+
+class NumpyVectorIndex:
+    def __init__(self, path=DEFAULT_INDEX_DIR, name=None, dtype=None, rerank_factor=DEFAULT_RERANK_FACTOR):
+        """
+        dtype: None이면 저장된 형식(새 인덱스는 float32), 다르면 열 때 다시 양자화
+        rerank_factor: 양자화 인덱스에서 float32로 다시 계산할 후보 배수 (0이면 재순위 없음)
+        """
+        if dtype is not None and dtype not in DTYPES:
+            raise ValueError(f"지원하지 않는 dtype: {dtype} ({', '.join(DTYPES)} 중 하나)")
+        self.path = Path(path)
+        self.name = name or self.path.name
+        self.vectors_path = self.path / 'vectors.npy'
+        self.scales_path = self.path / 'scales.npy'
+        self.full_path = self.path / 'full.npy'
+        self.records_path = self.path / 'records.json'
+        self.rerank_factor = rerank_factor
+        self.dtype = dtype or "float32"
+        self._lock = threading.RLock()
+        self._vectors = None
+        self._scales = None
+        self._full = None
+        self._dim = None
+        self._ids = []
+        self._documents = []
+        self._metadatas = []
+        self._rows = {}
+        self._where_rows = {}
+        self._load()
+        if dtype is not None and dtype != self.dtype:
+            full = np.array(self._full_matrix())
+            self.dtype = dtype
+            if self._ids:
+                self._save(full, self._ids, self._documents, self._metadatas)
+
+    # === 저장/로드 ===
+
+    @property
+    def quantized(self):
+        return self.dtype != "float32"
+
+    def _load(self):
+        if not self.records_path.exists():
+            return
+        records = json.loads(self.records_path.read_text(encoding='utf-8'))
+        if records.get('version') != INDEX_VERSION:
+            raise ValueError(f"{self.records_path}: 지원하지 않는 인덱스 버전 {records.get('version')}")
+        self._ids = records['ids']
+        self._documents = records['documents']
+        self._metadatas = records['metadatas']
+        self._dim = records['dim']
+        self.dtype = records.get('dtype', "float32")
+        if self._ids:
+            self._open_matrices()
+            if self._vectors.shape != (len(self._ids), self._dim):
+                raise ValueError(
+                    f"{self.path}: vectors.npy {self._vectors.shape}와 records.json "
+                    f"({len(self._ids)}, {self._dim})이 맞지 않습니다"
+                )
+        self._rows = {doc_id: row for row, doc_id in enumerate(self._ids)}
+
+    def _open_matrices(self):
+        self._vectors = np.load(self.vectors_path, mmap_mode='r')
+        if self.quantized:
+            self._full = np.load(self.full_path, mmap_mode='r')
+            self._scales = np.load(self.scales_path) if self.dtype == "int8" else None
+        else:
+            self._full, self._scales = self._vectors, None
+
+    @staticmethod
+    def _write_npy(path, array):
+        tmp_path = path.with_suffix('.npy.tmp')
+        with open(tmp_path, 'wb') as f:
+            np.save(f, array)
+        os.replace(tmp_path, path)
+
+    def _save(self, vectors, ids, documents, metadatas):
+        """
+        임시 파일에 쓴 뒤 교체. 벡터 파일들을 먼저 바꾸고 records.json을 나중에 바꿈.
+        vectors는 float32 정규화 행렬이며 self.dtype 형식으로 저장됩니다.
+        """
+        self.path.mkdir(parents=True, exist_ok=True)
+        # 열려 있는 메모리 맵을 놓아야 (Windows에서도) 파일을 교체할 수 있음
+        self._vectors = self._full = self._scales = None
+        if len(ids):
+            full = np.ascontiguousarray(vectors, dtype=np.float32)
+            stored, scales = quantize(full, self.dtype)
+            if self.quantized:
+                self._write_npy(self.full_path, full)
+            if scales is not None:
+                self._write_npy(self.scales_path, scales)
+            self._write_npy(self.vectors_path, stored)
+        records = {
+            'version': INDEX_VERSION,
+            'dim': self._dim,
+            'dtype': self.dtype,
+            'ids': ids,
+            'documents': documents,
+            'metadatas': metadatas,
+        }
+        tmp_records = self.records_path.with_suffix('.json.tmp')
+        tmp_records.write_text(json.dumps(records, ensure_ascii=False, separators=(',', ':')), encoding='utf-8')
+        os.replace(tmp_records, self.records_path)
+        # 형식을 바꿨다면 더는 쓰지 않는 파일 정리
+        if not self.quantized:
+            self.full_path.unlink(missing_ok=True)
+        if self.dtype != "int8":
+            self.scales_path.unlink(missing_ok=True)
+        self._ids, self._documents, self._metadatas = ids, documents, metadatas
+        self._rows = {doc_id: row for row, doc_id in enumerate(ids)}
+        self._where_rows = {}
+        if len(ids):
+            self._open_matrices()
+
+    def _full_matrix(self):
+        """float32 원본 (메모리 맵)"""
+        if self._full is None:
+            return np.empty((0, self._dim or 0), dtype=np.float32)
+        return self._full
+
+    def _scores(self, rows, queries):
+        """(행 수 x 질의 수) 유사도. 저장 형식 그대로 블록 단위로 풀어 곱함"""
+        matrix = self._vectors
+        n = len(self._ids) if rows is None else len(rows)
+        scores = np.empty((n, len(queries)), dtype=np.float32)
+        for start in range(0, n, SCORE_BLOCK_ROWS):
+            end = min(start + SCORE_BLOCK_ROWS, n)
+            index = slice(start, end) if rows is None else rows[start:end]
+            block = np.asarray(matrix[index]).astype(np.float32, copy=False)
+            scores[start:end] = block @ queries.T
+            if self._scales is not None:
+                scores[start:end] *= self._scales[index][:, np.newaxis]
+        return scores
+
+    # === 필터 ===
+
+    def _filter_rows(self, where):
+        """where에 맞는 행 번호 배열 (None이면 전체)"""
+        if not where:
+            return None
+        key = json.dumps(where, sort_keys=True, ensure_ascii=False)
+        rows = self._where_rows.get(key)
+        if rows is None:
+            rows = np.fromiter(
+                (row for row, metadata in enumerate(self._metadatas) if _matches(metadata or {}, where)),
+                dtype=np.int64,
+            )
+            self._where_rows[key] = rows
+        return rows
+
+    def _select(self, ids, where):
+        rows = None
+        if ids is not None:
+            rows = np.array([self._rows[doc_id] for doc_id in ids if doc_id in self._rows], dtype=np.int64)
+        filtered = self._filter_rows(where)
+        if filtered is not None:
+            rows = filtered if rows is None else rows[np.isin(rows, filtered)]
+        return rows
+
+    # === ChromaDB 컬렉션 호환 API ===
+
+    @property
+    def dim(self):
+        return self._dim
+
+    @property
+    def scanned_bytes(self):
+        """질의마다 전부 훑는 행렬(+int8 배율) 크기. full.npy는 재순위 후보 행만 읽음"""
+        if self._vectors is None:
+            return 0
+        return self._vectors.nbytes + (self._scales.nbytes if self._scales is not None else 0)
+
+    def count(self):
+        return len(self._ids)
+
+    def reset(self):
+        """모든 벡터 삭제"""
+        with self._lock:
+            self._dim = None
+            self._save(None, [], [], [])
+
+    def upsert(self, ids, embeddings, documents=None, metadatas=None):
+        if not ids:
+            return
+        vectors = normalize_rows(embeddings)
+        if len(vectors) != len(ids):
+            raise ValueError(f"ids {len(ids)}개와 embeddings {len(vectors)}개의 수가 다릅니다")
+        documents = documents if documents is not None else [None] * len(ids)
+        metadatas = metadatas if metadatas is not None else [None] * len(ids)
+        with self._lock:
+            if self._dim is None or not self._ids:
+                self._dim = vectors.shape[1]
+            elif vectors.shape[1] != self._dim:
+                raise ValueError(f"임베딩 차원 {vectors.shape[1]}이 인덱스 차원 {self._dim}과 다릅니다")
+
+            matrix = np.array(self._full_matrix())  # 메모리 맵 → 쓰기 가능한 복사본
+            all_ids, all_documents, all_metadatas = list(self._ids), list(self._documents), list(self._metadatas)
+            rows = dict(self._rows)
+            appended = []
+            for i, doc_id in enumerate(ids):
+                row = rows.get(doc_id)
+                if row is None:
+                    rows[doc_id] = len(all_ids)
+                    all_ids.append(doc_id)
+                    all_documents.append(documents[i])
+                    all_metadatas.append(metadatas[i])
+                    appended.append(vectors[i])
+                elif row < len(matrix):
+                    matrix[row] = vectors[i]
+                    all_documents[row], all_metadatas[row] = documents[i], metadatas[i]
+                else:
+                    # 같은 호출 안에서 앞서 추가된 ID
+                    appended[row - len(matrix)] = vectors[i]
+                    all_documents[row], all_metadatas[row] = documents[i], metadatas[i]
+            if appended:
+                matrix = np.vstack([matrix, np.stack(appended)])
+            self._save(matrix, all_ids, all_documents, all_metadatas)
+
+    add = upsert
+
+    def delete(self, ids=None, where=None):
+        with self._lock:
+            if ids is None and not where:
+                return
+            rows = self._select(ids, where)
+            if rows is None or not len(rows):
+                return
+            keep = np.ones(len(self._ids), dtype=bool)
+            keep[rows] = False
+            kept_rows = np.flatnonzero(keep)
+            matrix = np.asarray(self._full_matrix())[kept_rows]
+            self._save(
+                matrix,
+                [self._ids[row] for row in kept_rows],
+                [self._documents[row] for row in kept_rows],
+                [self._metadatas[row] for row in kept_rows],
+            )
+
+    def get(self, ids=None, where=None, limit=None, offset=None, include=('metadatas', 'documents')):
+        with self._lock:
+            rows = self._select(ids, where)
+            if rows is None:
+                rows = np.arange(len(self._ids))
+            rows = rows[offset or 0:]
+            if limit is not None:
+                rows = rows[:limit]
+            return {
+                'ids': [self._ids[row] for row in rows],
+                'embeddings': np.asarray(self._full_matrix())[rows] if 'embeddings' in include else None,
+                'documents': [self._documents[row] for row in rows] if 'documents' in include else None,
+                'metadatas': [self._metadatas[row] for row in rows] if 'metadatas' in include else None,
+            }
+
+    def peek(self, limit=10):
+        return self.get(limit=limit, include=('embeddings', 'documents', 'metadatas'))
+
+    def query(self, query_embeddings, n_results=10, where=None, include=('metadatas', 'documents', 'distances')):
+        """질의 벡터들 → 질의별 가까운 순 n_results개 (collection.query와 같은 형식)"""
+        queries = normalize_rows(query_embeddings)
+        with self._lock:
+            rows = self._filter_rows(where)
+            if len(self._ids) and queries.shape[1] != self._dim:
+                raise ValueError(f"질의 차원 {queries.shape[1]}이 인덱스 차원 {self._dim}과 다릅니다")
+            n_candidates = len(self._ids) if rows is None else len(rows)
+            k = min(n_results, n_candidates)
+            rerank = self.quantized and self.rerank_factor > 0
+            shortlist = min(n_candidates, k * self.rerank_factor) if rerank else k
+            results = {field: [] for field in ('ids', 'documents', 'metadatas', 'distances')}
+            # (후보 수 x 질의 수) 유사도 - 질의가 여러 개여도 행렬 곱 한 번
+            similarities = self._scores(rows, queries) if k else None
+            for q in range(len(queries)):
+                if k:
+                    scores = similarities[:, q]
+                    top = _top_k(scores, shortlist)
+                    hit_rows = top if rows is None else rows[top]
+                    top_scores = scores[top]
+                    if rerank:
+                        # 양자화 점수로 고른 후보만 float32 원본으로 다시 계산
+                        hit_rows = np.sort(hit_rows)
+                        exact = np.asarray(self._full[hit_rows]) @ queries[q]
+                        order = _top_k(exact, k)
+                        hit_rows, top_scores = hit_rows[order], exact[order]
+                    distances = (1.0 - top_scores).tolist()
+                else:
+                    hit_rows, distances = [], []
+                results['ids'].append([self._ids[row] for row in hit_rows])
+                results['documents'].append([self._documents[row] for row in hit_rows])
+                results['metadatas'].append([self._metadatas[row] for row in hit_rows])
+                results['distances'].append(distances)
+            for field in ('documents', 'metadatas', 'distances'):
+                if field not in include:
+                    results[field] = None
+            return results
+
+
+def export_from_chroma(collection, path=DEFAULT_INDEX_DIR, batch_size=EXPORT_BATCH_SIZE, dtype=None):
+    """ChromaDB 컬렉션 전체를 NumpyVectorIndex로 옮김 (기존 인덱스는 교체)"""
+    ids, embeddings, documents, metadatas = [], [], [], []
+    total = collection.count()
+    for offset in range(0, total, batch_size):
+        batch = collection.get(limit=batch_size, offset=offset, include=['embeddings', 'documents', 'metadatas'])
+        ids.extend(batch['ids'])
+        embeddings.extend(batch['embeddings'])
+        documents.extend(batch['documents'])
+        metadatas.extend(batch['metadatas'])
+    index = NumpyVectorIndex(path, dtype=dtype)
+    index.reset()
+    index.upsert(ids, embeddings, documents, metadatas)
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ChromaDB 컬렉션을 NumPy 메모리 맵 인덱스로 내보내기")
+    parser.add_argument("--from-chroma", type=Path, default=Path(__file__).parent / "chroma_db",
+                        help="ChromaDB 데이터 디렉토리")
+    parser.add_argument("--collection", default="haman_culture", help="컬렉션 이름")
+    parser.add_argument("-o", "--output", type=Path, default=DEFAULT_INDEX_DIR, help="인덱스 디렉토리")
+    parser.add_argument("--dtype", choices=DTYPES, help="저장 형식 (기본: 기존 인덱스 형식, 새 인덱스는 float32)")
+    args = parser.parse_args()
+
+    import chromadb
+
+    if not args.from_chroma.exists():
+        raise SystemExit(f"❌ ChromaDB 데이터 디렉토리가 없습니다: {args.from_chroma}")
+    collection = chromadb.PersistentClient(path=str(args.from_chroma)).get_collection(name=args.collection)
+    if not uses_cosine(collection):
+        print(f"⚠️  '{args.collection}'은 l2 거리 컬렉션이라 내보낸 인덱스(코사인)와 distances/순위가 다릅니다 "
+              f"(Step 2/4를 다시 실행하면 코사인 컬렉션으로 재생성)")
+
+    started = time.perf_counter()
+    index = export_from_chroma(collection, args.output, dtype=args.dtype)
+    elapsed = time.perf_counter() - started
+    size = index.vectors_path.stat().st_size if index.count() else 0
+    print(f"✅ {index.count()}개 벡터 (차원 {index.dim}, {index.dtype}) → {args.output} ({size / 1e6:.1f} MB, {elapsed:.2f}초)")
+
+
+if __name__ == "__main__":
+    main()
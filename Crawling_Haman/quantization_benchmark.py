@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+NumpyVectorIndex 양자화 저장 형식 비교 (float32 / float16 / int8, 재순위 유무)
+
+같은 벡터를 형식별 임시 인덱스로 복사한 뒤 같은 질의를 한 건씩 던져
+상주 메모리(질의 때 훑는 행렬), 디스크 크기, 질의 지연(p50/p95),
+float32 정확 검색 대비 recall@k를 표로 출력합니다. 양자화 행렬을 float32로 푸는
+비용은 호출마다 들기 때문에, 전체 질의를 한 번에 던졌을 때의 처리량(QPS)도 함께 잽니다
+(백엔드 검색 서비스처럼 마이크로 배치로 묶어 부르는 경우).
+
+    python quantization_benchmark.py --index vector_index          # 내보낸 실제 인덱스
+    python quantization_benchmark.py --synthetic 20000 --dim 768    # 모델/DB 없이
+
+질의는 인덱스의 임의 행에 잡음을 더해 만듭니다 (--noise, 차원당 표준편차 기준).
+--json을 주면 결과를 파일로도 남깁니다.
+"""
+
+import argparse
+import json
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from numpy_vector_index import DEFAULT_INDEX_DIR, DEFAULT_RERANK_FACTOR, NumpyVectorIndex, normalize_rows
+
+# (이름, dtype, rerank_factor)
+CONFIGS = [
+    ("float32", "float32", 0),
+    ("float16", "float16", 0),
+    ("float16+rerank", "float16", None),
+    ("int8", "int8", 0),
+    ("int8+rerank", "int8", None),
+]
+
+
+def synthetic_vectors(n, dim, clusters=64, seed=0):
+    """군집이 있는 임의 임베딩 (균일 난수는 모든 유사도가 비슷해 recall 비교가 무의미)"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    labels = rng.integers(0, clusters, size=n)
+    return (centers[labels] + rng.normal(scale=0.7, size=(n, dim))).astype(np.float32)
+
+
+def make_queries(vectors, count, noise, seed=1):
+    rng = np.random.default_rng(seed)
+    picked = normalize_rows(vectors[rng.integers(0, len(vectors), size=count)])
+    scale = noise / np.sqrt(vectors.shape[1])
+    return normalize_rows(picked + rng.normal(scale=scale, size=picked.shape))
+
+
+def disk_bytes(path):
+    return sum(f.stat().st_size for f in Path(path).iterdir() if f.is_file())
+
+
+def run(vectors, queries, top_k, rerank_factor, workdir):
+    ids = [f"v{i}" for i in range(len(vectors))]
+    base = Path(workdir) / "float32"
+    NumpyVectorIndex(base, dtype="float32").upsert(ids, vectors)
+    exact = NumpyVectorIndex(base).query(queries, top_k, include=())['ids']
+
+    report = []
+    for name, dtype, factor in CONFIGS:
+        path = Path(workdir) / dtype
+        if not path.exists():
+            shutil.copytree(base, path)
+        index = NumpyVectorIndex(path, dtype=dtype,
+                                 rerank_factor=rerank_factor if factor is None else factor)
+        index.query(queries[:1], top_k)  # 페이지 캐시 예열
+        latencies = []
+        found = []
+        for query in queries:
+            started = time.perf_counter()
+            result = index.query([query], top_k, include=())
+            latencies.append(time.perf_counter() - started)
+            found.append(result['ids'][0])
+        started = time.perf_counter()
+        index.query(queries, top_k, include=())
+        batch_elapsed = time.perf_counter() - started
+        recall = np.mean([len(set(a) & set(b)) / len(b) for a, b in zip(found, exact) if b])
+        latencies.sort()
+        report.append({
+            "config": name,
+            "dtype": dtype,
+            "rerank_factor": index.rerank_factor if index.quantized else 0,
+            "resident_mb": index.scanned_bytes / 1e6,
+            "disk_mb": disk_bytes(path) / 1e6,
+            "p50_ms": latencies[len(latencies) // 2] * 1000,
+            "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000,
+            "batch_qps": len(queries) / batch_elapsed if batch_elapsed else None,
+            f"recall@{top_k}": float(recall),
+        })
+    return report
+
+
+def print_report(report, top_k):
+    recall_key = f"recall@{top_k}"
+    print(f"{'설정':<16}{'상주 MB':>10}{'디스크 MB':>11}{'p50 ms':>9}{'p95 ms':>9}{'배치 QPS':>10}{recall_key:>12}")
+    for row in report:
+        print(f"{row['config']:<16}{row['resident_mb']:>10.2f}{row['disk_mb']:>11.2f}"
+              f"{row['p50_ms']:>9.3f}{row['p95_ms']:>9.3f}{row['batch_qps']:>10.0f}{row[recall_key]:>12.4f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NumPy 벡터 인덱스 양자화 형식별 메모리/지연/recall 비교")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--index", type=Path, default=DEFAULT_INDEX_DIR, help="비교할 NumpyVectorIndex 디렉토리")
+    source.add_argument("--synthetic", type=int, metavar="N", help="실제 인덱스 대신 임의 벡터 N개")
+    parser.add_argument("--dim", type=int, default=768, help="--synthetic 벡터 차원")
+    parser.add_argument("--queries", type=int, default=200, help="질의 수")
+    parser.add_argument("--noise", type=float, default=0.5, help="질의 잡음 크기")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--rerank-factor", type=int, default=DEFAULT_RERANK_FACTOR, help="재순위 후보 배수")
+    parser.add_argument("--json", type=Path, help="결과 JSON 경로")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        vectors = synthetic_vectors(args.synthetic, args.dim)
+        label = f"synthetic {args.synthetic}x{args.dim}"
+    else:
+        if not (args.index / 'records.json').exists():
+            raise SystemExit(f"❌ 인덱스가 없습니다: {args.index} (numpy_vector_index.py로 먼저 내보내거나 --synthetic)")
+        vectors = np.asarray(NumpyVectorIndex(args.index).get(include=['embeddings'])['embeddings'])
+        label = f"{args.index} {vectors.shape[0]}x{vectors.shape[1]}"
+    if not len(vectors):
+        raise SystemExit("❌ 벡터가 없습니다")
+
+    queries = make_queries(vectors, args.queries, args.noise)
+    print(f"📊 {label}, 질의 {len(queries)}개, top-{args.top_k}")
+    with tempfile.TemporaryDirectory(prefix="quant-bench-") as workdir:
+        report = run(vectors, queries, args.top_k, args.rerank_factor, workdir)
+    print_report(report, args.top_k)
+
+    if args.json:
+        args.json.write_text(json.dumps({"source": label, "queries": len(queries), "top_k": args.top_k,
+                                         "results": report}, ensure_ascii=False, indent=2), encoding='utf-8')
+        print(f"💾 {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+rag_documents 테이블 (원본 행 ↔ ChromaDB 부모 문서 ID 매핑) 읽기/쓰기
+
+임베딩 단계(Step 2 culture, Step 4 사이트맵)가 같은 테이블을
+(source_table, collection_name) 단위로 나눠 씁니다.
+새 원본 종류는 ensure_source_table()이 source_table ENUM에 값을 추가합니다.
+"""
+
+import re
+
+import pymysql
+
+
+def fetch_rag_documents(connection, source_table, collection_name):
+    """이미 임베딩된 문서 목록 (source_id → rag_documents 행)"""
+    with connection.cursor(pymysql.cursors.DictCursor) as cursor:
+        cursor.execute(
+            """
+                SELECT source_id, chroma_doc_id, embedding_model
+                FROM rag_documents
+                WHERE source_table = %s AND collection_name = %s
+            """,
+            (source_table, collection_name),
+        )
+        return {row['source_id']: row for row in cursor.fetchall()}
+
+
+def save_rag_documents(connection, source_table, collection_name, docs, model_name):
+    """docs: (source_id, chroma_doc_id) 목록"""
+    rows = [
+        (source_table, source_id, collection_name, doc_id, model_name)
+        for source_id, doc_id in docs
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            """
+                INSERT INTO rag_documents (source_table, source_id, collection_name, chroma_doc_id, embedding_model)
+                VALUES (%s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE chroma_doc_id = VALUES(chroma_doc_id), embedding_model = VALUES(embedding_model)
+            """,
+            rows,
+        )
+    connection.commit()
+
+
+def delete_rag_documents(connection, source_table, collection_name, source_ids=None):
+    """source_ids가 None이면 이 컬렉션의 매핑을 모두 삭제"""
+    with connection.cursor() as cursor:
+        sql = "DELETE FROM rag_documents WHERE source_table = %s AND collection_name = %s"
+        params = [source_table, collection_name]
+        if source_ids is not None:
+            if not source_ids:
+                return
+            sql += f" AND source_id IN ({', '.join(['%s'] * len(source_ids))})"
+            params.extend(source_ids)
+        cursor.execute(sql, params)
+    connection.commit()
+
+
+def ensure_source_table(connection, source_table):
+    """rag_documents.source_table ENUM에 값이 없으면 추가 (이미 있으면 아무것도 하지 않음)"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+                SELECT COLUMN_TYPE FROM information_schema.COLUMNS
+                WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'rag_documents' AND COLUMN_NAME = 'source_table'
+            """
+        )
+        row = cursor.fetchone()
+        if row is None:
+            raise RuntimeError("rag_documents 테이블이 없습니다 (Hometown_on.sql로 먼저 생성)")
+        values = [value.replace("''", "'") for value in re.findall(r"'((?:[^']|'')*)'", row[0])]
+        if source_table in values:
+            return False
+        values.append(source_table)
+        enum = ", ".join(connection.escape(value) for value in values)
+        cursor.execute(f"ALTER TABLE rag_documents MODIFY source_table ENUM({enum}) NOT NULL")
+    connection.commit()
+    return True
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+함안 culture 코퍼스 검색 품질/지연 벤치마크
+
+정답이 달린 질의 세트(retrieval_queries.jsonl)로 임베딩 모델(EMBEDDING_MODELS) x
+검색 백엔드(chroma, numpy, numpy-int8) 조합마다 다음을 재고 JSON 리포트로 남깁니다.
+
+- recall@k (k=1,5,10): 정답 문서 중 상위 k개 안에 든 비율의 질의 평균
+- MRR: 첫 정답 순위의 역수 평균 (최대 k 밖이면 0)
+- 질의 인코딩 지연 p50/p95, 검색 지연 p50/p95 (한 건씩)
+- QPS: 한 건씩 인코딩+검색, 그리고 전체 질의를 한 번에 배치로 던졌을 때
+
+코퍼스는 Step 2가 만든 ChromaDB 컬렉션의 청크(문서+메타데이터)를 그대로 가져와
+모델마다 다시 임베딩하고(embedding_cache로 재실행 시 생략), 백엔드마다 임시 저장소에
+넣어 같은 조건에서 비교합니다. 검색은 culture_search.query_collection과 같은 경로
+(청크 over-fetch 후 mysql_id별 병합)를 씁니다.
+
+    python retrieval_benchmark.py -o report.json
+    python retrieval_benchmark.py --models jhgan/ko-sroberta-multitask --backends numpy
+    python retrieval_benchmark.py -o new.json --baseline report.json   # 회귀 시 종료 코드 1
+
+질의 파일 형식 (JSONL):
+    {"id": "p01", "query": "...", "expected": ["이방실"], "category": "인물"(선택)}
+expected는 culture 제목(공백 정리 후 비교) 또는 "culture_{id}"이며, 제목은 컬렉션
+메타데이터로 culture_{mysql_id}에 매핑됩니다 (MySQL id는 적재 순서에 따라 달라지므로).
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import chromadb
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+from culture_search import (
+    CHROMA_COLLECTION_NAME, CHROMA_PERSIST_DIR, EMBEDDING_MODELS, open_collection, query_collection,
+)
+from embedding_cache import EmbeddingCache
+from numpy_vector_index import CHROMA_COLLECTION_METADATA, NumpyVectorIndex
+
+DEFAULT_QUERIES = Path(__file__).parent / "retrieval_queries.jsonl"
+BACKENDS = ("chroma", "numpy", "numpy-int8")
+DEFAULT_KS = (1, 5, 10)
+ENCODE_BATCH_SIZE = 32
+# Chroma 한 번의 add 상한보다 작게
+CHROMA_ADD_BATCH = 1000
+
+# --baseline 비교 기준
+QUALITY_TOLERANCE = 0.02
+LATENCY_TOLERANCE = 1.5
+
+
+def normalize_title(title):
+    return ' '.join((title or '').split())
+
+
+def doc_key(mysql_id):
+    return f"culture_{mysql_id}"
+
+
+def load_queries(path):
+    queries = []
+    with open(path, encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if not record.get('query') or not record.get('expected'):
+                raise ValueError(f"{path}:{line_no}: query와 expected가 필요합니다")
+            record.setdefault('id', line_no)
+            queries.append(record)
+    return queries
+
+
+def load_corpus(collection):
+    """컬렉션의 청크 전체 (ids, documents, metadatas)"""
+    ids, documents, metadatas = [], [], []
+    total = collection.count()
+    for offset in range(0, total, CHROMA_ADD_BATCH):
+        batch = collection.get(limit=CHROMA_ADD_BATCH, offset=offset, include=['documents', 'metadatas'])
+        ids.extend(batch['ids'])
+        documents.extend(batch['documents'])
+        metadatas.extend(batch['metadatas'])
+    return ids, documents, metadatas
+
+
+def resolve_expected(queries, metadatas):
+    """expected 제목 → culture_{mysql_id}. 코퍼스에 없는 정답은 경고 후 제외"""
+    by_title = {}
+    for metadata in metadatas:
+        by_title.setdefault(normalize_title(metadata.get('title')), doc_key(metadata.get('mysql_id')))
+    known = set(by_title.values())
+    resolved = []
+    for query in queries:
+        keys = []
+        for label in query['expected']:
+            key = label if label.startswith('culture_') else by_title.get(normalize_title(label))
+            if key is None or key not in known:
+                print(f"⚠️  [{query['id']}] 코퍼스에 없는 정답: {label}", file=sys.stderr)
+                continue
+            keys.append(key)
+        if keys:
+            resolved.append({**query, 'expected_keys': keys})
+    return resolved
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def score_rankings(queries, rankings, ks):
+    """질의별 순위 목록 → recall@k, MRR, 질의별 세부"""
+    max_k = max(ks)
+    recalls = {k: [] for k in ks}
+    reciprocal_ranks = []
+    details = []
+    for query, ranking in zip(queries, rankings):
+        expected = set(query['expected_keys'])
+        for k in ks:
+            recalls[k].append(len(expected & set(ranking[:k])) / len(expected))
+        first = next((rank for rank, key in enumerate(ranking[:max_k], 1) if key in expected), None)
+        reciprocal_ranks.append(1.0 / first if first else 0.0)
+        details.append({"id": query['id'], "first_relevant_rank": first, "top": ranking[:3]})
+    metrics = {f"recall@{k}": float(np.mean(values)) for k, values in recalls.items()}
+    metrics["mrr"] = float(np.mean(reciprocal_ranks))
+    return metrics, details
+
+
+def build_backend(backend, workdir, ids, embeddings, documents, metadatas):
+    if backend == "chroma":
+        client = chromadb.PersistentClient(path=str(workdir / "chroma"))
+        store = client.get_or_create_collection(name="retrieval_benchmark", metadata=CHROMA_COLLECTION_METADATA)
+        for start in range(0, len(ids), CHROMA_ADD_BATCH):
+            end = start + CHROMA_ADD_BATCH
+            store.add(ids=ids[start:end], embeddings=embeddings[start:end].tolist(),
+                      documents=documents[start:end], metadatas=metadatas[start:end])
+        return store
+    dtype = "int8" if backend == "numpy-int8" else "float32"
+    store = NumpyVectorIndex(workdir / backend, dtype=dtype)
+    store.upsert(ids, embeddings, documents, metadatas)
+    return store
+
+
+def ranking_of(results, q):
+    return [doc_key((metadata or {}).get('mysql_id')) for metadata in results['metadatas'][q]]
+
+
+def run_backend(store, model, queries, ks):
+    max_k = max(ks)
+    texts = [query['query'] for query in queries]
+    model.encode(texts[:1], show_progress_bar=False)  # 예열
+
+    encode_times, search_times, rankings = [], [], []
+    started = time.perf_counter()
+    for query in queries:
+        t0 = time.perf_counter()
+        embedding = model.encode([query['query']], show_progress_bar=False)
+        t1 = time.perf_counter()
+        where = {"category": query['category']} if query.get('category') else None
+        results = query_collection(store, embedding.tolist(), max_k, where)
+        t2 = time.perf_counter()
+        encode_times.append(t1 - t0)
+        search_times.append(t2 - t1)
+        rankings.append(ranking_of(results, 0))
+    sequential_elapsed = time.perf_counter() - started
+
+    # 필터 없는 질의를 한 번에 (culture_search.search_many / 백엔드 마이크로 배치와 같은 방식)
+    unfiltered = [query['query'] for query in queries if not query.get('category')]
+    started = time.perf_counter()
+    if unfiltered:
+        embeddings = model.encode(unfiltered, batch_size=ENCODE_BATCH_SIZE, show_progress_bar=False)
+        query_collection(store, embeddings.tolist(), max_k)
+    batch_elapsed = time.perf_counter() - started
+
+    metrics, details = score_rankings(queries, rankings, ks)
+    metrics.update({
+        "encode_ms_p50": percentile(encode_times, 50) * 1000,
+        "encode_ms_p95": percentile(encode_times, 95) * 1000,
+        "query_ms_p50": percentile(search_times, 50) * 1000,
+        "query_ms_p95": percentile(search_times, 95) * 1000,
+        "qps": len(queries) / sequential_elapsed,
+        "batch_qps": len(unfiltered) / batch_elapsed if unfiltered and batch_elapsed else None,
+    })
+    return metrics, details
+
+
+def benchmark_model(model_name, backends, corpus, queries, ks, workdir):
+    ids, documents, metadatas = corpus
+    try:
+        model = SentenceTransformer(model_name)
+    except Exception as e:
+        print(f"⚠️  모델 로드 실패: {model_name} - {e}", file=sys.stderr)
+        return [{"model": model_name, "backend": backend, "error": str(e)} for backend in backends]
+
+    started = time.perf_counter()
+    with EmbeddingCache(model_name) as cache:
+        embeddings = cache.encode(
+            documents, lambda batch: model.encode(batch, batch_size=ENCODE_BATCH_SIZE, show_progress_bar=False)
+        )
+    corpus_seconds = time.perf_counter() - started
+    print(f"🤖 {model_name}: 청크 {len(documents)}개 임베딩 {corpus_seconds:.1f}초 (캐시 포함)", file=sys.stderr)
+
+    runs = []
+    model_dir = Path(workdir) / model_name.replace('/', '_')
+    for backend in backends:
+        store = build_backend(backend, model_dir, ids, np.asarray(embeddings, dtype=np.float32), documents, metadatas)
+        metrics, details = run_backend(store, model, queries, ks)
+        runs.append({"model": model_name, "backend": backend, "dim": int(np.asarray(embeddings).shape[1]),
+                     "corpus_encode_seconds": corpus_seconds, **metrics, "queries": details})
+        print(f"   {backend:<11} MRR {metrics['mrr']:.3f}  recall@{max(ks)} {metrics[f'recall@{max(ks)}']:.3f}  "
+              f"검색 p50 {metrics['query_ms_p50']:.2f}ms  {metrics['qps']:.1f} q/s", file=sys.stderr)
+    return runs
+
+
+def compare_to_baseline(report, baseline, ks):
+    """같은 (model, backend)끼리 품질 하락과 지연 증가를 찾음 → (회귀, 경고) 목록"""
+    previous = {(run['model'], run['backend']): run for run in baseline.get('runs', []) if 'error' not in run}
+    regressions, warnings = [], []
+    for run in report['runs']:
+        old = previous.get((run['model'], run['backend']))
+        if old is None or 'error' in run:
+            continue
+        label = f"{run['model']} / {run['backend']}"
+        for metric in [f"recall@{k}" for k in ks] + ["mrr"]:
+            if metric in old and run[metric] < old[metric] - QUALITY_TOLERANCE:
+                regressions.append(f"{label}: {metric} {old[metric]:.3f} → {run[metric]:.3f}")
+        for metric in ("encode_ms_p95", "query_ms_p95"):
+            if old.get(metric) and run[metric] > old[metric] * LATENCY_TOLERANCE:
+                warnings.append(f"{label}: {metric} {old[metric]:.2f} → {run[metric]:.2f}")
+    return regressions, warnings
+
+
+def print_summary(report, ks):
+    recall_cols = [f"recall@{k}" for k in ks]
+    header = f"{'모델':<46}{'백엔드':<12}" + ''.join(f"{col:>11}" for col in recall_cols) + \
+        f"{'MRR':>8}{'인코딩p50':>10}{'검색p50':>9}{'QPS':>8}"
+    print(header, file=sys.stderr)
+    for run in report['runs']:
+        if 'error' in run:
+            print(f"{run['model']:<46}{run['backend']:<12}실패: {run['error']}", file=sys.stderr)
+            continue
+        print(f"{run['model']:<46}{run['backend']:<12}" + ''.join(f"{run[col]:>11.3f}" for col in recall_cols) +
+              f"{run['mrr']:>8.3f}{run['encode_ms_p50']:>10.2f}{run['query_ms_p50']:>9.2f}{run['qps']:>8.1f}",
+              file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="culture 검색 품질(recall@k, MRR)과 지연/QPS 벤치마크")
+    parser.add_argument("--queries", type=Path, default=DEFAULT_QUERIES, help="정답이 달린 질의 JSONL")
+    parser.add_argument("--models", nargs='+', default=EMBEDDING_MODELS, help="비교할 임베딩 모델")
+    parser.add_argument("--backends", nargs='+', choices=BACKENDS, default=list(BACKENDS), help="비교할 검색 백엔드")
+    parser.add_argument("--k", type=int, nargs='+', default=list(DEFAULT_KS), help="recall@k의 k 목록")
+    parser.add_argument("--chroma-dir", type=Path, default=CHROMA_PERSIST_DIR, help="코퍼스를 읽을 ChromaDB 디렉토리")
+    parser.add_argument("-o", "--output", type=Path, help="리포트 JSON 경로 (기본: 표준 출력)")
+    parser.add_argument("--baseline", type=Path, help="비교할 이전 리포트 (품질 회귀 시 종료 코드 1)")
+    args = parser.parse_args()
+    ks = sorted(set(args.k))
+
+    corpus = load_corpus(open_collection(args.chroma_dir, CHROMA_COLLECTION_NAME))
+    queries = resolve_expected(load_queries(args.queries), corpus[2])
+    documents = {doc_key(metadata.get('mysql_id')) for metadata in corpus[2]}
+    print(f"📚 청크 {len(corpus[0])}개 (문서 {len(documents)}개), 질의 {len(queries)}개", file=sys.stderr)
+    if not queries:
+        raise SystemExit("❌ 정답을 코퍼스에서 찾을 수 있는 질의가 없습니다")
+
+    report = {
+        "created_at": datetime.now().isoformat(timespec='seconds'),
+        "queries_file": str(args.queries),
+        "corpus": {"chunks": len(corpus[0]), "documents": len(documents)},
+        "queries": len(queries),
+        "k": ks,
+        "runs": [],
+    }
+    with tempfile.TemporaryDirectory(prefix="retrieval-bench-") as workdir:
+        for model_name in args.models:
+            report['runs'].extend(benchmark_model(model_name, args.backends, corpus, queries, ks, workdir))
+
+    print_summary(report, ks)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        args.output.write_text(text, encoding='utf-8')
+        print(f"💾 {args.output}", file=sys.stderr)
+    else:
+        print(text)
+
+    if args.baseline:
+        regressions, warnings = compare_to_baseline(report, json.loads(args.baseline.read_text(encoding='utf-8')), ks)
+        for warning in warnings:
+            print(f"⚠️  지연 증가: {warning}", file=sys.stderr)
+        for regression in regressions:
+            print(f"❌ 품질 회귀: {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print("✅ 기준 리포트 대비 품질 회귀 없음", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
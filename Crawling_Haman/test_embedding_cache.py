@@ -0,0 +1,48 @@
+import numpy as np
+
+from embedding_cache import EmbeddingCache, text_key
+
+DIM = 4
+
+
+def make_cache(tmp_path, rows=10):
+    return EmbeddingCache('test-model', cache_dir=tmp_path, max_mb=rows * DIM * 4 / (1024 * 1024))
+
+
+def rows_in_use(cache):
+    return cache.used - len(cache.free)
+
+
+def test_add_existing_key_reuses_its_row(tmp_path):
+    cache = make_cache(tmp_path)
+    keys = [text_key(text) for text in ("가", "나", "다")]
+    cache.add(keys, np.ones((3, DIM)))
+    cache.add(keys[:1], np.full((1, DIM), 2.0))
+
+    assert len(cache.rows) == 3
+    assert len(cache.rows) == rows_in_use(cache)
+    _, hits, missing = cache.lookup(["가"])
+    assert not missing
+    assert np.allclose(hits[keys[0]], 2.0)
+
+
+def test_repeated_adds_do_not_fill_the_cache(tmp_path):
+    cache = make_cache(tmp_path, rows=10)
+    keys = [text_key(text) for text in ("가", "나", "다")]
+    cache.add(keys, np.ones((3, DIM)))
+    for i in range(20):
+        cache.add(keys[:1], np.full((1, DIM), float(i)))
+
+    assert len(cache.rows) == 3
+    assert len(cache.rows) == rows_in_use(cache)
+    assert cache.stats['evicted'] == 0
+
+
+def test_duplicate_keys_in_one_batch_take_one_row(tmp_path):
+    cache = make_cache(tmp_path)
+    key = text_key("가")
+    cache.add([key, key], np.stack([np.ones(DIM), np.full(DIM, 3.0)]))
+
+    assert len(cache.rows) == 1 == rows_in_use(cache)
+    _, hits, _ = cache.lookup(["가"])
+    assert np.allclose(hits[key], 3.0)
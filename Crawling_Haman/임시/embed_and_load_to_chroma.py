@@ -3,6 +3,11 @@ import pymysql
 import chromadb
 from sentence_transformers import SentenceTransformer
 import os
+import sys
+
+# 상위 폴더(Crawling_Haman)의 임베딩 캐시를 함께 사용
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from embedding_cache import EmbeddingCache  # noqa: E402
 
 # --- 설정 ---
 # MySQL DB 정보
@@ -91,7 +96,8 @@ def embed_and_load_to_chroma():
 
     # 텍스트 임베딩 실행 (리스트 전체를 한 번에 처리하여 속도 향상)
     print("텍스트를 벡터로 변환 중입니다... (데이터 양에 따라 시간이 걸릴 수 있습니다)")
-    embeddings = model.encode(documents, show_progress_bar=True)
+    with EmbeddingCache(EMBEDDING_MODEL) as cache:
+        embeddings = cache.encode(documents, lambda docs: model.encode(docs, show_progress_bar=True))
     print("텍스트 벡터 변환 완료.")
 
     # ChromaDB 컬렉션에 데이터 추가
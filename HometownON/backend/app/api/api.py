@@ -2,10 +2,11 @@ from fastapi import APIRouter
 
 from fastapi import APIRouter
 
-from .endpoints import users, chat
+from .endpoints import users, chat, search
 
 api_router = APIRouter()
 
 api_router.include_router(users.router, prefix="/users", tags=["Users"])
 api_router.include_router(chat.router, prefix="/chatbot", tags=["Chatbot"])
+api_router.include_router(search.router, prefix="/search", tags=["Search"])
 
@@ -1,74 +1,234 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
-from openai import OpenAI
-import asyncio
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
 
 from ... import crud
 from ...schemas import schemas
-from ...core.database import get_db
+from ...core.database import AsyncSessionLocal, SessionLocal
 from ...core.config import settings
+from ...core import security
+from ...services.chat_writer import chat_writer
+from ...services.chat_history import build_prompt_history, chat_history_cache, count_tokens
+from ...services.response_cache import replay_answer, response_cache
+from ...services.llm_gateway import LLMBusyError, LLMGateway, LLMStream
+from ...services.openai_client import get_openai_client
 
 router = APIRouter()
 
-client = OpenAI(api_key=settings.OPENAI_API_KEY)
+gateway = LLMGateway(
+    max_concurrency=settings.LLM_MAX_CONCURRENCY,
+    per_user_concurrency=settings.LLM_PER_USER_CONCURRENCY,
+    max_queue=settings.LLM_MAX_QUEUE,
+    queue_timeout=settings.LLM_QUEUE_TIMEOUT,
+    max_retries=settings.LLM_MAX_RETRIES,
+)
 
 class ChatRequest(schemas.BaseModel):
     session_id: int | None = None
     message: str
 
-async def stream_openai_response(session_id: int, history: list, db: Session):
-    """Async generator to stream responses from OpenAI and save the full response."""
-    stream = client.chat.completions.create(
-        model="gpt-4o",
-        messages=history,
-        stream=True,
-    )
-    
-    full_response = ""
-    for chunk in stream:
-        content = chunk.choices[0].delta.content or ""
-        full_response += content
-        yield content
-        await asyncio.sleep(0) # Yield control to the event loop
-
-    # Save the assistant's full response to the database
-    crud.crud_chat.add_chat_message(
-        db=db, session_id=session_id, role="assistant", content=full_response
-    )
+def load_chat_context(session_id: int | None) -> tuple[int, list[dict], int] | None:
+    """
+    Resolve (or create) the chat session and load its history.
+
+    Returns (session_id, recent messages, stored message count). Runs in the
+    threadpool on its own short-lived session; returns None when the requested
+    session does not exist.
+    """
+    with SessionLocal() as db:
+        # If a session_id is provided, verify it exists.
+        if session_id is not None:
+            if not crud.crud_chat.get_chat_session(db=db, session_id=session_id):
+                return None
+            db_messages = crud.crud_chat.get_chat_messages(
+                db=db, session_id=session_id, limit=settings.CHAT_HISTORY_MAX_MESSAGES
+            )
+            total = len(db_messages)
+            if total == settings.CHAT_HISTORY_MAX_MESSAGES:
+                total = crud.crud_chat.count_chat_messages(db=db, session_id=session_id)
+        # If no session_id is provided, create a new session.
+        else:
+            # In a real app, you'd associate the session with the logged-in user
+            session_id = crud.crud_chat.create_chat_session(db=db).id
+            db_messages = []
+            total = 0
+
+        history = [
+            {"role": msg.role, "content": msg.content, "tokens": msg.tokens} for msg in db_messages
+        ]
+    return session_id, history, total
+
+def save_user_message(session_id: int, message: dict):
+    """Hand a user message to the history cache and the background writer."""
+    chat_history_cache.append(session_id, message)
+    chat_writer.enqueue(session_id=session_id, **message)
+
+def save_assistant_message(session_id: int, content: str):
+    """Hand an assistant reply to the history cache and the background writer."""
+    message = {"role": "assistant", "content": content, "tokens": count_tokens(content)}
+    chat_history_cache.append(session_id, message)
+    chat_writer.enqueue(session_id=session_id, **message)
+
+async def load_chat_context_async(session_id: int | None) -> tuple[int, list[dict], int] | None:
+    """`load_chat_context` on the async engine (settings.DB_ASYNC)."""
+    async with AsyncSessionLocal() as db:
+        if session_id is not None:
+            if not await crud.crud_chat.get_chat_session_async(db=db, session_id=session_id):
+                return None
+            db_messages = await crud.crud_chat.get_chat_messages_async(
+                db=db, session_id=session_id, limit=settings.CHAT_HISTORY_MAX_MESSAGES
+            )
+            total = len(db_messages)
+            if total == settings.CHAT_HISTORY_MAX_MESSAGES:
+                total = await crud.crud_chat.count_chat_messages_async(db=db, session_id=session_id)
+        else:
+            session_id = (await crud.crud_chat.create_chat_session_async(db=db)).id
+            db_messages = []
+            total = 0
+
+        history = [
+            {"role": msg.role, "content": msg.content, "tokens": msg.tokens} for msg in db_messages
+        ]
+    return session_id, history, total
+
+def count_stored_messages(session_id: int) -> int:
+    with SessionLocal() as db:
+        return crud.crud_chat.count_chat_messages(db=db, session_id=session_id)
+
+async def count_stored_messages_async(session_id: int) -> int:
+    async with AsyncSessionLocal() as db:
+        return await crud.crud_chat.count_chat_messages_async(db=db, session_id=session_id)
+
+async def cached_history(session_id: int) -> tuple[list[dict], int] | None:
+    """
+    Cached messages of a session, or None when the cache misses or is stale.
+
+    Another worker may have added turns since this worker cached the session;
+    the cached total must equal the stored count plus this worker's unwritten
+    messages. A writer commit racing the check only causes a reload.
+    """
+    cached = chat_history_cache.get(session_id)
+    if cached is None:
+        return None
+    if settings.DB_ASYNC:
+        stored = await count_stored_messages_async(session_id)
+    else:
+        stored = await run_in_threadpool(count_stored_messages, session_id)
+    if cached[1] != stored + len(chat_writer.pending(session_id)):
+        return None
+    return cached
+
+async def stream_openai_response(request: Request, session_id: int, stream: LLMStream,
+                                 cache_prompt: str | None = None, cache_embedding=None):
+    """Async generator to stream responses from OpenAI and save the full response.
+
+    The upstream stream is closed as soon as the client disconnects, so an
+    abandoned chat stops consuming tokens and frees its connection. When
+    `cache_prompt` is given, a completed answer is stored in the response cache.
+    """
+    parts = []
+    completed = False
+    try:
+        async for chunk in stream:
+            if await request.is_disconnected():
+                break
+            if not chunk.choices:
+                continue
+            content = chunk.choices[0].delta.content or ""
+            parts.append(content)
+            yield content
+        else:
+            completed = True
+    finally:
+        await stream.aclose()
+
+    full_response = "".join(parts)
+    if not full_response:
+        return
+
+    save_assistant_message(session_id, full_response)
+    if completed and cache_prompt is not None:
+        response_cache.store(cache_prompt, full_response, cache_embedding)
+
+async def stream_cached_response(session_id: int, answer: str):
+    """Replay a cached answer without calling the upstream LLM."""
+    async for chunk in replay_answer(answer):
+        yield chunk
+    save_assistant_message(session_id, answer)
 
 @router.post("/chat", response_class=StreamingResponse)
-async def chat_endpoint(request: ChatRequest, db: Session = Depends(get_db)):
+async def chat_endpoint(request: ChatRequest, http_request: Request):
     session_id = request.session_id
+    cached = await cached_history(session_id) if session_id is not None else None
+    messages = cached[0] if cached is not None else None
 
-    # If a session_id is provided, verify it exists.
-    if session_id is not None:
-        chat_session = crud.crud_chat.get_chat_session(db=db, session_id=session_id)
-        if not chat_session:
+    # Cache miss (or stale entry): verify/create the session and load its history from MySQL
+    if messages is None:
+        if settings.DB_ASYNC:
+            context = await load_chat_context_async(session_id)
+        else:
+            context = await run_in_threadpool(load_chat_context, session_id)
+        if context is None:
             raise HTTPException(
                 status_code=404, 
                 detail=f"Chat session with id {session_id} not found."
             )
-    # If no session_id is provided, create a new session.
-    else:
-        # In a real app, you'd associate the session with the logged-in user
-        chat_session = crud.crud_chat.create_chat_session(db=db)
-        session_id = chat_session.id
+        session_id, messages, total = context
 
-    # Save user message
-    crud.crud_chat.add_chat_message(
-        db=db, session_id=session_id, role="user", content=request.message
-    )
+        # Messages of earlier turns may still be waiting in the writer queue
+        pending = chat_writer.pending(session_id)
+        messages += pending
+        chat_history_cache.put(session_id, messages, total + len(pending))
+
+    message = {"role": "user", "content": request.message, "tokens": count_tokens(request.message)}
+    cache_prompt = cache_embedding = None
 
-    # Get conversation history
-    db_messages = crud.crud_chat.get_chat_messages(db=db, session_id=session_id)
-    
-    # Format for OpenAI API
-    history = [
-        {"role": msg.role, "content": msg.content} for msg in db_messages
-    ]
+    # Only first-turn questions are cached; later answers depend on the conversation.
+    if settings.RESPONSE_CACHE_ENABLED and not messages:
+        answer, cache_embedding = await response_cache.lookup(request.message)
+        if answer is not None:
+            save_user_message(session_id, message)
+            return StreamingResponse(
+                stream_cached_response(session_id, answer),
+                media_type="text/event-stream"
+            )
+        cache_prompt = request.message
+        history = [{"role": "user", "content": request.message}]
+    else:
+        history = build_prompt_history(messages + [message], settings.CHAT_HISTORY_TOKEN_BUDGET)
 
+    # The per-user limit is keyed on the logged-in user when a valid access token
+    # is sent. Anonymous chat falls back to the session, which bounds one
+    # conversation but not a client that opens a new session per message. The
+    # client address is not used: behind nginx every request comes from the proxy.
+    subject = security.token_subject(http_request.headers.get("authorization"))
+    user_key = f"user:{subject}" if subject else f"session:{session_id}"
+    try:
+        # The async client keeps a pooled HTTP connection per upstream stream, so
+        # reading tokens never blocks the event loop for other requests.
+        stream = await gateway.open_stream(get_openai_client(), user_key=user_key, model="gpt-4o", messages=history)
+    except LLMBusyError as e:
+        raise HTTPException(
+            status_code=503,
+            detail="The chatbot is busy, please try again shortly.",
+            headers={"Retry-After": str(int(e.retry_after))},
+        )
+
+    save_user_message(session_id, message)
     return StreamingResponse(
-        stream_openai_response(session_id, history, db),
-        media_type="text/event-stream"
+        stream_openai_response(http_request, session_id, stream, cache_prompt, cache_embedding),
+        media_type="text/event-stream",
+        # Releases the LLM slot even if the client leaves before streaming starts
+        background=BackgroundTask(stream.aclose),
     )
+
+@router.get("/cache/stats")
+async def response_cache_stats():
+    """Hit-rate and size metrics of the chatbot response cache."""
+    return response_cache.metrics()
+
+@router.get("/llm/stats")
+async def llm_gateway_stats():
+    """Queue depth, concurrency and latency metrics of the LLM gateway."""
+    return gateway.metrics()
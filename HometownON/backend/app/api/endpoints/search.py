@@ -0,0 +1,51 @@
+from typing import Literal
+
+from fastapi import APIRouter, HTTPException, Query, status
+
+from ...schemas import schemas
+from ...core.config import settings
+from ...services.culture_search import SearchUnavailable, culture_search
+from ...services.hybrid_search import hybrid_search
+
+router = APIRouter()
+
+@router.get("/culture", response_model=schemas.CultureSearchResponse)
+async def search_culture(
+    q: str = Query(..., min_length=1, max_length=500),
+    top_k: int = Query(5, ge=1, le=settings.SEARCH_MAX_TOP_K),
+    category: str | None = None,
+):
+    """Semantic search over 인물/전설 stories; concurrent calls are micro-batched."""
+    if not settings.SEARCH_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Search is disabled")
+    try:
+        results = await culture_search.search(q, top_k=top_k, category=category)
+    except SearchUnavailable as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    return {"query": q, "results": results}
+
+@router.get("/stats")
+async def culture_search_stats():
+    """Micro-batch sizes, latency and readiness of the culture search service."""
+    return culture_search.metrics()
+
+@router.get("/hybrid", response_model=schemas.HybridSearchResponse)
+async def search_hybrid(
+    q: str = Query(..., min_length=1, max_length=500),
+    top_k: int = Query(10, ge=1, le=settings.SEARCH_MAX_TOP_K),
+    sources: list[Literal["culture", "locations"]] = Query(["culture", "locations"]),
+    mode: Literal["hybrid", "lexical"] = "hybrid",
+):
+    """
+    Name-aware search over culture stories and locations: n-gram BM25 fused with
+    vector similarity (reciprocal rank fusion). `mode=lexical` skips the model.
+    """
+    if not settings.HYBRID_SEARCH_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Search is disabled")
+    results = await hybrid_search.search(q, top_k=top_k, sources=tuple(sources), use_vectors=mode == "hybrid")
+    return {"query": q, "results": results}
+
+@router.get("/hybrid/stats")
+async def hybrid_search_stats():
+    """Lexical index size, refresh state and query counters."""
+    return hybrid_search.metrics()
@@ -1,51 +1,83 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
 
 from ... import crud, models, schemas
 from ...core import security
-from ...core.database import get_db
+from ...core.config import settings
+from ...core.database import get_db_session
+from ...services.password_service import PasswordServiceBusy, password_service
 
 router = APIRouter()
 
 class UserSignupRequest(schemas.UserCreate):
     profile: schemas.UserProfileCreate
 
+def email_already_registered():
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Email already registered",
+    )
+
+def incorrect_credentials():
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Incorrect email or password",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+def auth_busy(e: PasswordServiceBusy):
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many sign-in requests, please try again shortly.",
+        headers={"Retry-After": str(int(e.retry_after))},
+    )
+
 @router.post("/signup", response_model=schemas.UserWithProfile, status_code=status.HTTP_201_CREATED)
-def create_user_with_profile(request: UserSignupRequest, db: Session = Depends(get_db)):
+async def create_user_with_profile(request: UserSignupRequest, db=Depends(get_db_session)):
     """
     Create a new user and their profile.
     """
-    db_user = crud.crud_user.get_user_by_email(db, email=request.email)
-    if db_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered",
-        )
-    
-    # Create user
-    user = crud.crud_user.create_user(db=db, user=schemas.UserCreate(email=request.email, password=request.password, phone=request.phone))
-    
-    # Create user profile
-    profile = crud.crud_user.create_user_profile(db=db, user_id=user.id, profile=request.profile)
-    
-    # Combine and return
-    user_with_profile = schemas.UserWithProfile(
-        **user.__dict__,
-        profile=profile
-    )
-    return user_with_profile
+    try:
+        hashed_password = await password_service.hash(request.password)
+    except PasswordServiceBusy as e:
+        raise auth_busy(e)
+    user = schemas.UserCreate(email=request.email, password=request.password, phone=request.phone)
+    try:
+        if settings.DB_ASYNC:
+            return await crud.crud_user.create_user_with_profile_async(db, user, hashed_password, request.profile)
+        return await run_in_threadpool(crud.crud_user.create_user_with_profile, db, user, hashed_password, request.profile)
+    except IntegrityError:
+        # users.email is unique; no separate lookup is needed
+        raise email_already_registered()
 
 @router.post("/login", response_model=schemas.Token)
-def login_for_access_token(form_data: schemas.UserCreate, db: Session = Depends(get_db)):
+async def login_for_access_token(form_data: schemas.UserCreate, db=Depends(get_db_session)):
     """
     Authenticate user and return JWT token.
     """
-    user = crud.crud_user.get_user_by_email(db, email=form_data.email)
-    if not user or not security.verify_password(form_data.password, user.password_hash):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect email or password",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+    if settings.DB_ASYNC:
+        user = await crud.crud_user.get_user_by_email_async(db, email=form_data.email)
+    else:
+        user = await run_in_threadpool(crud.crud_user.get_user_by_email, db, email=form_data.email)
+    if not user:
+        raise incorrect_credentials()
+    try:
+        verified, new_hash = await password_service.verify_and_update(form_data.password, user.password_hash)
+    except PasswordServiceBusy as e:
+        raise auth_busy(e)
+    if not verified:
+        raise incorrect_credentials()
+    if new_hash:
+        # The bcrypt cost changed since this hash was made; upgrade it transparently
+        if settings.DB_ASYNC:
+            await crud.crud_user.update_user_password_hash_async(db, user, new_hash)
+        else:
+            await run_in_threadpool(crud.crud_user.update_user_password_hash, db, user, new_hash)
     access_token = security.create_access_token(subject=user.email)
     return {"access_token": access_token, "token_type": "bearer"}
+
+@router.get("/auth/stats")
+async def password_service_stats():
+    """Queue wait and worker metrics of the password hashing pool."""
+    return password_service.metrics()
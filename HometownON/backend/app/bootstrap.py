@@ -0,0 +1,25 @@
+"""
+Create the database schema.
+
+The app no longer creates tables when it starts, so run this once per
+database (and after adding models) before starting the API:
+
+    python -m app.bootstrap
+"""
+import logging
+
+from .core.database import engine
+from .models import models
+
+logger = logging.getLogger(__name__)
+
+
+def create_schema(bind=engine):
+    """Create every table that does not exist yet (existing tables are left untouched)."""
+    models.Base.metadata.create_all(bind=bind)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    create_schema()
+    logger.info("Schema is up to date (%d tables)", len(models.Base.metadata.tables))
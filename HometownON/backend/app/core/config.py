@@ -10,11 +10,82 @@ class Settings(BaseSettings):
     mysql_user: str
     mysql_password: str
     mysql_database: str
+    # Full SQLAlchemy URL; overrides the mysql_* values (e.g. SQLite for offline benchmarks)
+    DATABASE_URL: str | None = None
+
+    # Sync engine connection pool; timeout/pre-ping/recycle also apply to the async engine
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE: int = 1800  # seconds; below MySQL's wait_timeout
+
+    # Opt-in AsyncSession over an async driver (aiomysql / aiosqlite)
+    DB_ASYNC: bool = False
+    ASYNC_DATABASE_URL: str | None = None
+    # The async engine has its own pool next to the sync one (still used by the chat
+    # writer and sync endpoints), so a worker may open up to both pools' maximums
+    DB_ASYNC_POOL_SIZE: int = 10
+    DB_ASYNC_MAX_OVERFLOW: int = 10
+
+    # Create missing tables during app startup (local development only);
+    # deployments run `python -m app.bootstrap` once instead.
+    DB_CREATE_SCHEMA_ON_STARTUP: bool = False
 
     # ChromaDB
     CHROMA_HOST: str = "localhost"
     CHROMA_PORT: int = 8000
 
+    # Upstream LLM gateway
+    LLM_MAX_CONCURRENCY: int = 32
+    LLM_PER_USER_CONCURRENCY: int = 2  # per logged-in user; anonymous chat is limited per session
+    LLM_MAX_QUEUE: int = 256
+    LLM_QUEUE_TIMEOUT: float = 15.0
+    LLM_MAX_RETRIES: int = 3
+
+    # Chat persistence (background writer)
+    CHAT_WRITER_BATCH_SIZE: int = 100
+    CHAT_WRITER_FLUSH_INTERVAL: float = 0.05  # seconds to wait for more messages before a flush
+
+    # Chat history sent to the LLM
+    CHAT_HISTORY_TOKEN_BUDGET: int = 3000
+    CHAT_HISTORY_MAX_MESSAGES: int = 50
+    CHAT_HISTORY_CACHE_SESSIONS: int = 1024
+
+    # Chatbot response cache (first-turn questions)
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_SEMANTIC: bool = True
+    RESPONSE_CACHE_EMBEDDING_MODEL: str = "jhgan/ko-sroberta-multitask"
+    RESPONSE_CACHE_SIMILARITY_THRESHOLD: float = 0.92
+    RESPONSE_CACHE_MAX_ENTRIES: int = 2048
+    RESPONSE_CACHE_TTL_SECONDS: int = 6 * 3600
+
+    # Culture semantic search (/api/search/culture); model must match Step 2's
+    SEARCH_ENABLED: bool = True
+    SEARCH_BACKEND: str = "chroma"  # "numpy": memory-mapped index exported by numpy_vector_index.py
+    SEARCH_CHROMA_PATH: str | None = None  # default: Crawling_Haman/chroma_db when run from the source tree
+    SEARCH_VECTOR_INDEX_PATH: str | None = None  # default: Crawling_Haman/vector_index when run from the source tree
+    SEARCH_COLLECTION: str = "haman_culture"
+    SEARCH_EMBEDDING_MODEL: str = "jhgan/ko-sroberta-multitask"
+    SEARCH_MAX_BATCH: int = 64
+    SEARCH_BATCH_WAIT: float = 0.005  # seconds to wait for more queries before encoding
+    SEARCH_MAX_TOP_K: int = 20
+
+    # Hybrid search (/api/search/hybrid): n-gram BM25 over culture/locations fused with vectors
+    HYBRID_SEARCH_ENABLED: bool = True
+    HYBRID_REFRESH_SECONDS: float = 300.0  # lexical index re-sync from MySQL
+    HYBRID_TITLE_WEIGHT: float = 2.0
+    HYBRID_MIN_MATCH: float = 0.5  # share of query n-grams a lexical hit must contain
+    HYBRID_RRF_K: int = 60
+    HYBRID_CANDIDATES: int = 30  # per ranking, before fusion
+
+    # Password hashing (bcrypt worker pool)
+    PASSWORD_BCRYPT_ROUNDS: int = 12  # existing hashes are upgraded on the next successful login
+    PASSWORD_HASH_EXECUTOR: str = "process"  # "process" or "thread"
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_QUEUE: int = 64
+    PASSWORD_HASH_QUEUE_TIMEOUT: float = 10.0
+
     # JWT Settings
     SECRET_KEY: str = "a_very_secret_key_for_jwt"
     ALGORITHM: str = "HS256"
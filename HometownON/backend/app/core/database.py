@@ -3,12 +3,45 @@ from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .config import settings
 
-SQLALCHEMY_DATABASE_URL = f"mysql+pymysql://{settings.mysql_user}:{settings.mysql_password}@{settings.mysql_host}:{settings.mysql_port}/{settings.mysql_database}"
+SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL or f"mysql+pymysql://{settings.mysql_user}:{settings.mysql_password}@{settings.mysql_host}:{settings.mysql_port}/{settings.mysql_database}"
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+ASYNC_SQLALCHEMY_DATABASE_URL = settings.ASYNC_DATABASE_URL or (
+    SQLALCHEMY_DATABASE_URL
+    .replace("mysql+pymysql://", "mysql+aiomysql://", 1)
+    .replace("sqlite://", "sqlite+aiosqlite://", 1)
+)
+
+def engine_options(url: str, pool_size: int, max_overflow: int) -> dict:
+    if url.startswith("sqlite"):
+        # SQLite connections are shared with the threadpool and the chat writer thread
+        return {"connect_args": {"check_same_thread": False}}
+    return {
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    **engine_options(SQLALCHEMY_DATABASE_URL, settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW),
+)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# The async engine only exists when enabled, so the async driver stays optional.
+async_engine = None
+AsyncSessionLocal = None
+if settings.DB_ASYNC:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_engine = create_async_engine(
+        ASYNC_SQLALCHEMY_DATABASE_URL,
+        **engine_options(ASYNC_SQLALCHEMY_DATABASE_URL, settings.DB_ASYNC_POOL_SIZE, settings.DB_ASYNC_MAX_OVERFLOW),
+    )
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 def get_db():
@@ -17,3 +50,10 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Request-scoped session dependency: AsyncSession if DB_ASYNC, else Session
+get_db_session = get_async_db if settings.DB_ASYNC else get_db
@@ -1,2 +1,3 @@
 from . import crud_user
 from . import crud_chat
+from . import crud_search
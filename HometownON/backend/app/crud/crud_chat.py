@@ -1,7 +1,12 @@
+from typing import TYPE_CHECKING
 from sqlalchemy.orm import Session
+from sqlalchemy import func, insert, select
 from ..models import models
 from ..schemas import schemas
 
+if TYPE_CHECKING:  # the asyncio extension needs greenlet, only installed with DB_ASYNC
+    from sqlalchemy.ext.asyncio import AsyncSession
+
 def get_chat_session(db: Session, session_id: int) -> models.ChatSession | None:
     """Get a single chat session by its ID."""
     return db.query(models.ChatSession).filter(models.ChatSession.id == session_id).first()
@@ -17,11 +22,17 @@ def get_chat_messages(db: Session, session_id: int, limit: int = 20) -> list[mod
     return (
         db.query(models.ChatMessage)
         .filter(models.ChatMessage.session_id == session_id)
-        .order_by(models.ChatMessage.created_at.desc())
+        # id breaks ties between messages inserted in the same batch/second
+        .order_by(models.ChatMessage.created_at.desc(), models.ChatMessage.id.desc())
         .limit(limit)
         .all()[::-1]  # Reverse to get chronological order
     )
 
+def count_chat_messages(db: Session, session_id: int) -> int:
+    return db.scalar(
+        select(func.count()).select_from(models.ChatMessage).where(models.ChatMessage.session_id == session_id)
+    )
+
 def add_chat_message(
     db: Session, session_id: int, role: str, content: str
 ) -> models.ChatMessage:
@@ -29,4 +40,44 @@ def add_chat_message(
     db.add(db_message)
     db.commit()
     db.refresh(db_message)
-    return db_message
\ No newline at end of file
+    return db_message
+
+def add_chat_messages(db: Session, messages: list[dict]) -> int:
+    """Insert many chat messages in a single executemany round-trip."""
+    if not messages:
+        return 0
+    db.execute(insert(models.ChatMessage), messages)
+    db.commit()
+    return len(messages)
+
+# Async variants (used when settings.DB_ASYNC is enabled)
+
+async def get_chat_session_async(db: "AsyncSession", session_id: int) -> models.ChatSession | None:
+    return await db.get(models.ChatSession, session_id)
+
+async def create_chat_session_async(db: "AsyncSession", user_id: int = None) -> models.ChatSession:
+    db_session = models.ChatSession(user_id=user_id)
+    db.add(db_session)
+    await db.commit()
+    return db_session
+
+async def get_chat_messages_async(db: "AsyncSession", session_id: int, limit: int = 20) -> list[models.ChatMessage]:
+    result = await db.execute(
+        select(models.ChatMessage)
+        .where(models.ChatMessage.session_id == session_id)
+        .order_by(models.ChatMessage.created_at.desc(), models.ChatMessage.id.desc())
+        .limit(limit)
+    )
+    return result.scalars().all()[::-1]  # Reverse to get chronological order
+
+async def count_chat_messages_async(db: "AsyncSession", session_id: int) -> int:
+    return await db.scalar(
+        select(func.count()).select_from(models.ChatMessage).where(models.ChatMessage.session_id == session_id)
+    )
+
+async def add_chat_messages_async(db: "AsyncSession", messages: list[dict]) -> int:
+    if not messages:
+        return 0
+    await db.execute(insert(models.ChatMessage), messages)
+    await db.commit()
+    return len(messages)
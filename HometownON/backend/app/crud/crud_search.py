@@ -0,0 +1,19 @@
+from sqlalchemy.orm import Session
+from ..models import models
+
+def get_culture_documents(db: Session) -> list:
+    """(id, title, story, category) of every culture row, for the lexical index."""
+    return db.query(
+        models.Culture.id, models.Culture.title, models.Culture.story, models.Culture.category
+    ).all()
+
+def get_location_documents(db: Session) -> list:
+    """(id, name, address, main, sub) of every location; geometry is not loaded."""
+    return (
+        db.query(
+            models.Location.id, models.Location.name, models.Location.address,
+            models.LocationCategory.main, models.LocationCategory.sub,
+        )
+        .outerjoin(models.LocationCategory, models.Location.category_id == models.LocationCategory.id)
+        .all()
+    )
@@ -1,23 +1,79 @@
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from ..core.security import get_password_hash
 from ..models import models
 from ..schemas import schemas
 
+if TYPE_CHECKING:  # the asyncio extension needs greenlet, only installed with DB_ASYNC
+    from sqlalchemy.ext.asyncio import AsyncSession
+
 def get_user_by_email(db: Session, email: str):
     return db.query(models.User).filter(models.User.email == email).first()
 
-def create_user(db: Session, user: schemas.UserCreate):
-    hashed_password = get_password_hash(user.password)
+def create_user(db: Session, user: schemas.UserCreate, hashed_password: str):
     db_user = models.User(email=user.email, password_hash=hashed_password, phone=user.phone)
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
     return db_user
 
+def _new_user_with_profile(user: schemas.UserCreate, hashed_password: str, profile: schemas.UserProfileCreate) -> models.User:
+    # Timestamps are set here rather than by the server default so the row never has to be read back
+    now = datetime.now().replace(microsecond=0)
+    db_user = models.User(email=user.email, password_hash=hashed_password, phone=user.phone, created_at=now, updated_at=now)
+    db_user.profile = models.UserProfile(**profile.model_dump())
+    return db_user
+
+def create_user_with_profile(db: Session, user: schemas.UserCreate, hashed_password: str, profile: schemas.UserProfileCreate) -> schemas.UserWithProfile:
+    """
+    Insert a user and its profile in one transaction.
+
+    A duplicate email surfaces as an IntegrityError from the unique constraint.
+    The response is composed from the flushed objects before the commit expires them.
+    """
+    db_user = _new_user_with_profile(user, hashed_password, profile)
+    db.add(db_user)
+    try:
+        db.flush()
+        created = schemas.UserWithProfile.model_validate(db_user)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return created
+
+def update_user_password_hash(db: Session, user: models.User, hashed_password: str):
+    user.password_hash = hashed_password
+    db.commit()
+
 def create_user_profile(db: Session, user_id: int, profile: schemas.UserProfileCreate):
     db_profile = models.UserProfile(user_id=user_id, **profile.model_dump())
     db.add(db_profile)
     db.commit()
     db.refresh(db_profile)
     return db_profile
+
+# Async variants (used when settings.DB_ASYNC is enabled)
+
+async def get_user_by_email_async(db: "AsyncSession", email: str):
+    result = await db.execute(select(models.User).where(models.User.email == email))
+    return result.scalars().first()
+
+async def create_user_with_profile_async(db: "AsyncSession", user: schemas.UserCreate, hashed_password: str, profile: schemas.UserProfileCreate) -> schemas.UserWithProfile:
+    db_user = _new_user_with_profile(user, hashed_password, profile)
+    db.add(db_user)
+    try:
+        await db.flush()
+        created = schemas.UserWithProfile.model_validate(db_user)
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    return created
+
+async def update_user_password_hash_async(db: "AsyncSession", user: models.User, hashed_password: str):
+    user.password_hash = hashed_password
+    await db.commit()
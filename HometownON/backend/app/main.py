@@ -1,17 +1,62 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from starlette.concurrency import run_in_threadpool
 from starlette.middleware.cors import CORSMiddleware
 
-from .core.database import engine
-from .models import models
+from .core.config import settings
 from .api.api import api_router
+from .services.chat_writer import chat_writer
+from .services.chat_history import count_tokens
+from .services.culture_search import culture_search
+from .services.hybrid_search import hybrid_search
+from .services.openai_client import close_openai_client, get_openai_client
+from .services.password_service import password_service
+from .services.response_cache import response_cache
+
+logger = logging.getLogger(__name__)
+
+async def warm_up():
+    # Heavy clients load in the background so the worker accepts traffic immediately
+    try:
+        await run_in_threadpool(get_openai_client)
+        await run_in_threadpool(count_tokens, "")
+        if settings.RESPONSE_CACHE_ENABLED:
+            await run_in_threadpool(response_cache.load_model)
+        if settings.SEARCH_ENABLED and culture_search.available:
+            await run_in_threadpool(culture_search.load)
+    except Exception:
+        logger.exception("Warm-up failed; clients will load on first use")
 
-# The following line is commented out for debugging DB connection issues.
-models.Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.DB_CREATE_SCHEMA_ON_STARTUP:
+        from .bootstrap import create_schema
+        await run_in_threadpool(create_schema)
+    await chat_writer.start()
+    password_service.start()
+    if settings.SEARCH_ENABLED:
+        await culture_search.start()
+    if settings.HYBRID_SEARCH_ENABLED:
+        # First refresh builds the lexical index in the background
+        await hybrid_search.start()
+    warm_up_task = asyncio.create_task(warm_up())
+    yield
+    warm_up_task.cancel()
+    # Flush queued chat messages before the worker exits
+    await chat_writer.stop()
+    password_service.stop()
+    await hybrid_search.stop()
+    await culture_search.stop()
+    await close_openai_client()
 
 app = FastAPI(
     title="HometownON API",
     description="API for the HometownON project, supporting 귀향자 정착.",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan,
 )
 
 # Set all CORS enabled origins
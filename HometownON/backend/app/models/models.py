@@ -352,12 +352,21 @@ class DataSource(Base):
 class RagDocument(Base):
     __tablename__ = 'rag_documents'
     id = Column(BIGINT, primary_key=True, autoincrement=True)
-    source_table = Column(Enum('culture', 'locations'), nullable=False)
+    source_table = Column(Enum('culture', 'locations', 'sitemap'), nullable=False)
     source_id = Column(BIGINT, nullable=False)
     collection_name = Column(VARCHAR(120), nullable=False)
     chroma_doc_id = Column(VARCHAR(120), nullable=False)
     embedding_model = Column(VARCHAR(160), nullable=False)
 
+class SourceRow(Base):
+    __tablename__ = 'source_rows'
+    source_file = Column(VARCHAR(200), primary_key=True)
+    row_key = Column(VARCHAR(64), primary_key=True)
+    target_table = Column(Enum('culture', 'locations'), nullable=False)
+    target_id = Column(BIGINT, nullable=False, index=True)
+    content_hash = Column(VARCHAR(64), nullable=False)
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+
 # 13. Other Services
 class WeatherCache(Base):
     __tablename__ = 'weather_cache'
@@ -111,4 +111,34 @@ class MissionAssignment(MissionAssignmentBase):
     class Config:
         from_attributes = True
 
+# =======================================
+# 3. Search Schemas
+# =======================================
+
+class CultureSearchHit(BaseModel):
+    id: str
+    mysql_id: Optional[str] = None
+    title: Optional[str] = None
+    category: Optional[str] = None
+    distance: float
+    document: Optional[str] = None
+
+class CultureSearchResponse(BaseModel):
+    query: str
+    results: List[CultureSearchHit]
+
+class HybridSearchHit(BaseModel):
+    source: str
+    source_id: int
+    title: Optional[str] = None
+    category: Optional[str] = None
+    snippet: Optional[str] = None
+    score: float
+    lexical_rank: Optional[int] = None
+    vector_rank: Optional[int] = None
+
+class HybridSearchResponse(BaseModel):
+    query: str
+    results: List[HybridSearchHit]
+
 # ... (We can add more schemas as we build the APIs)
@@ -0,0 +1,68 @@
+"""
+Helpers shared by the bounded services (LLM gateway, password hashing, culture search).
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable
+
+
+def percentile(samples, pct: float) -> float | None:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class AdmissionQueue:
+    """
+    Bounded FIFO admission in front of a slot that can be awaited.
+
+    At most `max_queue` callers wait at once and each waits at most `timeout`
+    seconds; otherwise `busy_error(message, retry_after=timeout)` is raised.
+    Records queue depth, wait times and rejection counts for `metrics()`.
+    """
+
+    def __init__(self, max_queue: int, timeout: float, busy_error: type[Exception],
+                 full_message: str, timeout_message: str):
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._busy_error = busy_error
+        self._full_message = full_message
+        self._timeout_message = timeout_message
+        self.waiting = 0
+        self.wait_times = deque(maxlen=1000)
+        self.stats = {"rejected": 0, "timeouts": 0, "max_queue_depth": 0}
+
+    async def admit(self, acquire: Callable[[], Awaitable], ready: bool):
+        """
+        Await `acquire()`; `ready` says it will not suspend, which skips the queue.
+        """
+        if ready:
+            await acquire()
+            self.wait_times.append(0.0)
+            return
+        if self.waiting >= self.max_queue:
+            self.stats["rejected"] += 1
+            raise self._busy_error(self._full_message, retry_after=self.timeout)
+
+        self.waiting += 1
+        self.stats["max_queue_depth"] = max(self.stats["max_queue_depth"], self.waiting)
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            raise self._busy_error(self._timeout_message, retry_after=self.timeout) from None
+        finally:
+            self.waiting -= 1
+        self.wait_times.append(time.monotonic() - start)
+
+    def metrics(self) -> dict:
+        return {
+            **self.stats,
+            "queue_depth": self.waiting,
+            "wait_p50": percentile(self.wait_times, 50),
+            "wait_p95": percentile(self.wait_times, 95),
+            "wait_p99": percentile(self.wait_times, 99),
+        }
@@ -0,0 +1,119 @@
+import threading
+from collections import OrderedDict, deque
+from functools import lru_cache
+
+from ..core.config import settings
+
+SUMMARY_PREFIX = "이전 대화 요약 (오래된 메시지는 생략됨):"
+SUMMARY_SNIPPET_CHARS = 80
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    # Loaded on first use: the BPE tables are large and may need a download
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:  # tiktoken is optional; fall back to a byte-length estimate
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Token count for a message, exact with tiktoken and estimated otherwise."""
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    # Hangul is 3 bytes per syllable and roughly one token; ASCII is ~4 chars/token.
+    return len(text.encode("utf-8")) // 3 + 1
+
+
+def message_tokens(message: dict) -> int:
+    if message.get("tokens") is None:
+        message["tokens"] = count_tokens(message["content"])
+    return message["tokens"]
+
+
+def build_prompt_history(messages: list[dict], budget: int) -> list[dict]:
+    """
+    Fit a conversation into a prompt token budget.
+
+    The newest messages are kept verbatim until the budget is used up; older
+    user questions are collapsed into a single short system summary so the
+    model keeps the thread of the conversation. The latest message is always
+    sent, even if it alone exceeds the budget.
+    """
+    kept = []
+    used = 0
+    for message in reversed(messages):
+        tokens = message_tokens(message)
+        if kept and used + tokens > budget:
+            break
+        kept.append(message)
+        used += tokens
+    kept.reverse()
+
+    dropped = messages[: len(messages) - len(kept)]
+    history = [{"role": m["role"], "content": m["content"]} for m in kept]
+    questions = [m["content"][:SUMMARY_SNIPPET_CHARS] for m in dropped if m["role"] == "user"]
+    if questions:
+        summary = "\n".join([SUMMARY_PREFIX] + [f"- {q}" for q in questions])
+        # Drop the oldest questions until the summary itself fits
+        while len(questions) > 1 and used + count_tokens(summary) > budget:
+            questions.pop(0)
+            summary = "\n".join([SUMMARY_PREFIX] + [f"- {q}" for q in questions])
+        history.insert(0, {"role": "system", "content": summary})
+    return history
+
+
+class ChatHistoryCache:
+    """
+    In-process LRU of the recent messages of active chat sessions.
+
+    The cache is per worker process, and with several workers a session's turns
+    can be served by different ones. Each entry therefore also records how many
+    messages the session has in total. Before using an entry, the endpoint
+    compares that number with the stored message count plus this worker's
+    not-yet-written messages, and reloads the session when another worker has
+    added turns. A follow-up turn costs one COUNT query instead of a history
+    load. Messages still queued in another worker's writer are not visible
+    until that writer commits them, a few ms (CHAT_WRITER_FLUSH_INTERVAL).
+    """
+
+    def __init__(self, max_sessions: int = 1024, max_messages: int = 50):
+        self._max_sessions = max_sessions
+        self._max_messages = max_messages
+        self._sessions: OrderedDict[int, deque] = OrderedDict()
+        self._totals: dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, session_id: int) -> tuple[list[dict], int] | None:
+        """Recent messages and the session's total message count, or None."""
+        with self._lock:
+            messages = self._sessions.get(session_id)
+            if messages is None:
+                return None
+            self._sessions.move_to_end(session_id)
+            return list(messages), self._totals[session_id]
+
+    def put(self, session_id: int, messages: list[dict], total: int):
+        with self._lock:
+            self._sessions[session_id] = deque(messages, maxlen=self._max_messages)
+            self._totals[session_id] = total
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self._max_sessions:
+                evicted, _ = self._sessions.popitem(last=False)
+                del self._totals[evicted]
+
+    def append(self, session_id: int, message: dict):
+        """Record a new message; ignored for sessions that are not cached."""
+        with self._lock:
+            messages = self._sessions.get(session_id)
+            if messages is not None:
+                messages.append(message)
+                self._totals[session_id] += 1
+
+
+chat_history_cache = ChatHistoryCache(
+    max_sessions=settings.CHAT_HISTORY_CACHE_SESSIONS,
+    max_messages=settings.CHAT_HISTORY_MAX_MESSAGES,
+)
@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from ..core.config import settings
+from ..core.database import AsyncSessionLocal, SessionLocal
+from ..crud import crud_chat
+
+logger = logging.getLogger(__name__)
+
+
+class ChatMessageWriter:
+    """
+    Persists chat messages in the background.
+
+    Endpoints enqueue messages and return immediately; a single task drains the
+    queue, groups messages into batches and inserts each batch with one
+    executemany on its own session, in a dedicated thread so the event loop
+    never waits on MySQL (or directly on the loop when an async session factory
+    is given). Messages stay visible through `pending()` until their batch is
+    committed.
+    """
+
+    def __init__(self, session_factory=SessionLocal, batch_size: int = 100, flush_interval: float = 0.05,
+                 async_session_factory=None):
+        self._session_factory = session_factory
+        self._async_session_factory = async_session_factory
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+        self._executor: ThreadPoolExecutor | None = None
+        self._pending: dict[int, list[dict]] = {}
+        self._lock = threading.Lock()
+
+    async def start(self):
+        if self._task is not None:
+            return
+        self._queue = asyncio.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chat-writer")
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Flush everything still queued, then stop the writer task."""
+        if self._task is None:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._executor.shutdown(wait=True)
+        self._task = None
+        self._queue = None
+        self._executor = None
+
+    def enqueue(self, session_id: int, role: str, content: str, tokens: int | None = None):
+        if self._queue is None:
+            raise RuntimeError("ChatMessageWriter is not running")
+        message = {"session_id": session_id, "role": role, "content": content, "tokens": tokens}
+        with self._lock:
+            self._pending.setdefault(session_id, []).append(message)
+        self._queue.put_nowait(message)
+
+    def pending(self, session_id: int) -> list[dict]:
+        """Messages for a session that are queued but not yet committed."""
+        with self._lock:
+            return list(self._pending.get(session_id, ()))
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            message = await self._queue.get()
+            if message is None:
+                break
+            batch = [message]
+            deadline = loop.time() + self._flush_interval
+            while len(batch) < self._batch_size:
+                timeout = deadline - loop.time()
+                try:
+                    message = await asyncio.wait_for(self._queue.get(), timeout) if timeout > 0 else self._queue.get_nowait()
+                except (asyncio.TimeoutError, asyncio.QueueEmpty):
+                    break
+                if message is None:
+                    stopping = True
+                    break
+                batch.append(message)
+            if self._async_session_factory is not None:
+                await self._write_batch_async(batch)
+            else:
+                await loop.run_in_executor(self._executor, self._write_batch, batch)
+
+    def _write_batch(self, batch: list[dict]):
+        try:
+            with self._session_factory() as db:
+                crud_chat.add_chat_messages(db, batch)
+        except Exception:
+            logger.exception("Failed to persist %d chat messages", len(batch))
+        finally:
+            self._mark_written(batch)
+
+    async def _write_batch_async(self, batch: list[dict]):
+        try:
+            async with self._async_session_factory() as db:
+                await crud_chat.add_chat_messages_async(db, batch)
+        except Exception:
+            logger.exception("Failed to persist %d chat messages", len(batch))
+        finally:
+            self._mark_written(batch)
+
+    def _mark_written(self, batch: list[dict]):
+        with self._lock:
+            for message in batch:
+                queued = self._pending.get(message["session_id"])
+                if queued is None:
+                    continue
+                queued.remove(message)
+                if not queued:
+                    del self._pending[message["session_id"]]
+
+
+chat_writer = ChatMessageWriter(
+    batch_size=settings.CHAT_WRITER_BATCH_SIZE,
+    flush_interval=settings.CHAT_WRITER_FLUSH_INTERVAL,
+    async_session_factory=AsyncSessionLocal,
+)
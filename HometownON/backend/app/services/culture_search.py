@@ -0,0 +1,269 @@
+import asyncio
+import importlib.util
+import logging
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from ..core.config import settings
+from ._metrics import percentile
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("chroma", "numpy")
+# Store directories inside Crawling_Haman used when no path is configured:
+# the collection written by Step_2 (one entry per story chunk) and its
+# export by numpy_vector_index.py
+DEFAULT_STORE_DIRS = {"chroma": "chroma_db", "numpy": "vector_index"}
+STORE_PATH_SETTINGS = {"chroma": "SEARCH_CHROMA_PATH", "numpy": "SEARCH_VECTOR_INDEX_PATH"}
+
+# Stories are stored as several chunks; over-fetch and keep the best chunk per story
+CHUNK_OVERSAMPLE = 4
+
+
+class SearchUnavailable(Exception):
+    """The model or the collection could not be loaded."""
+
+
+def find_crawling_dir() -> Path | None:
+    """The Crawling_Haman checkout next to the backend, if running from the source tree."""
+    for parent in Path(__file__).resolve().parents:
+        candidate = parent / "Crawling_Haman"
+        if candidate.is_dir():
+            return candidate
+    return None
+
+
+@dataclass
+class SearchRequest:
+    query: str
+    top_k: int
+    category: str | None
+    future: asyncio.Future = field(repr=False)
+
+
+def collapse_hits(results: dict, q: int, top_k: int) -> list[dict]:
+    """Best chunk per mysql_id for the q-th query of a collection.query result."""
+    hits, seen = [], set()
+    for doc_id, document, metadata, distance in zip(
+        results["ids"][q], results["documents"][q], results["metadatas"][q], results["distances"][q]
+    ):
+        metadata = metadata or {}
+        parent = metadata.get("mysql_id", doc_id)
+        if parent in seen:
+            continue
+        seen.add(parent)
+        hits.append({
+            "id": doc_id,
+            "mysql_id": metadata.get("mysql_id"),
+            "title": metadata.get("title"),
+            "category": metadata.get("category"),
+            "distance": distance,
+            "document": document,
+        })
+        if len(hits) == top_k:
+            break
+    return hits
+
+
+class CultureSearchService:
+    """
+    Semantic search over the culture collection, resident in the worker.
+
+    The embedding model and the Chroma collection are loaded once (normally by
+    the startup warm-up) and kept open. Concurrent requests are queued and a
+    single task groups them into micro-batches: up to `max_batch` queries, or
+    whatever arrived within `batch_wait` seconds of the first, are encoded in
+    one model call and sent to Chroma as one multi-query request per category
+    filter, on a dedicated thread so the event loop never blocks on torch.
+
+    With backend="numpy" the collection is the memory-mapped NumpyVectorIndex
+    exported from Chroma (same query() interface, no SQLite round trip).
+    """
+
+    def __init__(self, store_path: str | Path | None, collection_name: str, model_name: str,
+                 max_batch: int = 64, batch_wait: float = 0.005, backend: str = "chroma"):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown search backend {backend!r}; expected one of {BACKENDS}")
+        self._backend = backend
+        self._store_path = Path(store_path) if store_path else None
+        self._collection_name = collection_name
+        self._model_name = model_name
+        self._max_batch = max_batch
+        self._batch_wait = batch_wait
+        self._model = None
+        self._collection = None
+        self._load_error: str | None = None
+        self._load_lock = threading.Lock()
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+        self._executor: ThreadPoolExecutor | None = None
+        self._batch_sizes = deque(maxlen=1000)
+        self._latencies = deque(maxlen=1000)
+        self.stats = {"queries": 0, "batches": 0, "errors": 0}
+
+    @property
+    def available(self) -> bool:
+        store = "numpy" if self._backend == "numpy" else "chromadb"
+        return importlib.util.find_spec(store) is not None and \
+            importlib.util.find_spec("sentence_transformers") is not None
+
+    def _resolve_store_path(self) -> Path:
+        """Configured store path, else the default inside a Crawling_Haman checkout."""
+        if self._store_path is not None:
+            return self._store_path
+        crawling_dir = find_crawling_dir()
+        if crawling_dir is None:
+            raise SearchUnavailable(f"{STORE_PATH_SETTINGS[self._backend]} is not set and no "
+                                    f"Crawling_Haman directory was found to take the default from")
+        return crawling_dir / DEFAULT_STORE_DIRS[self._backend]
+
+    def _open_collection(self, store_path: Path):
+        if self._backend == "numpy":
+            # Chroma-compatible query()/count() over a memory-mapped .npy file
+            crawling_dir = find_crawling_dir()
+            if importlib.util.find_spec("numpy_vector_index") is None and crawling_dir is not None \
+                    and str(crawling_dir) not in sys.path:
+                sys.path.append(str(crawling_dir))
+            from numpy_vector_index import NumpyVectorIndex
+
+            return NumpyVectorIndex(store_path, name=self._collection_name)
+        import chromadb
+
+        return chromadb.PersistentClient(path=str(store_path)).get_collection(name=self._collection_name)
+
+    def load(self):
+        """Load the model and open the collection (blocking; call from a worker thread)."""
+        with self._load_lock:
+            if self._collection is not None:
+                return self._model, self._collection
+            if not self.available:
+                raise SearchUnavailable(f"{self._backend} backend and sentence-transformers are not installed")
+            store_path = self._resolve_store_path()
+            if not store_path.exists():
+                raise SearchUnavailable(f"Vector store directory {store_path} does not exist")
+            try:
+                from sentence_transformers import SentenceTransformer
+
+                model = SentenceTransformer(self._model_name)
+                collection = self._open_collection(store_path)
+            except Exception as e:
+                self._load_error = str(e)
+                logger.exception("Culture search failed to load %s", self._collection_name)
+                raise SearchUnavailable(f"Culture search is unavailable: {e}") from e
+            self._model, self._collection = model, collection
+            self._load_error = None
+            logger.info("Culture search ready (%s, %s, %d chunks)", self._model_name, self._backend, collection.count())
+            return self._model, self._collection
+
+    async def start(self):
+        if self._task is not None:
+            return
+        self._queue = asyncio.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="culture-search")
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._executor.shutdown(wait=True)
+        self._task = None
+        self._queue = None
+        self._executor = None
+
+    async def search(self, query: str, top_k: int = 5, category: str | None = None) -> list[dict]:
+        # Lazily started for callers outside the app lifespan (scripts, shells)
+        await self.start()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(SearchRequest(query=query, top_k=top_k, category=category, future=future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            request = await self._queue.get()
+            if request is None:
+                break
+            batch = [request]
+            deadline = loop.time() + self._batch_wait
+            while len(batch) < self._max_batch:
+                timeout = deadline - loop.time()
+                try:
+                    request = await asyncio.wait_for(self._queue.get(), timeout) if timeout > 0 else self._queue.get_nowait()
+                except (asyncio.TimeoutError, asyncio.QueueEmpty):
+                    break
+                if request is None:
+                    stopping = True
+                    break
+                batch.append(request)
+            start = time.monotonic()
+            try:
+                results = await loop.run_in_executor(self._executor, self._search_batch, batch)
+            except Exception as e:
+                self.stats["errors"] += 1
+                if not isinstance(e, SearchUnavailable):
+                    logger.exception("Culture search batch of %d failed", len(batch))
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+                continue
+            self._batch_sizes.append(len(batch))
+            self._latencies.append(time.monotonic() - start)
+            for request, hits in zip(batch, results):
+                if not request.future.done():
+                    request.future.set_result(hits)
+
+    def _search_batch(self, batch: list[SearchRequest]) -> list[list[dict]]:
+        model, collection = self.load()
+        embeddings = model.encode([request.query for request in batch], batch_size=len(batch),
+                                  show_progress_bar=False)
+        self.stats["queries"] += len(batch)
+        self.stats["batches"] += 1
+
+        # Chroma applies one filter per call, so queries are grouped by category
+        groups: dict[str | None, list[int]] = {}
+        for i, request in enumerate(batch):
+            groups.setdefault(request.category, []).append(i)
+        results: list[list[dict]] = [[] for _ in batch]
+        for category, indices in groups.items():
+            n_results = max(batch[i].top_k for i in indices) * CHUNK_OVERSAMPLE
+            raw = collection.query(
+                query_embeddings=[embeddings[i].tolist() for i in indices],
+                n_results=n_results,
+                where={"category": category} if category else None,
+                include=["documents", "metadatas", "distances"],
+            )
+            for q, i in enumerate(indices):
+                results[i] = collapse_hits(raw, q, batch[i].top_k)
+        return results
+
+    def metrics(self) -> dict:
+        return {
+            **self.stats,
+            "ready": self._collection is not None,
+            "load_error": self._load_error,
+            "model": self._model_name,
+            "backend": self._backend,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "batch_size_p50": percentile(self._batch_sizes, 50),
+            "batch_size_max": max(self._batch_sizes, default=None),
+            "batch_latency_p50": percentile(self._latencies, 50),
+            "batch_latency_p95": percentile(self._latencies, 95),
+        }
+
+
+culture_search = CultureSearchService(
+    store_path=settings.SEARCH_VECTOR_INDEX_PATH if settings.SEARCH_BACKEND == "numpy" else settings.SEARCH_CHROMA_PATH,
+    collection_name=settings.SEARCH_COLLECTION,
+    model_name=settings.SEARCH_EMBEDDING_MODEL,
+    max_batch=settings.SEARCH_MAX_BATCH,
+    batch_wait=settings.SEARCH_BATCH_WAIT,
+    backend=settings.SEARCH_BACKEND,
+)
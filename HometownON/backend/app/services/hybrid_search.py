@@ -0,0 +1,152 @@
+import asyncio
+import logging
+import time
+
+from starlette.concurrency import run_in_threadpool
+
+from ..core.config import settings
+from ..core.database import SessionLocal
+from ..crud import crud_search
+from .culture_search import SearchUnavailable, culture_search
+from .lexical_index import LexicalDocument, LexicalIndex
+
+logger = logging.getLogger(__name__)
+
+SOURCES = ("culture", "locations")
+SNIPPET_CHARS = 160
+
+
+def load_documents(db) -> dict[str, list[LexicalDocument]]:
+    """Snapshot of culture and locations rows as lexical documents."""
+    culture = [
+        LexicalDocument(source="culture", source_id=row.id, title=row.title, body=row.story,
+                        category=row.category, snippet=(row.story or "")[:SNIPPET_CHARS])
+        for row in crud_search.get_culture_documents(db)
+    ]
+    locations = [
+        LexicalDocument(source="locations", source_id=row.id, title=row.name,
+                        body=" ".join(filter(None, (row.address, row.main, row.sub))),
+                        category=row.sub or row.main, snippet=row.address)
+        for row in crud_search.get_location_documents(db)
+    ]
+    return {"culture": culture, "locations": locations}
+
+
+def reciprocal_rank_fusion(rankings: list[list[str]], k: int = 60) -> dict[str, float]:
+    """Sum of 1 / (k + rank) over every ranking a key appears in (rank starts at 1)."""
+    scores: dict[str, float] = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, 1):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+    return scores
+
+
+class HybridSearchService:
+    """
+    Lexical + vector retrieval over culture stories and locations.
+
+    Proper nouns (person and place names) are matched by an in-memory n-gram
+    BM25 index over culture.title/story and locations.name/address; culture
+    stories are also ranked by the resident vector search. The two rankings
+    are merged with reciprocal rank fusion. The index is refreshed from MySQL
+    every `refresh_interval` seconds, touching only rows whose content changed.
+    """
+
+    def __init__(self, index: LexicalIndex, refresh_interval: float = 300.0, rrf_k: int = 60,
+                 candidates: int = 30):
+        self.index = index
+        self._refresh_interval = refresh_interval
+        self._rrf_k = rrf_k
+        self._candidates = candidates
+        self._task: asyncio.Task | None = None
+        self._refreshed_at: float | None = None
+        self.stats = {"refreshes": 0, "refresh_errors": 0, "queries": 0, "vector_unavailable": 0}
+
+    def refresh(self) -> dict:
+        """Re-read both tables and apply the differences (blocking; call from a worker thread)."""
+        with SessionLocal() as db:
+            snapshot = load_documents(db)
+        changes = {source: self.index.sync(source, docs) for source, docs in snapshot.items()}
+        self._refreshed_at = time.time()
+        self.stats["refreshes"] += 1
+        logger.info("Lexical index refreshed: %s", changes)
+        return changes
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await run_in_threadpool(self.refresh)
+            except Exception:
+                self.stats["refresh_errors"] += 1
+                logger.exception("Lexical index refresh failed")
+            await asyncio.sleep(self._refresh_interval)
+
+    async def search(self, query: str, top_k: int = 10, sources=SOURCES, use_vectors: bool = True) -> list[dict]:
+        self.stats["queries"] += 1
+        # Lexical scoring runs in the threadpool while the vector query is batched
+        lexical_task = asyncio.create_task(run_in_threadpool(self.index.search, query, self._candidates, sources))
+        vector_hits = []
+        if use_vectors and "culture" in sources and settings.SEARCH_ENABLED:
+            try:
+                vector_hits = await culture_search.search(query, top_k=self._candidates)
+            except SearchUnavailable:
+                self.stats["vector_unavailable"] += 1
+        lexical_hits = await lexical_task
+
+        lexical_ranking = [doc.key for doc, _ in lexical_hits]
+        vector_by_key = {f"culture:{hit['mysql_id']}": hit for hit in vector_hits if hit["mysql_id"] is not None}
+        vector_ranking = list(vector_by_key)
+        scores = reciprocal_rank_fusion([lexical_ranking, vector_ranking], k=self._rrf_k)
+        lexical_rank = {key: rank for rank, key in enumerate(lexical_ranking, 1)}
+        vector_rank = {key: rank for rank, key in enumerate(vector_ranking, 1)}
+
+        results = []
+        for key, score in sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]:
+            doc = self.index.get(key)
+            source, source_id = key.split(":", 1)
+            if doc is not None:
+                title, category, snippet = doc.title, doc.category, doc.snippet
+            else:
+                # In the vector store but not (yet) in the lexical index
+                hit = vector_by_key[key]
+                title, category, snippet = hit["title"], hit["category"], (hit["document"] or "")[:SNIPPET_CHARS]
+            results.append({
+                "source": source,
+                "source_id": int(source_id),
+                "title": title,
+                "category": category,
+                "snippet": snippet,
+                "score": score,
+                "lexical_rank": lexical_rank.get(key),
+                "vector_rank": vector_rank.get(key),
+            })
+        return results
+
+    def metrics(self) -> dict:
+        return {
+            **self.stats,
+            **self.index.metrics(),
+            "refreshed_at": self._refreshed_at,
+        }
+
+
+hybrid_search = HybridSearchService(
+    LexicalIndex(title_weight=settings.HYBRID_TITLE_WEIGHT, min_match=settings.HYBRID_MIN_MATCH),
+    refresh_interval=settings.HYBRID_REFRESH_SECONDS,
+    rrf_k=settings.HYBRID_RRF_K,
+    candidates=settings.HYBRID_CANDIDATES,
+)
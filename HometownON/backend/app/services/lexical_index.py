@@ -0,0 +1,175 @@
+import hashlib
+import heapq
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass
+
+# Hangul, CJK ideographs, latin letters and digits; everything else separates tokens
+_TOKEN = re.compile(r"[0-9a-zㄱ-ㆎ가-힣一-鿿]+")
+
+FIELDS = ("title", "body")
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Character bigrams of each Korean run, whole words for latin/digit runs.
+
+    Bigrams need no morphological analyzer and still match names with particles
+    attached ("말이산고분군은" shares every bigram of "말이산고분군").
+    """
+    terms = []
+    for run in _TOKEN.findall(unicodedata.normalize("NFKC", text or "").lower()):
+        if run.isascii() or len(run) == 1:
+            terms.append(run)
+        else:
+            terms.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return terms
+
+
+@dataclass
+class LexicalDocument:
+    source: str  # "culture" or "locations"
+    source_id: int
+    title: str
+    body: str
+    category: str | None = None
+    snippet: str | None = None
+
+    @property
+    def key(self) -> str:
+        return f"{self.source}:{self.source_id}"
+
+    @property
+    def digest(self) -> str:
+        payload = "\x1f".join((self.title, self.body, self.category or ""))
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class LexicalIndex:
+    """
+    In-memory BM25 index over character n-grams with a boosted title field.
+
+    Documents are keyed by "source:id" and can be added, replaced or removed
+    one at a time; `sync` diffs a full snapshot against the index by content
+    digest so a periodic refresh only touches rows that changed.
+    """
+
+    def __init__(self, title_weight: float = 2.0, k1: float = 1.2, b: float = 0.75, min_match: float = 0.5):
+        self._weights = {"title": title_weight, "body": 1.0}
+        # Share of distinct query n-grams a document must contain; keeps
+        # one shared syllable pair from matching unrelated names
+        self._min_match = min_match
+        self._k1 = k1
+        self._b = b
+        self._docs: dict[str, LexicalDocument] = {}
+        self._digests: dict[str, str] = {}
+        self._terms: dict[str, dict[str, Counter]] = {}  # key -> field -> term counts
+        self._postings: dict[str, dict[str, dict[str, int]]] = {field: {} for field in FIELDS}
+        self._lengths: dict[str, dict[str, int]] = {field: {} for field in FIELDS}
+        self._total_length = {field: 0 for field in FIELDS}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def get(self, key: str) -> LexicalDocument | None:
+        return self._docs.get(key)
+
+    def upsert(self, doc: LexicalDocument) -> bool:
+        """Add or replace a document; returns False when its content is unchanged."""
+        digest = doc.digest
+        with self._lock:
+            if self._digests.get(doc.key) == digest:
+                return False
+            self._remove(doc.key)
+            terms = {"title": Counter(tokenize(doc.title)), "body": Counter(tokenize(doc.body))}
+            for field, counts in terms.items():
+                postings = self._postings[field]
+                for term, tf in counts.items():
+                    postings.setdefault(term, {})[doc.key] = tf
+                length = sum(counts.values())
+                self._lengths[field][doc.key] = length
+                self._total_length[field] += length
+            self._docs[doc.key] = doc
+            self._digests[doc.key] = digest
+            self._terms[doc.key] = terms
+            return True
+
+    def remove(self, key: str) -> bool:
+        with self._lock:
+            return self._remove(key)
+
+    def _remove(self, key: str) -> bool:
+        terms = self._terms.pop(key, None)
+        if terms is None:
+            return False
+        for field, counts in terms.items():
+            postings = self._postings[field]
+            for term in counts:
+                docs = postings[term]
+                del docs[key]
+                if not docs:
+                    del postings[term]
+            self._total_length[field] -= self._lengths[field].pop(key)
+        del self._docs[key]
+        del self._digests[key]
+        return True
+
+    def sync(self, source: str, docs: list[LexicalDocument]) -> dict:
+        """Make the documents of one source match `docs`; returns change counts."""
+        stats = {"added": 0, "updated": 0, "removed": 0}
+        seen = set()
+        with self._lock:
+            for doc in docs:
+                seen.add(doc.key)
+                existed = doc.key in self._docs
+                if self.upsert(doc):
+                    stats["updated" if existed else "added"] += 1
+            for key in [key for key, doc in self._docs.items() if doc.source == source and key not in seen]:
+                self._remove(key)
+                stats["removed"] += 1
+        return stats
+
+    def search(self, query: str, limit: int = 10, sources=None) -> list[tuple[LexicalDocument, float]]:
+        """BM25 (title boosted) over query n-grams; `sources` restricts to culture/locations."""
+        query_terms = Counter(tokenize(query))
+        if not query_terms:
+            return []
+        scores: dict[str, float] = {}
+        matched: dict[str, set] = {}
+        with self._lock:
+            n_docs = len(self._docs)
+            if not n_docs:
+                return []
+            for field in FIELDS:
+                postings = self._postings[field]
+                lengths = self._lengths[field]
+                avg_length = self._total_length[field] / n_docs or 1.0
+                weight = self._weights[field]
+                for term, query_tf in query_terms.items():
+                    docs = postings.get(term)
+                    if not docs:
+                        continue
+                    idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+                    for key, tf in docs.items():
+                        norm = tf * (self._k1 + 1) / (tf + self._k1 * (1 - self._b + self._b * lengths[key] / avg_length))
+                        scores[key] = scores.get(key, 0.0) + weight * query_tf * idf * norm
+                        matched.setdefault(key, set()).add(term)
+            required = math.ceil(self._min_match * len(query_terms))
+            scores = {key: score for key, score in scores.items() if len(matched[key]) >= required}
+            if sources is not None:
+                allowed = set(sources)
+                scores = {key: score for key, score in scores.items() if self._docs[key].source in allowed}
+            ranked = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+            return [(self._docs[key], score) for key, score in ranked]
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "documents": len(self._docs),
+                "terms": sum(len(postings) for postings in self._postings.values()),
+                "by_source": dict(Counter(doc.source for doc in self._docs.values())),
+            }
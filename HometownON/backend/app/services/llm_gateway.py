@@ -0,0 +1,217 @@
+"""
+Shared gateway for upstream LLM calls.
+
+Every call site goes through one `LLMGateway`, which bounds concurrency
+globally and per user, keeps a bounded FIFO wait queue with a timeout, and
+retries rate-limit (429) errors with jittered exponential backoff.
+
+The openai SDK is imported on first use, which keeps app startup fast.
+"""
+import asyncio
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING
+
+from ._metrics import AdmissionQueue, percentile
+
+if TYPE_CHECKING:
+    import openai
+
+
+class LLMBusyError(Exception):
+    """The call could not be served now (queue full, wait timed out or still rate-limited after retries)."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMGateway:
+    def __init__(self, max_concurrency: int = 32, per_user_concurrency: int = 2,
+                 max_queue: int = 256, queue_timeout: float = 15.0,
+                 max_retries: int = 3, backoff_base: float = 0.5, backoff_max: float = 8.0):
+        self._global = asyncio.Semaphore(max_concurrency)
+        self._per_user_concurrency = per_user_concurrency
+        self._users: dict[str, list] = {}  # user_key -> [semaphore, holders + waiters]
+        self._admission = AdmissionQueue(
+            max_queue, queue_timeout, LLMBusyError,
+            full_message="LLM queue is full",
+            timeout_message="Timed out waiting for an LLM slot",
+        )
+        self._max_retries = max_retries
+        self._backoff_base = backoff_base
+        self._backoff_max = backoff_max
+        self._in_flight = 0
+        self._latencies = deque(maxlen=1000)
+        self.stats = {"calls": 0, "retries": 0, "errors": 0}
+
+    def _user_semaphore(self, user_key: str) -> asyncio.Semaphore:
+        entry = self._users.get(user_key)
+        if entry is None:
+            entry = self._users[user_key] = [asyncio.Semaphore(self._per_user_concurrency), 0]
+        entry[1] += 1
+        return entry[0]
+
+    def _release_user(self, user_key: str):
+        entry = self._users[user_key]
+        entry[1] -= 1
+        if entry[1] == 0:
+            del self._users[user_key]
+
+    async def _acquire_both(self, user_sem: asyncio.Semaphore | None):
+        if user_sem is not None:
+            await user_sem.acquire()
+        try:
+            await self._global.acquire()
+        except BaseException:
+            if user_sem is not None:
+                user_sem.release()
+            raise
+
+    async def acquire(self, user_key: str | None = None) -> "LLMSlot":
+        """Wait for one global (and per-user) concurrency slot."""
+        user_sem = self._user_semaphore(user_key) if user_key is not None else None
+        # Both semaphores free means acquiring cannot suspend, so skip the queue
+        ready = not self._global.locked() and (user_sem is None or not user_sem.locked())
+        try:
+            await self._admission.admit(lambda: self._acquire_both(user_sem), ready)
+        except BaseException:
+            if user_key is not None:
+                self._release_user(user_key)
+            raise
+
+        self._in_flight += 1
+        self.stats["calls"] += 1
+        return LLMSlot(self, user_key, user_sem)
+
+    def _release(self, slot: "LLMSlot", failed: bool):
+        if failed:
+            self.stats["errors"] += 1
+        self._latencies.append(time.monotonic() - slot.started_at)
+        self._in_flight -= 1
+        self._global.release()
+        if slot.user_sem is not None:
+            slot.user_sem.release()
+            self._release_user(slot.user_key)
+
+    @asynccontextmanager
+    async def slot(self, user_key: str | None = None):
+        """Hold a concurrency slot for the body of the `async with`."""
+        held = await self.acquire(user_key)
+        try:
+            yield
+        except Exception:
+            held.release(failed=True)
+            raise
+        else:
+            held.release()
+
+    @staticmethod
+    def _retry_after(error) -> float | None:
+        retry_after = error.response.headers.get("retry-after") if error.response is not None else None
+        try:
+            return float(retry_after)
+        except (TypeError, ValueError):
+            return None
+
+    def _backoff(self, attempt: int, error) -> float:
+        retry_after = self._retry_after(error)
+        if retry_after is not None:
+            return min(self._backoff_max, retry_after)
+        # Full jitter: spread retries so a burst does not hit the limit again in lockstep
+        return random.uniform(0, min(self._backoff_max, self._backoff_base * 2 ** attempt))
+
+    async def _with_retries(self, fn, *args, **kwargs):
+        import openai
+
+        attempt = 0
+        while True:
+            try:
+                return await fn(*args, **kwargs)
+            except openai.RateLimitError as e:
+                if attempt >= self._max_retries:
+                    retry_after = self._retry_after(e) or self._backoff_max
+                    raise LLMBusyError("Upstream LLM is rate limited", retry_after=retry_after) from e
+                self.stats["retries"] += 1
+                await asyncio.sleep(self._backoff(attempt, e))
+                attempt += 1
+
+    async def call(self, fn, *args, user_key: str | None = None, **kwargs):
+        """Await `fn(*args, **kwargs)` inside a slot, retrying on 429."""
+        async with self.slot(user_key):
+            return await self._with_retries(fn, *args, **kwargs)
+
+    async def chat(self, client: "openai.AsyncOpenAI", user_key: str | None = None, **kwargs):
+        """Non-streaming chat completion."""
+        return await self.call(client.chat.completions.create, user_key=user_key, **kwargs)
+
+    async def open_stream(self, client: "openai.AsyncOpenAI", user_key: str | None = None, **kwargs) -> "LLMStream":
+        """
+        Start a streaming chat completion while holding a slot.
+
+        Admission errors and 429 retries happen here, before the first chunk,
+        so callers can still answer with a proper HTTP error. The slot is
+        released when the returned stream is exhausted or `aclose()`d.
+        """
+        held = await self.acquire(user_key)
+        try:
+            stream = await self._with_retries(client.chat.completions.create, stream=True, **kwargs)
+        except BaseException:
+            held.release(failed=True)
+            raise
+        return LLMStream(stream, held)
+
+    def metrics(self) -> dict:
+        return {
+            **self.stats,
+            **self._admission.metrics(),
+            "in_flight": self._in_flight,
+            "latency_p50": percentile(self._latencies, 50),
+            "latency_p95": percentile(self._latencies, 95),
+            "latency_p99": percentile(self._latencies, 99),
+        }
+
+
+class LLMSlot:
+    def __init__(self, gateway: LLMGateway, user_key: str | None, user_sem: asyncio.Semaphore | None):
+        self._gateway = gateway
+        self.user_key = user_key
+        self.user_sem = user_sem
+        self.started_at = time.monotonic()
+        self._released = False
+
+    def release(self, failed: bool = False):
+        """Give the slot back; safe to call more than once."""
+        if not self._released:
+            self._released = True
+            self._gateway._release(self, failed)
+
+
+class LLMStream:
+    """Async iterator over completion chunks that owns its gateway slot."""
+
+    def __init__(self, stream, slot: LLMSlot):
+        self._stream = stream
+        self._slot = slot
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return await self._stream.__anext__()
+        except StopAsyncIteration:
+            await self.aclose()
+            raise
+        except BaseException:
+            await self.aclose(failed=True)
+            raise
+
+    async def aclose(self, failed: bool = False):
+        """Close the upstream stream and release the slot (idempotent)."""
+        if self._slot._released:
+            return
+        self._slot.release(failed)
+        await self._stream.close()
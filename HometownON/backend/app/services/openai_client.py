@@ -0,0 +1,32 @@
+"""
+Process-wide AsyncOpenAI client.
+
+The SDK takes about half a second to import, so it is loaded on first use
+(normally a background warm-up started by the app lifespan) instead of when
+the app module is imported.
+"""
+import threading
+
+from ..core.config import settings
+
+_client = None
+_lock = threading.Lock()
+
+
+def get_openai_client():
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                from openai import AsyncOpenAI
+
+                # Retries are left to the LLM gateway so 429s are retried in exactly one place.
+                _client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY, max_retries=0)
+    return _client
+
+
+async def close_openai_client():
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
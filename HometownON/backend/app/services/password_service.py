@@ -0,0 +1,127 @@
+"""
+Password hashing off the request path.
+
+bcrypt costs a few hundred milliseconds of CPU per call, so hashing and
+verification run in a small dedicated pool (processes by default) instead of
+the shared threadpool that every sync endpoint uses. Admission is bounded:
+callers wait in a FIFO queue of limited size and get `PasswordServiceBusy`
+when it is full or the wait times out, so an auth spike cannot starve other
+endpoints.
+"""
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+
+from passlib.context import CryptContext
+
+from ..core.config import settings
+from ._metrics import AdmissionQueue, percentile
+
+
+class PasswordServiceBusy(Exception):
+    """Too many password operations are already waiting."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+# Executed inside the worker pool; module-level so they can be pickled for processes.
+
+@lru_cache(maxsize=None)
+def _context(rounds: int) -> CryptContext:
+    # Hashes with a different cost are reported as needing an update
+    return CryptContext(schemes=["bcrypt"], bcrypt__rounds=rounds, deprecated="auto")
+
+def _hash(password: str, rounds: int) -> str:
+    return _context(rounds).hash(password)
+
+def _verify_and_update(password: str, hashed: str, rounds: int) -> tuple[bool, str | None]:
+    return _context(rounds).verify_and_update(password, hashed)
+
+
+class PasswordService:
+    def __init__(self, rounds: int = 12, executor: str = "process", workers: int = 2,
+                 max_queue: int = 64, queue_timeout: float = 10.0):
+        if executor not in ("process", "thread"):
+            raise ValueError(f"Unknown password executor: {executor!r}")
+        self.rounds = rounds
+        self._executor_kind = executor
+        self._workers = workers
+        self._admission = AdmissionQueue(
+            max_queue, queue_timeout, PasswordServiceBusy,
+            full_message="Password queue is full",
+            timeout_message="Timed out waiting for a password worker",
+        )
+        self._executor: Executor | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self._in_flight = 0
+        self._durations = deque(maxlen=1000)
+        self.stats = {"hashes": 0, "verifications": 0, "rehashes": 0}
+
+    def start(self):
+        if self._executor is not None:
+            return
+        if self._executor_kind == "process":
+            self._executor = ProcessPoolExecutor(max_workers=self._workers)
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="password")
+        self._slots = asyncio.Semaphore(self._workers)
+
+    def stop(self):
+        if self._executor is None:
+            return
+        self._executor.shutdown(wait=True)
+        self._executor = None
+        self._slots = None
+
+    async def _run(self, fn, *args):
+        # Lazily started for callers outside the app lifespan (scripts, shells)
+        self.start()
+        await self._admission.admit(self._slots.acquire, ready=not self._slots.locked())
+        self._in_flight += 1
+        start = time.monotonic()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self._durations.append(time.monotonic() - start)
+            self._in_flight -= 1
+            self._slots.release()
+
+    async def hash(self, password: str) -> str:
+        self.stats["hashes"] += 1
+        return await self._run(_hash, password, self.rounds)
+
+    async def verify_and_update(self, password: str, hashed: str) -> tuple[bool, str | None]:
+        """
+        Check a password; if it matches but was hashed with another cost,
+        also return a replacement hash at the current cost.
+        """
+        self.stats["verifications"] += 1
+        verified, new_hash = await self._run(_verify_and_update, password, hashed, self.rounds)
+        if new_hash is not None:
+            self.stats["rehashes"] += 1
+        return verified, new_hash
+
+    def metrics(self) -> dict:
+        return {
+            **self.stats,
+            **self._admission.metrics(),
+            "rounds": self.rounds,
+            "executor": self._executor_kind,
+            "workers": self._workers,
+            "in_flight": self._in_flight,
+            "duration_p50": percentile(self._durations, 50),
+            "duration_p95": percentile(self._durations, 95),
+        }
+
+
+password_service = PasswordService(
+    rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+    executor=settings.PASSWORD_HASH_EXECUTOR,
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+    queue_timeout=settings.PASSWORD_HASH_QUEUE_TIMEOUT,
+)
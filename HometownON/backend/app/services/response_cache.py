@@ -0,0 +1,190 @@
+import asyncio
+import importlib.util
+import logging
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from starlette.concurrency import run_in_threadpool
+
+from ..core.config import settings
+
+try:
+    import numpy as np
+except ImportError:  # semantic lookup is optional; exact-match caching still works
+    np = None
+
+# sentence-transformers pulls in torch, so it is only imported when the model loads
+HAS_SENTENCE_TRANSFORMERS = np is not None and importlib.util.find_spec("sentence_transformers") is not None
+
+logger = logging.getLogger(__name__)
+
+_TRAILING_PUNCTUATION = re.compile(r"[\s?!.~,。？！]+$")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Canonical form of a question used as the exact-match cache key."""
+    text = unicodedata.normalize("NFKC", prompt).lower().strip()
+    text = _WHITESPACE.sub(" ", text)
+    return _TRAILING_PUNCTUATION.sub("", text)
+
+
+@dataclass
+class CacheEntry:
+    answer: str
+    expires_at: float
+    slot: int | None = None
+
+
+class ResponseCache:
+    """
+    Cache of chatbot answers for first-turn questions.
+
+    Lookups try the normalized prompt first and then, when sentence-transformers
+    is installed, the most similar cached question by cosine similarity of its
+    embedding (same Korean models as the Crawling_Haman ChromaDB pipeline).
+    Entries expire after `ttl` seconds and the least recently used entry is
+    evicted once `max_entries` is reached.
+    """
+
+    def __init__(self, model_name: str | None, max_entries: int = 2048, ttl: float = 6 * 3600,
+                 similarity_threshold: float = 0.92):
+        self._model_name = model_name
+        self._model = None
+        self._model_failed = False
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._threshold = similarity_threshold
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        # Embeddings live in a preallocated matrix; slot i belongs to _slot_keys[i]
+        self._vectors = None
+        self._slot_keys: list[str | None] = [None] * max_entries
+        self._free_slots = list(range(max_entries - 1, -1, -1))
+        self._lock = threading.Lock()
+        self._model_lock = threading.Lock()
+        self.stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    @property
+    def semantic_enabled(self) -> bool:
+        return bool(self._model_name) and HAS_SENTENCE_TRANSFORMERS and not self._model_failed
+
+    def load_model(self):
+        """Load the embedding model (blocking; call from a worker thread)."""
+        with self._model_lock:
+            if self._model is None and self.semantic_enabled:
+                try:
+                    from sentence_transformers import SentenceTransformer
+
+                    self._model = SentenceTransformer(self._model_name)
+                except Exception:
+                    logger.exception("Response cache model %s failed to load; using exact match only", self._model_name)
+                    self._model_failed = True
+        return self._model
+
+    def _encode(self, key: str):
+        model = self.load_model()
+        if model is None:
+            return None
+        return model.encode(key, normalize_embeddings=True).astype(np.float32)
+
+    def _lookup_exact(self, key: str) -> str | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at < time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            self.stats["exact_hits"] += 1
+            return entry.answer
+
+    def _lookup_semantic(self, key: str):
+        embedding = self._encode(key)
+        if embedding is None:
+            return None, None
+        with self._lock:
+            if self._vectors is None or not self._entries:
+                return None, embedding
+            scores = self._vectors @ embedding
+            best = int(np.argmax(scores))
+            best_key = self._slot_keys[best]
+            if best_key is None or scores[best] < self._threshold:
+                return None, embedding
+            entry = self._entries[best_key]
+            if entry.expires_at < time.monotonic():
+                self._remove(best_key)
+                return None, embedding
+            self._entries.move_to_end(best_key)
+            self.stats["semantic_hits"] += 1
+            return entry.answer, embedding
+
+    async def lookup(self, prompt: str):
+        """Return `(answer, embedding)`; pass the embedding back to `store` on a miss."""
+        key = normalize_prompt(prompt)
+        answer = self._lookup_exact(key)
+        if answer is not None:
+            return answer, None
+        embedding = None
+        if self.semantic_enabled:
+            answer, embedding = await run_in_threadpool(self._lookup_semantic, key)
+            if answer is not None:
+                return answer, None
+        with self._lock:
+            self.stats["misses"] += 1
+        return None, embedding
+
+    def store(self, prompt: str, answer: str, embedding=None):
+        key = normalize_prompt(prompt)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            while len(self._entries) >= self._max_entries:
+                self._remove(next(iter(self._entries)))
+                self.stats["evictions"] += 1
+            entry = CacheEntry(answer=answer, expires_at=time.monotonic() + self._ttl)
+            if embedding is not None:
+                if self._vectors is None:
+                    self._vectors = np.zeros((self._max_entries, embedding.shape[0]), dtype=np.float32)
+                entry.slot = self._free_slots.pop()
+                self._vectors[entry.slot] = embedding
+                self._slot_keys[entry.slot] = key
+            self._entries[key] = entry
+            self.stats["stores"] += 1
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        if entry.slot is not None:
+            self._vectors[entry.slot] = 0.0
+            self._slot_keys[entry.slot] = None
+            self._free_slots.append(entry.slot)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            hits = self.stats["exact_hits"] + self.stats["semantic_hits"]
+            lookups = hits + self.stats["misses"]
+            return {
+                **self.stats,
+                "entries": len(self._entries),
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "semantic_enabled": self.semantic_enabled,
+            }
+
+
+async def replay_answer(answer: str, chunk_chars: int = 16):
+    """Stream a cached answer in small chunks, like a live completion."""
+    for i in range(0, len(answer), chunk_chars):
+        yield answer[i:i + chunk_chars]
+        await asyncio.sleep(0)
+
+
+response_cache = ResponseCache(
+    model_name=settings.RESPONSE_CACHE_EMBEDDING_MODEL if settings.RESPONSE_CACHE_SEMANTIC else None,
+    max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+    ttl=settings.RESPONSE_CACHE_TTL_SECONDS,
+    similarity_threshold=settings.RESPONSE_CACHE_SIMILARITY_THRESHOLD,
+)
@@ -0,0 +1,101 @@
+"""
+Local OpenAI-compatible chat completion server for offline load tests.
+
+Answers `POST /v1/chat/completions` (streaming and non-streaming) with a
+canned Korean reply, emitted at a configurable token rate after a
+configurable first-token latency. No API key or network access is needed.
+
+    python -m bench.fake_llm_server --port 9100 --tokens 80 --token-rate 60 --latency 0.4
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+REPLY_TOKENS = "함안 의 대표 관광지 는 말이산 고분군 과 악양 둑방길 입니다 .".split()
+
+app = FastAPI(title="Fake LLM")
+
+config = {
+    "tokens": int(os.getenv("FAKE_LLM_TOKENS", 60)),
+    "token_rate": float(os.getenv("FAKE_LLM_TOKEN_RATE", 50)),  # tokens per second
+    "latency": float(os.getenv("FAKE_LLM_LATENCY", 0.3)),  # seconds before the first token
+}
+
+
+def _tokens():
+    return [REPLY_TOKENS[i % len(REPLY_TOKENS)] + " " for i in range(config["tokens"])]
+
+
+def _chunk(completion_id: str, model: str, delta: dict, finish_reason: str | None = None) -> str:
+    payload = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+    return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+async def _stream(completion_id: str, model: str):
+    await asyncio.sleep(config["latency"])
+    yield _chunk(completion_id, model, {"role": "assistant", "content": ""})
+    interval = 1.0 / config["token_rate"] if config["token_rate"] > 0 else 0.0
+    for token in _tokens():
+        yield _chunk(completion_id, model, {"content": token})
+        await asyncio.sleep(interval)
+    yield _chunk(completion_id, model, {}, finish_reason="stop")
+    yield "data: [DONE]\n\n"
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    model = body.get("model", "fake-gpt")
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    if body.get("stream"):
+        return StreamingResponse(_stream(completion_id, model), media_type="text/event-stream")
+
+    tokens = _tokens()
+    await asyncio.sleep(config["latency"] + (len(tokens) / config["token_rate"] if config["token_rate"] > 0 else 0))
+    return JSONResponse({
+        "id": completion_id,
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": "".join(tokens)},
+            "finish_reason": "stop",
+        }],
+        "usage": {"prompt_tokens": 0, "completion_tokens": len(tokens), "total_tokens": len(tokens)},
+    })
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok", **config}
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--tokens", type=int, default=config["tokens"])
+    parser.add_argument("--token-rate", type=float, default=config["token_rate"])
+    parser.add_argument("--latency", type=float, default=config["latency"])
+    args = parser.parse_args()
+    config.update(tokens=args.tokens, token_rate=args.token_rate, latency=args.latency)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
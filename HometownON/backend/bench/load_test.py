@@ -0,0 +1,228 @@
+"""
+Offline load test for the HometownON backend.
+
+Launches the local fake LLM server and the backend (on SQLite unless
+--database-url points at a MySQL-compatible server), then drives concurrent
+clients against /api/chatbot/chat and /api/users/login and reports
+throughput, time-to-first-token and p50/p95/p99 latencies.
+
+    cd HometownON/backend
+    python -m bench.load_test --concurrency 100 --requests 1000 --token-rate 80
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+BENCH_EMAIL = "loadtest@hometown.on"
+BENCH_PASSWORD = "loadtest-password"
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentile(values: list[float], pct: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def summarize(name: str, latencies: list[float], ttfts: list[float], errors: int, elapsed: float) -> dict:
+    ms = lambda v: round(v * 1000, 1) if v is not None else None  # noqa: E731
+    report = {
+        "scenario": name,
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 2),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "latency_p50_ms": ms(percentile(latencies, 50)),
+        "latency_p95_ms": ms(percentile(latencies, 95)),
+        "latency_p99_ms": ms(percentile(latencies, 99)),
+    }
+    if ttfts:
+        report.update(
+            ttft_p50_ms=ms(percentile(ttfts, 50)),
+            ttft_p95_ms=ms(percentile(ttfts, 95)),
+            ttft_p99_ms=ms(percentile(ttfts, 99)),
+        )
+    return report
+
+
+async def run_workers(total: int, concurrency: int, request_fn):
+    """Run `total` calls of `request_fn(i)` with `concurrency` workers."""
+    latencies, ttfts = [], []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            try:
+                ttft = await request_fn(i)
+            except (httpx.HTTPError, AssertionError):
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+            if ttft is not None:
+                ttfts.append(ttft - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, ttfts, errors, time.perf_counter() - start
+
+
+async def chat_request(client: httpx.AsyncClient, i: int) -> float | None:
+    first_token = None
+    # Unique prompts so the response cache (if enabled) does not short-circuit the LLM
+    payload = {"message": f"함안에서 가볼 만한 곳을 추천해 주세요 #{i}"}
+    async with client.stream("POST", "/api/chatbot/chat", json=payload) as response:
+        assert response.status_code == 200, response.status_code
+        async for chunk in response.aiter_bytes():
+            if chunk and first_token is None:
+                first_token = time.perf_counter()
+    return first_token
+
+
+async def login_request(client: httpx.AsyncClient, i: int) -> None:
+    response = await client.post("/api/users/login", json={"email": BENCH_EMAIL, "password": BENCH_PASSWORD})
+    assert response.status_code == 200, response.status_code
+
+
+async def ensure_bench_user(base_url: str):
+    # Separate non-keepalive client: a failed signup must not poison the measured pool
+    async with httpx.AsyncClient(base_url=base_url, headers={"Connection": "close"}) as client:
+        await _ensure_bench_user(client)
+
+
+async def _ensure_bench_user(client: httpx.AsyncClient):
+    await client.post("/api/users/signup", json={
+        "email": BENCH_EMAIL,
+        "password": BENCH_PASSWORD,
+        "profile": {"display_name": "부하테스트", "birth_year": 1990, "home_region": "서울", "target_region": "함안"},
+    })
+    # The user may already exist from an earlier run; a successful login is what matters
+    response = await client.post("/api/users/login", json={"email": BENCH_EMAIL, "password": BENCH_PASSWORD})
+    if response.status_code != 200:
+        raise RuntimeError(f"Could not set up the benchmark user: {response.status_code} {response.text}")
+
+
+async def wait_ready(url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} did not become ready within {timeout}s")
+
+
+async def run_benchmarks(args) -> list[dict]:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    timeout = httpx.Timeout(args.timeout)
+    results = []
+    async with httpx.AsyncClient(base_url=args.backend_url, limits=limits, timeout=timeout) as client:
+        if "chat" in args.scenarios:
+            results.append(summarize("chat", *await run_workers(
+                args.requests, args.concurrency, lambda i: chat_request(client, i))))
+        if "login" in args.scenarios:
+            await ensure_bench_user(args.backend_url)
+            results.append(summarize("login", *await run_workers(
+                args.requests, args.concurrency, lambda i: login_request(client, i))))
+    return results
+
+
+def print_report(results: list[dict]):
+    columns = ["scenario", "requests", "errors", "throughput_rps", "latency_p50_ms", "latency_p95_ms",
+               "latency_p99_ms", "ttft_p50_ms", "ttft_p95_ms", "ttft_p99_ms"]
+    print("  ".join(f"{c:>14}" for c in columns))
+    for row in results:
+        print("  ".join(f"{str(row.get(c, '-')):>14}" for c in columns))
+
+
+def start_servers(args, workdir: Path) -> list[subprocess.Popen]:
+    llm_port, app_port = free_port(), free_port()
+    processes = [subprocess.Popen(
+        [sys.executable, "-m", "bench.fake_llm_server", "--port", str(llm_port),
+         "--tokens", str(args.tokens), "--token-rate", str(args.token_rate), "--latency", str(args.latency)],
+        cwd=BACKEND_DIR,
+    )]
+
+    database_url = args.database_url or f"sqlite:///{workdir / 'bench.db'}"
+    env = {
+        **os.environ,
+        "OPENAI_API_KEY": "sk-bench",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{llm_port}/v1",
+        "DATABASE_URL": database_url,
+        # Required settings; unused when DATABASE_URL is set
+        "mysql_host": os.getenv("mysql_host", "localhost"),
+        "mysql_port": os.getenv("mysql_port", "3306"),
+        "mysql_user": os.getenv("mysql_user", "bench"),
+        "mysql_password": os.getenv("mysql_password", "bench"),
+        "mysql_database": os.getenv("mysql_database", "bench"),
+        "RESPONSE_CACHE_ENABLED": "true" if args.response_cache else "false",
+        "RESPONSE_CACHE_SEMANTIC": "false",
+    }
+    app_module = "bench.sqlite_app:app" if database_url.startswith("sqlite") else "app.main:app"
+    processes.append(subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app_module, "--port", str(app_port),
+         "--workers", str(args.workers), "--log-level", "warning", "--no-access-log"],
+        cwd=BACKEND_DIR, env=env,
+    ))
+    args.backend_url = f"http://127.0.0.1:{app_port}"
+    asyncio.run(wait_ready(f"http://127.0.0.1:{llm_port}/health"))
+    asyncio.run(wait_ready(f"{args.backend_url}/"))
+    return processes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test for the HometownON backend")
+    parser.add_argument("--concurrency", type=int, default=50, help="concurrent clients")
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario")
+    parser.add_argument("--scenarios", nargs="+", choices=["chat", "login"], default=["chat", "login"])
+    parser.add_argument("--tokens", type=int, default=60, help="fake LLM tokens per reply")
+    parser.add_argument("--token-rate", type=float, default=50.0, help="fake LLM tokens per second")
+    parser.add_argument("--latency", type=float, default=0.3, help="fake LLM first-token latency (s)")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--database-url", help="SQLAlchemy URL of a MySQL-compatible server (default: temp SQLite)")
+    parser.add_argument("--backend-url", help="benchmark an already running backend instead of launching one")
+    parser.add_argument("--response-cache", action="store_true", help="leave the chatbot response cache enabled")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-request timeout (s)")
+    parser.add_argument("--json", type=Path, help="also write the report to this JSON file")
+    args = parser.parse_args()
+
+    processes = []
+    with tempfile.TemporaryDirectory(prefix="hometown-bench-") as workdir:
+        try:
+            if not args.backend_url:
+                processes = start_servers(args, Path(workdir))
+            results = asyncio.run(run_benchmarks(args))
+        finally:
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.wait(timeout=10)
+
+    print_report(results)
+    if args.json:
+        args.json.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+ASGI entry point that serves the backend from a local SQLite file.
+
+The models use MySQL-specific integer types and spatial columns. For
+benchmarks those are rendered as plain SQLite INTEGER columns and the
+SpatiaLite bookkeeping functions GeoAlchemy2 calls are registered as
+no-ops, so the real app, routers and CRUD code run unchanged.
+
+    DATABASE_URL=sqlite:///bench.db uvicorn bench.sqlite_app:app
+"""
+from sqlalchemy import event
+from sqlalchemy.dialects.mysql import BIGINT, SMALLINT, TINYINT
+from sqlalchemy.ext.compiler import compiles
+
+from app.bootstrap import create_schema
+from app.core.database import engine
+from app.main import app  # noqa: F401
+
+SPATIALITE_NOOPS = (
+    "RecoverGeometryColumn",
+    "DiscardGeometryColumn",
+    "CreateSpatialIndex",
+    "DisableSpatialIndex",
+)
+
+
+@compiles(BIGINT, "sqlite")
+@compiles(SMALLINT, "sqlite")
+@compiles(TINYINT, "sqlite")
+def _compile_integer(type_, compiler, **kw):
+    # INTEGER PRIMARY KEY is SQLite's rowid alias, which makes autoincrement work
+    return "INTEGER"
+
+
+@event.listens_for(engine, "connect")
+def _register_spatialite_noops(dbapi_connection, connection_record):
+    for name in SPATIALITE_NOOPS:
+        dbapi_connection.create_function(name, -1, lambda *args: 1)
+    dbapi_connection.execute("PRAGMA journal_mode=WAL")
+    dbapi_connection.execute("PRAGMA synchronous=NORMAL")
+
+
+# The app does not create tables on startup; do it here, after the hooks are in place
+create_schema()
@@ -0,0 +1,103 @@
+"""
+Startup-time benchmark for the HometownON backend.
+
+Measures, over several cold starts, how long a fresh interpreter takes to
+import `app.main` and how long a new uvicorn worker takes from spawn until
+it answers `GET /`. No database or LLM is contacted during startup, so this
+runs offline.
+
+    cd HometownON/backend
+    python -m bench.startup_time --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from .load_test import BACKEND_DIR, free_port
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+
+
+def bench_env(workdir: Path) -> dict:
+    return {
+        **os.environ,
+        "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY", "sk-bench"),
+        "DATABASE_URL": os.getenv("DATABASE_URL", f"sqlite:///{workdir / 'startup.db'}"),
+        "mysql_host": os.getenv("mysql_host", "localhost"),
+        "mysql_port": os.getenv("mysql_port", "3306"),
+        "mysql_user": os.getenv("mysql_user", "bench"),
+        "mysql_password": os.getenv("mysql_password", "bench"),
+        "mysql_database": os.getenv("mysql_database", "bench"),
+    }
+
+
+def measure_import(env: dict) -> float:
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET], cwd=BACKEND_DIR, env=env,
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def measure_ready(env: dict, timeout: float) -> float:
+    port = free_port()
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env,
+    )
+    try:
+        with httpx.Client() as client:
+            while time.perf_counter() - start < timeout:
+                try:
+                    if client.get(f"http://127.0.0.1:{port}/").status_code == 200:
+                        return time.perf_counter() - start
+                except httpx.HTTPError:
+                    pass
+                time.sleep(0.01)
+        raise RuntimeError(f"Backend did not become ready within {timeout}s")
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def summarize(name: str, samples: list[float]) -> dict:
+    return {
+        "phase": name,
+        "runs": len(samples),
+        "median_ms": round(statistics.median(samples) * 1000, 1),
+        "min_ms": round(min(samples) * 1000, 1),
+        "max_ms": round(max(samples) * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup-time benchmark for the HometownON backend")
+    parser.add_argument("--runs", type=int, default=5, help="cold starts per phase")
+    parser.add_argument("--timeout", type=float, default=60.0, help="readiness timeout per start (s)")
+    parser.add_argument("--json", type=Path, help="also write the report to this JSON file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="hometown-startup-") as workdir:
+        env = bench_env(Path(workdir))
+        results = [
+            summarize("import app.main", [measure_import(env) for _ in range(args.runs)]),
+            summarize("spawn -> ready", [measure_ready(env, args.timeout) for _ in range(args.runs)]),
+        ]
+
+    for row in results:
+        print(f"{row['phase']:>16}  median {row['median_ms']:>8} ms  min {row['min_ms']:>8} ms  max {row['max_ms']:>8} ms")
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()